@@ -0,0 +1,140 @@
+# alert_detector.py — Gate/빗썸 틱 기반 실시간 알림 감지
+#
+# 스캔 주기를 기다리지 않고 틱이 들어온 심볼만 그때그때 재평가한다.
+# 틱 콜백은 수집 루프 안에서 불리므로 심볼에 표시만 하고 바로 반환하고, 평가는 전용 스레드가
+# 모아서(같은 심볼의 연속 틱은 1회로 합침) ScanEngine.evaluate 로 한다.
+# 1h 봉 지표는 엔진이 마지막으로 계산한 값을 쓰므로 정밀 검사 대상(상위권/리드/부스트) 심볼만 평가된다.
+# 발송은 telegram_notify.OUTBOX 로 넘기므로 감지 스레드는 텔레그램 응답을 기다리지 않는다.
+
+import threading, time
+from collections import deque
+
+from config import ALERT_POLL_SEC
+from gate_stream import STATE
+from indicators import adaptive_lead_threshold, market_vps_median
+from scan_engine import ENGINE
+from telegram_notify import OUTBOX, latency_summary
+from metrics import Histogram, collector
+import bithumb_stream as bstream
+
+TICK_TO_DECISION = Histogram("scanner_alert_tick_to_decision_seconds", "tick receive to alert decision", ())
+
+class AlertDetector:
+    def __init__(self, engine):
+        self.engine = engine
+        self._dirty = {}          # sym -> 가장 이른 미처리 틱 시각
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._pair_sym = {}
+        self._rows = (0, {})      # (스냅샷 version, sym -> row)
+        self.stats = {"ticks": 0, "evals": 0, "signals": 0, "skipped": 0, "errors": 0}
+        self.latency = deque(maxlen=1000)   # 틱 수신 → 판정(발송 큐 투입) 완료(초)
+
+    # ===== 틱 콜백(수집 루프에서 호출 — 가볍게) =====
+    def on_gate(self, pair: str, now: float):
+        sym = self._pair_sym.get(pair)
+        if sym:
+            self._mark(sym, now)
+
+    def on_bithumb(self, sym: str, now: float):
+        if sym in self.engine.symbol_map:
+            self._mark(sym, now)
+
+    def _mark(self, sym: str, now: float):
+        self.stats["ticks"] += 1
+        with self._lock:
+            if sym not in self._dirty:
+                self._dirty[sym] = now
+        if not self._wake.is_set():
+            self._wake.set()
+
+    # ===== 평가 =====
+    def _last_row(self, sym: str):
+        snap = self.engine.snapshot
+        if self._rows[0] != snap.version:
+            self._rows = (snap.version, {r["symbol"]: r for r in snap.rows})
+        return self._rows[1].get(sym)
+
+    def evaluate(self, sym: str, t_event: float, lead_thresh: float, usdt_price: float):
+        feats = self.engine._features.get(sym)
+        row = self._last_row(sym)
+        if feats is None or row is None:
+            self.stats["skipped"] += 1   # 1h 봉 지표 없음 → 전체 스캔에서 평가
+            return None
+        price, value = bstream.live_ticker(sym) or (row["price"], row["value_24h"])
+        ob_ratio = bstream.live_ob_ratio(sym)
+        if ob_ratio is None:
+            ob_ratio = row["orderbook_ratio"]
+            if ob_ratio is None:
+                self.stats["skipped"] += 1   # 이번 스캔에서 호가를 받지 않은 심볼 → 다음 스캔에서 평가
+                return None
+        cmp_ratio, vol_surge = feats
+        res = self.engine.evaluate(sym, price, value, cmp_ratio, vol_surge, ob_ratio, lead_thresh, t_event, usdt_price)
+        self.stats["evals"] += 1
+        if res["pass"] and res["lead"] >= lead_thresh:
+            self.stats["signals"] += 1
+        dt = time.time() - t_event
+        self.latency.append(dt)
+        TICK_TO_DECISION.observe(dt)
+        return res
+
+    def drain(self):
+        with self._lock:
+            batch, self._dirty = self._dirty, {}
+        if not batch:
+            return 0
+        lead_thresh = adaptive_lead_threshold(market_vps_median())
+        # 엔진 필드는 엔진 스레드만 쓴다 — 여기서는 스트림 값, 없으면 마지막 발행 스냅샷의 값
+        usdt_price = bstream.live_usdt_price() or self.engine.snapshot.usdt_price
+        for sym, t_event in batch.items():
+            try:
+                self.evaluate(sym, t_event, lead_thresh, usdt_price)
+            except Exception:
+                self.stats["errors"] += 1
+        return len(batch)
+
+    def _run(self):
+        while True:
+            remote = STATE.remote is not None
+            self._wake.wait(ALERT_POLL_SEC if remote else None)
+            self._wake.clear()
+            if remote:
+                # process 모드는 틱 콜백이 수집 프로세스에 있으므로 매핑 심볼 전체를 주기 재평가
+                now = time.time()
+                with self._lock:
+                    for sym in self.engine.symbol_map:
+                        self._dirty.setdefault(sym, now)
+            self.drain()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self.remap()
+        STATE.listeners.append(self.on_gate)
+        bstream.STATE.listeners.append(self.on_bithumb)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def remap(self):
+        """엔진 심볼 매핑이 바뀌면 호출 — Gate 페어 → 심볼 역매핑 재구성"""
+        self._pair_sym = {p: s for s, p in self.engine.symbol_map.items()}
+
+    def health(self) -> dict:
+        return {
+            **self.stats, "pending": len(self._dirty),
+            "tick_to_decision_ms": latency_summary(self.latency), "outbox": OUTBOX.snapshot()
+        }
+
+DETECTOR = AlertDetector(ENGINE)
+
+@collector
+def _metrics():
+    ob = OUTBOX.snapshot()
+    return [
+        ("scanner_alert_detector_total", "counter", "tick detector counters",
+         [({"event": k}, v) for k, v in DETECTOR.stats.items()]),
+        ("scanner_telegram_outbox_total", "counter", "telegram outbox counters",
+         [({"event": k}, ob[k]) for k in ("queued", "sent", "failed", "dropped")]),
+        ("scanner_telegram_outbox_pending", "gauge", "alerts waiting in the outbox", [({}, ob["pending"])]),
+    ]
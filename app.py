@@ -1,28 +1,35 @@
 # app.py — Flask 3.x + 안전가드 + 상위3 기본 + 표 뷰
 
-import os, threading, asyncio
-from flask import Flask, jsonify, request
-import httpx
+import os, threading, asyncio, time
+from html import escape
+from flask import Flask, Response, jsonify, request
 
+from symbol_sync import build_intersection, load_cache, save_cache
+from gate_stream import run_stream, shard_health, market_stats, update_pairs, STATE
+from scan_engine import ENGINE, Snapshot
 from config import (
-    BITHUMB_BASE, TOP_N_BY_VALUE, PREMIUM_MIN, ORDERBOOK_IMBAL_RATIO,
-    VOLUME_SURGE_RATIO, MA_COMPRESSION_MAX
+    GATE_INGEST_MODE, BITHUMB_STREAM_ENABLED, ALERT_DETECTOR_ENABLED, SYMBOL_MAP_TTL_SEC,
+    SHARED_POLL_SEC, SHARED_PUBLISH_SEC, SSE_MAX_VIEWERS
 )
-from symbol_sync import build_intersection
-from gate_stream import run_stream, STATE
-from indicators import compression, final_score, adaptive_lead_threshold
-from telegram_notify import send_telegram, can_send
+import bithumb_stream
+import http_pool
+from http_pool import pool_stats
+from candle_store import CANDLES
+from alert_detector import DETECTOR
+from scan_stream import ScanFeed
+from history import HISTORY
+from shared_store import STORE
+import metrics
 
 app = Flask(__name__)
 SYMBOL_MAP = {}
-HTTP_TIMEOUT = 8.0
 
 # ===== 전역 에러 핸들러: 500 방지 =====
 @app.errorhandler(Exception)
 def _any_error(e):
     return jsonify({"ok": False, "error": f"{type(e).__name__}: {e}"}), 500
 
-# ===== 유틸: 안전 연산/재시도 =====
+# ===== 유틸: 안전 연산 =====
 def safe_ratio(num: float, den: float) -> float:
     try:
         den = float(den)
@@ -32,186 +39,257 @@ def safe_ratio(num: float, den: float) -> float:
         pass
     return 0.0
 
-async def get_with_retry(client: httpx.AsyncClient, url: str, params=None, tries: int = 3):
-    last_err = None
-    for i in range(tries):
-        try:
-            r = await client.get(url, params=params, timeout=HTTP_TIMEOUT)
-            r.raise_for_status()
-            return r.json()
-        except Exception as e:
-            last_err = e
-            await asyncio.sleep(0.5 * (i + 1))  # 0.5s, 1.0s, 1.5s
-    raise last_err
-
-async def bithumb_all(client: httpx.AsyncClient):
-    return await get_with_retry(client, f"{BITHUMB_BASE}/public/ticker/ALL_KRW")
-
-async def candles_1h(client: httpx.AsyncClient, sym: str):
-    data = await get_with_retry(client, f"{BITHUMB_BASE}/public/candlestick/{sym}_KRW/1h")
-    if data.get("status") != "0000":
-        return []
-    return data.get("data", [])[-140:]
-
-async def orderbook(client: httpx.AsyncClient, sym: str):
-    return await get_with_retry(client, f"{BITHUMB_BASE}/public/orderbook/{sym}_KRW")
-
-# ===== 안정 초기화(첫 요청 1회) =====
-_init_done = False
+# ===== 초기화: 캐시된 심볼 매핑으로 즉시 기동 + 백그라운드 매핑 갱신 =====
+_init_started = False
 _init_lock = threading.Lock()
+_services_started = False
+SYNC = {"source": None, "updated": 0.0, "refreshes": 0, "added": 0, "removed": 0, "last_error": None}
 
 def _start_ws_thread(pairs):
+    if GATE_INGEST_MODE == "process":
+        # 별도 프로세스 수집 — STATE.book/metrics 는 공유 메모리 읽기 뷰가 된다
+        from shm_ingest import start_ingest_process
+        start_ingest_process(pairs, STATE)
+        return
     async def _ws_main():
-        await run_stream(pairs)
-    t = threading.Thread(target=lambda: asyncio.run(_ws_main()), daemon=True)
+        await run_stream(list(SYMBOL_MAP.values()))   # 기동 사이 매핑이 바뀌었으면 최신으로
+    t = threading.Thread(target=lambda: http_pool.run(_ws_main()), daemon=True)
     t.start()
 
-def _blocking_init_once():
-    global _init_done, SYMBOL_MAP
-    if _init_done:
-        return
+def _start_bithumb_thread(symbols):
+    t = threading.Thread(target=lambda: http_pool.run(bithumb_stream.run_stream(list(SYMBOL_MAP) or symbols)), daemon=True)
+    t.start()
+
+def _start_services(mapping):
+    pairs = list(mapping.values())
+    if pairs:
+        _start_ws_thread(pairs)
+    if BITHUMB_STREAM_ENABLED and mapping:
+        _start_bithumb_thread(list(mapping))
+    ENGINE.start(mapping)
+    HISTORY.start(ENGINE)
+    metrics.PROFILER.start()
+    if ALERT_DETECTOR_ENABLED:
+        DETECTOR.start()
+
+def _apply_symbol_map(mapping, source: str):
+    """첫 매핑이면 수집/엔진을 띄우고, 이후에는 바뀐 심볼만 (해제)구독한다."""
+    global SYMBOL_MAP, _services_started, _map_version
+    old, SYMBOL_MAP = SYMBOL_MAP, mapping
+    _map_version += 1
+    if not _services_started:
+        _start_services(mapping)
+        _services_started = True
+    elif mapping != old:
+        SYNC["added"] += len(mapping.keys() - old.keys())
+        SYNC["removed"] += len(old.keys() - mapping.keys())
+        ENGINE.start(mapping)    # 실행 중이면 매핑만 교체
+        DETECTOR.remap()
+        if STATE.remote is not None:
+            STATE.pairs = list(mapping.values())
+            STATE.remote.set_pairs(STATE.pairs)
+        else:
+            update_pairs(list(mapping.values()))
+        if BITHUMB_STREAM_ENABLED:
+            bithumb_stream.update_symbols(list(mapping))
+    SYNC["source"] = source
+
+async def _symbol_loop():
+    cached, age = load_cache()
+    if cached:
+        _apply_symbol_map(cached, "cache")   # 거래소 목록 조회를 기다리지 않고 바로 수집 시작
+        SYNC["updated"] = time.time() - age
+    wait = max(0.0, SYMBOL_MAP_TTL_SEC - age) if cached else 0.0
+    fails = 0
+    while True:
+        await asyncio.sleep(wait)
+        try:
+            mapping = await build_intersection()
+            if not mapping:
+                raise RuntimeError("empty symbol intersection")
+            save_cache(mapping)
+            _apply_symbol_map(mapping, "live")
+            SYNC.update(updated=time.time(), refreshes=SYNC["refreshes"] + 1, last_error=None)
+            wait, fails = SYMBOL_MAP_TTL_SEC, 0
+        except Exception as e:
+            # 기존 매핑으로 계속 서비스 — 매핑이 아예 없으면 짧게 재시도
+            SYNC["last_error"] = f"{type(e).__name__}: {e}"
+            fails += 1
+            wait = min(60.0, 2.0 ** fails) if not SYMBOL_MAP else min(SYMBOL_MAP_TTL_SEC, 60.0)
+
+# ===== 다중 워커(SHARED_STORE): 리더만 수집/스캔/알림, 팔로워는 저장소를 읽어 응답 =====
+WORKER = {"role": "single", "pid": os.getpid(), "since": None, "mirrored": 0}
+_map_version = 0       # 리더: 매핑이 바뀔 때마다 증가 → 저장소 symbol_map 버전
+_mirrored_map = None   # 팔로워: 마지막으로 받은 symbol_map 버전
+
+def _store_snapshot(snap):
+    STORE.put("snapshot", {**snap.as_dict(), "last_error": ENGINE.last_error}, snap.version)
+
+def _leader_publish_loop():
+    published = None
+    while True:
+        try:
+            STORE.put("health", _health_payload())
+            STORE.put("metrics", metrics.render())
+            if published != _map_version:
+                published = _map_version
+                STORE.put("symbol_map", SYMBOL_MAP, published)
+        except Exception:
+            pass   # 저장소 일시 오류 — 다음 주기에 다시
+        time.sleep(SHARED_PUBLISH_SEC)
+
+def _become_leader():
+    WORKER.update(role="leader", since=time.time())
+    got = STORE.get("snapshot")
+    if got and got[0] > ENGINE.snapshot.version:
+        # 직전 리더의 스냅샷에서 버전을 이어 간다(팔로워/SSE 구독자는 그대로 diff 를 받는다)
+        ENGINE.adopt(Snapshot.from_dict(got[2]), got[2].get("last_error"))
+    ENGINE.listeners.append(_store_snapshot)
+    threading.Thread(target=_leader_publish_loop, daemon=True, name="store-publish").start()
+    threading.Thread(target=lambda: http_pool.run(_symbol_loop()), daemon=True, name="symbol-sync").start()
+
+def _mirror_once():
+    global SYMBOL_MAP, _mirrored_map
+    v = STORE.version("snapshot")
+    if v is not None and v != ENGINE.snapshot.version:
+        got = STORE.get("snapshot")
+        ENGINE.adopt(Snapshot.from_dict(got[2]), got[2].get("last_error"))   # /scan/stream 구독자도 깨운다
+        WORKER["mirrored"] += 1
+    mv = STORE.version("symbol_map")
+    if mv is not None and mv != _mirrored_map:
+        got = STORE.get("symbol_map")
+        SYMBOL_MAP, _mirrored_map = got[2], got[0]
+
+def _follower_loop():
+    # 리더 프로세스가 죽으면 flock 이 풀리므로 다음 시도에서 이 워커가 리더가 된다
+    while not STORE.try_lead():
+        try:
+            _mirror_once()
+        except Exception:
+            pass
+        time.sleep(SHARED_POLL_SEC)
+    _become_leader()
+
+def init_background():
+    """수집/스캔/매핑 갱신을 백그라운드로 시작(즉시 반환). 여러 번 불러도 한 번만 실행."""
+    global _init_started
     with _init_lock:
-        if _init_done:
+        if _init_started:
             return
-        SYMBOL_MAP = asyncio.run(build_intersection())
-        pairs = list(SYMBOL_MAP.values())
-        if pairs:
-            _start_ws_thread(pairs)
-        _init_done = True
+        _init_started = True
+    if STORE is None:
+        threading.Thread(target=lambda: http_pool.run(_symbol_loop()), daemon=True, name="symbol-sync").start()
+    elif STORE.try_lead():
+        _become_leader()
+    else:
+        WORKER.update(role="follower", since=time.time())
+        HISTORY.attach()
+        try:
+            _mirror_once()   # 첫 요청부터 리더의 최신 스냅샷으로 응답
+        except Exception:
+            pass
+        threading.Thread(target=_follower_loop, daemon=True, name="store-follow").start()
 
 @app.before_request
 def _ensure_initialized():
-    _blocking_init_once()
+    init_background()   # WSGI 서버로 띄운 경우 첫 요청에서 시작(요청은 기다리지 않음)
 
 # ===== 라우트 =====
+def _health_payload() -> dict:
+    snap = ENGINE.snapshot
+    return {
+        "ok": True, "ws_pairs": len(STATE.pairs), "mapped": len(SYMBOL_MAP),
+        "symbol_map": {**SYNC, "age_sec": round(time.time() - SYNC["updated"], 1) if SYNC["updated"] else None},
+        "ws_shards": shard_health(),
+        "market": market_stats(),
+        "bithumb_ws": bithumb_stream.health(),
+        "scan": {
+            "version": snap.version,
+            "age_sec": None if snap.version == 0 else round(snap.age, 3),
+            "duration_sec": round(snap.duration, 3),
+            "interval_sec": ENGINE.interval,
+            "last_error": ENGINE.last_error,
+            "boosted": sorted(ENGINE.boosted),
+            "stats": dict(ENGINE.stats),
+            "candles": {"cached": len(CANDLES), **CANDLES.stats}
+        },
+        "http": pool_stats(),
+        "alerts": DETECTOR.health(),
+        "stream": FEED.health(),
+        "history": HISTORY.health(),
+        "worker": WORKER
+    }
+
 @app.get("/health")
 def health():
-    return {"ok": True, "ws_pairs": len(STATE.pairs), "mapped": len(SYMBOL_MAP)}
+    if WORKER["role"] != "follower":
+        return _health_payload()
+    # 팔로워: 수집/스캔 상태는 리더가 게시한 것, 워커·SSE 상태는 자기 것
+    got = STORE.get("health")
+    body = got[2] if got else {"ok": False, "error": "leader has not published yet"}
+    snap = ENGINE.snapshot
+    return {**body, "worker": WORKER, "stream": FEED.health(),
+            "leader_published_age_sec": round(time.time() - got[1], 3) if got else None,
+            "mirrored_scan": {"version": snap.version, "age_sec": None if snap.version == 0 else round(snap.age, 3)}}
 
 @app.get("/symbols")
 def symbols():
     return {"mapped": SYMBOL_MAP}
 
-@app.get("/scan")
-async def scan():
-    # 시장 강도 기반 리드 임계치
-    market_vps = sorted([m.get("vol_ps", 0.0) for m in STATE.metrics.values()])
-    vps_med = market_vps[len(market_vps)//2] if market_vps else 0.0
-    LEAD_THRESH = adaptive_lead_threshold(vps_med)
-
-    out, errors = [], []
-
-    async with httpx.AsyncClient(headers={"accept": "application/json"}) as client:
-        # 1) 틱커 전체
-        try:
-            all_t = await bithumb_all(client)
-            data = all_t.get("data", {}) or {}
-            if not data:
-                return jsonify({"ok": False, "stage": "bithumb_all", "error": "empty"}), 200
-            usdt_price = float((data.get("USDT") or {}).get("closing_price") or 0)
-        except Exception as e:
-            return jsonify({"ok": False, "stage": "bithumb_all", "error": str(e)}), 200
-
-        # 2) 거래대금 상위 선별
-        rows = []
-        for sym, row in data.items():
-            if sym == "date":
-                continue
-            try:
-                price = float((row or {}).get("closing_price") or 0)
-                value = float((row or {}).get("acc_trade_value_24H") or 0)
-                if price > 0 and value > 0:
-                    rows.append((sym, price, value))
-            except Exception:
-                continue
-        rows.sort(key=lambda x: x[2], reverse=True)
-        cand_syms = [s for s, _, _ in rows[:TOP_N_BY_VALUE]]
-
-        # 3) 병렬 수집
-        tasks_c = {s: asyncio.create_task(candles_1h(client, s)) for s in cand_syms}
-        tasks_o = {s: asyncio.create_task(orderbook(client, s)) for s in cand_syms}
-
-        # 4) 평가
-        for sym, price, value in rows[:TOP_N_BY_VALUE]:
-            try:
-                candles = await tasks_c[sym]
-                close = [float(c[2]) for c in candles if isinstance(c, (list, tuple)) and len(c) >= 6]
-                vol   = [float(c[5]) for c in candles if isinstance(c, (list, tuple)) and len(c) >= 6]
-
-                cmp_ratio = compression(close) if close else 1.0
-                base5 = (sum(vol[-6:-1]) / 5.0) if len(vol) >= 6 else 0.0
-                lastv = vol[-1] if vol else 0.0
-                vol_surge = (lastv / base5) if base5 > 0 else 0.0
-
-                ob = await tasks_o[sym]
-                book = (ob.get("data") or {})
-                bids = (book.get("bids") or [])[:10]
-                asks = (book.get("asks") or [])[:10]
-                bid_qty = sum(float(b.get("quantity") or 0) for b in bids if isinstance(b, dict))
-                ask_qty = sum(float(a.get("quantity") or 0) for a in asks if isinstance(a, dict))
-                ob_ratio = (bid_qty / ask_qty) if ask_qty > 0 else 0.0
-
-                prem = None
-                gate_pair = SYMBOL_MAP.get(sym)
-                if usdt_price > 0 and gate_pair and gate_pair in STATE.book:
-                    mid = (STATE.book[gate_pair]["best_bid"] + STATE.book[gate_pair]["best_ask"]) / 2.0
-                    prem = ((price / usdt_price) / mid) - 1.0 if (mid and mid > 0) else None
-
-                score, lead = final_score(gate_pair or "", prem, cmp_ratio)
-                passed = (
-                    vol_surge >= VOLUME_SURGE_RATIO and
-                    ob_ratio  >= ORDERBOOK_IMBAL_RATIO and
-                    (prem is not None and prem >= PREMIUM_MIN) and
-                    cmp_ratio <= MA_COMPRESSION_MAX
-                )
-
-                out.append({
-                    "symbol": sym,
-                    "price": price,
-                    "value_24h": round(value, 0),
-                    "vol_surge": round(vol_surge, 2),
-                    "orderbook_ratio": round(ob_ratio, 2),
-                    "premium": None if prem is None else round(prem, 4),
-                    "ma_compression": round(cmp_ratio, 4),
-                    "lead": round(lead, 3),
-                    "score": round(score, 3),
-                    "pass": bool(passed)
-                })
-
-                # 알림(옵션)
-                if passed and (lead >= LEAD_THRESH) and (prem is not None):
-                    key = f"{sym}"
-                    if can_send(key):
-                        msg = (
-                            f"🚀 <b>급등 감지</b> {sym}\n"
-                            f"· score {score:.2f} / lead {lead:.2f}\n"
-                            f"· premium {prem*100:.2f}%  · ob {ob_ratio:.2f}\n"
-                            f"· 1h vol x{vol_surge:.2f} · MAcmp {cmp_ratio:.3f}\n"
-                            f"· 확인: 4H 지지선/매물대 점검 후 진입"
-                        )
-                        await send_telegram(msg)
-
-            except Exception as e:
-                errors.append({"symbol": sym, "error": f"{type(e).__name__}: {e}"})
-                continue
-
-    # ---- 필터/정렬 옵션 (쿼리스트링) ----
+@app.get("/history/<symbol>")
+def history(symbol):
+    """최근 이력(시간순 컬럼). ?sec=300 (기본 전체 보관 구간), ?fields=lead,score,vol_ps"""
+    sym = symbol.upper()
+    if WORKER["role"] == "follower" and not HISTORY.path:
+        # 팔로워는 이력을 직접 쌓지 않는다 — 리더의 memmap 파일을 열 수 있어야 답할 수 있다
+        return {"ok": False, "symbol": sym, "worker": WORKER["role"],
+                "error": "history not shared between workers: set HISTORY_FILE"}, 503
+    sec = request.args.get("sec")
+    fields = request.args.get("fields")
+    data = HISTORY.query(sym, float(sec) if sec else None, fields.split(",") if fields else None)
+    if data is None:
+        return {"ok": False, "symbol": sym, "error": "no history"}, 404
+    return {"ok": True, "symbol": sym, "pair": SYMBOL_MAP.get(sym), **data}
+
+# ---- Prometheus 텍스트 / 샘플링 프로파일 ----
+@app.get("/metrics")
+def metrics_text():
+    got = STORE.get("metrics") if WORKER["role"] == "follower" else None   # 팔로워는 리더 지표를 그대로
+    body = got[2] if got else metrics.render()
+    return app.response_class(body, mimetype="text/plain; version=0.0.4")
+
+@app.get("/debug/profile")
+def debug_profile():
+    """collapsed stack(flamegraph.pl / speedscope 입력). ?top=N, ?reset=1"""
+    p = metrics.PROFILER
+    if p.hz <= 0:
+        return app.response_class("# profiler disabled (PROFILE_HZ=0)\n", mimetype="text/plain")
+    body = f"# samples={p.samples} hz={p.hz}\n" + p.collapsed(int(request.args.get("top", "0")))
+    if request.args.get("reset") == "1":
+        p.reset()
+    return app.response_class(body, mimetype="text/plain")
+
+def _scan_params():
     only_pass = request.args.get("only_pass", "1") == "1"   # 기본: 통과만
     top = int(request.args.get("top", "3"))                 # 기본: 상위 3개
     min_lead = float(request.args.get("min_lead", "0"))     # 기본: 0
     min_score = float(request.args.get("min_score", "0"))   # 기본: 0
     sort_by = request.args.get("sort", "score")             # score | lead | value
+    if sort_by not in ("score", "lead", "value"):
+        sort_by = "score"                                   # 모르는 값은 기본 정렬(캐시 키가 늘지 않게)
     sort_desc = request.args.get("desc", "1") == "1"
+    return only_pass, top, min_lead, min_score, sort_by, sort_desc
 
-    lead_floor = max(LEAD_THRESH, min_lead)
-
+def _pick_candidates(snap, only_pass, top, min_lead, min_score, sort_by, sort_desc) -> list:
+    """스냅샷 행 필터/정렬 — /scan 과 /scan/stream 공용"""
+    lead_floor = max(snap.lead_thresh, min_lead)
     if sort_by == "lead":
         key_fn = lambda x: (x["pass"], x["lead"], x["value_24h"])
     elif sort_by == "value":
         key_fn = lambda x: (x["pass"], x["value_24h"], x["score"])
     else:
         key_fn = lambda x: (x["pass"], x["score"], x["value_24h"])
-    out.sort(key=key_fn, reverse=True if sort_desc else False)
+    out = sorted(snap.rows, key=key_fn, reverse=True if sort_desc else False)
 
     picked = []
     for r in out:
@@ -224,9 +302,25 @@ async def scan():
         picked.append(r)
         if len(picked) >= top:
             break
+    return picked
 
-    return jsonify({
+def _scan_payload() -> dict:
+    """엔진 스냅샷을 메모리에서 필터/정렬만 한다(외부 I/O 없음)."""
+    snap = ENGINE.snapshot
+    if snap.version == 0:
+        err = ENGINE.last_error or {"stage": "warming_up", "error": "no snapshot yet"}
+        return {"ok": False, "stage": err["stage"], "error": err["error"]}
+
+    # ---- 필터/정렬 옵션 (쿼리스트링) ----
+    only_pass, top, min_lead, min_score, sort_by, sort_desc = _scan_params()
+    LEAD_THRESH = snap.lead_thresh
+    lead_floor = max(LEAD_THRESH, min_lead)
+    picked = _pick_candidates(snap, only_pass, top, min_lead, min_score, sort_by, sort_desc)
+
+    return {
         "ok": True,
+        "version": snap.version,
+        "age_sec": round(snap.age, 3),
         "lead_thresh": round(LEAD_THRESH, 2),
         "count": len(picked),
         "params": {
@@ -235,27 +329,102 @@ async def scan():
             "min_score": min_score, "sort": sort_by, "desc": sort_desc
         },
         "candidates": picked,
-        "errors": errors[:10]
-    }), 200
+        "errors": list(snap.errors),
+        "engine_error": ENGINE.last_error
+    }
+
+@app.get("/scan")
+def scan():
+    return jsonify(_scan_payload()), 200
+
+# ---- SSE: /scan/stream (같은 필터, 변경분만 push) ----
+FEED = ScanFeed(ENGINE, _pick_candidates, SSE_MAX_VIEWERS)
+
+@app.get("/scan/stream")
+def scan_stream():
+    """/scan 과 같은 쿼리 파라미터. 접속 시 snapshot 1회, 이후 발행마다 diff(enter/update/exit/order)."""
+    params = _scan_params()   # 요청 컨텍스트 안에서 미리 읽는다(제너레이터는 컨텍스트 밖에서 돈다)
+    if not FEED.join():
+        # 구독자마다 스레드 하나를 잡으므로 상한을 넘기면 /scan 이 굶는다 → 거절, 클라이언트는 재시도
+        return jsonify({"ok": False, "error": "too many stream viewers", "max_viewers": FEED.max_viewers}), 503, {"Retry-After": "10"}
+    resp = Response(FEED.events(params), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    resp.call_on_close(FEED.leave)   # 제너레이터가 시작되기 전에 끊겨도 자리를 돌려준다
+    return resp
 
 # ---- HTML Table View: /scan/table ----
+# 서버에서 첫 화면을 그린 뒤 /scan/stream 을 구독해 행 단위로 갱신한다(폴링/새로고침 없음)
+_TABLE_JS = """
+const rows = new Map();
+let snapTs = 0;
+const fmtPct = x => (x === null || x === undefined) ? "-" : (x * 100).toFixed(2) + "%";
+const dash = x => (x === null || x === undefined) ? "-" : x;
+const na = x => (x === null || x === undefined) ? "—" : x;   // 정밀 검사 밖이라 계산하지 않은 지표
+// 심볼 등 거래소에서 온 문자열은 innerHTML 에 넣기 전에 이스케이프
+const ESC = {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#39;"};
+const esc = x => String(x).replace(/[&<>"']/g, c => ESC[c]);
+function rowHtml(r) {
+  const cells = [r.price, (r.value_24h ?? 0).toLocaleString("en-US"), na(r.vol_surge), na(r.orderbook_ratio),
+                 r.gate_ob_ratio, fmtPct(r.premium), na(r.ma_compression), r.lead, r.score].map(v => `<td>${esc(dash(v))}</td>`);
+  const pill = r.pass ? '<span class="pill yes">PASS</span>' : '<span class="pill no">NO</span>';
+  return `<tr${r.detail ? "" : ' class="lite"'}><td class="sym">${esc(r.symbol)}</td>${cells.join("")}<td>${pill}</td></tr>`;
+}
+function render(order, lt, v, ts) {
+  const body = order.map(s => rowHtml(rows.get(s)));
+  document.getElementById("rows").innerHTML = body.length ? body.join("")
+    : '<tr><td colspan="11" style="text-align:center;color:#999;">No candidates</td></tr>';
+  document.getElementById("cnt").textContent = order.length;
+  document.getElementById("lt").textContent = lt.toFixed(2);
+  document.getElementById("ver").textContent = "v" + v;
+  snapTs = ts;
+}
+const es = new EventSource(STREAM_URL);
+es.addEventListener("snapshot", e => {
+  const d = JSON.parse(e.data);
+  rows.clear();
+  d.rows.forEach(r => rows.set(r.symbol, r));
+  render(d.rows.map(r => r.symbol), d.lead_thresh, d.version, d.ts);
+});
+es.addEventListener("diff", e => {
+  const d = JSON.parse(e.data);
+  d.exit.forEach(s => rows.delete(s));
+  d.enter.concat(d.update).forEach(r => rows.set(r.symbol, r));
+  render(d.order, d.lead_thresh, d.version, d.ts);
+});
+es.onopen = () => { document.getElementById("live").textContent = "on"; };
+es.onerror = () => {
+  // 구독자 상한(503) 등으로 닫히면 EventSource 는 재시도하지 않는다 → 잠시 뒤 새로고침으로 대체
+  if (es.readyState === EventSource.CLOSED) {
+    document.getElementById("live").textContent = "off";
+    setTimeout(() => location.reload(), 10000);
+  } else {
+    document.getElementById("live").textContent = "reconnecting";
+  }
+};
+setInterval(() => {
+  if (snapTs) document.getElementById("age").textContent = (Date.now() / 1000 - snapTs).toFixed(1) + "s";
+}, 1000);
+"""
+
 @app.get("/scan/table")
-async def scan_table():
+def scan_table():
     """
     /scan 과 동일한 쿼리 파라미터를 사용:
       only_pass=1|0, top=3, min_lead=0, min_score=0, sort=score|lead|value, desc=1|0
     """
-    # 1) /scan 실행 (동일 파라미터 사용)
-    resp = await scan()
-    response_obj = resp[0] if isinstance(resp, tuple) else resp
-    data = response_obj.get_json(silent=True) or {"ok": False, "candidates": [], "params": {}}
+    # 1) 스냅샷 조회 (동일 파라미터 사용)
+    data = _scan_payload()
 
     ok = data.get("ok", False)
     params = data.get("params", {})
     lead_thresh = data.get("lead_thresh", 0)
+    age_sec = data.get("age_sec")
     candidates = data.get("candidates", [])
     errors = data.get("errors", [])
 
+    def na(x):
+        return "—" if x is None else x   # 정밀 검사 밖이라 계산하지 않은 지표
+
     def fmt_pct(x):
         try:
             return f"{float(x)*100:.2f}%"
@@ -266,14 +435,15 @@ async def scan_table():
     if ok and candidates:
         for r in candidates:
             rows_html.append(f"""
-            <tr>
-                <td class="sym">{r.get('symbol','-')}</td>
+            <tr{'' if r.get('detail', True) else ' class="lite"'}>
+                <td class="sym">{escape(str(r.get('symbol','-')))}</td>
                 <td>{r.get('price','-')}</td>
                 <td>{r.get('value_24h','-'):,}</td>
-                <td>{r.get('vol_surge','-')}</td>
-                <td>{r.get('orderbook_ratio','-')}</td>
+                <td>{na(r.get('vol_surge'))}</td>
+                <td>{na(r.get('orderbook_ratio'))}</td>
+                <td>{'-' if r.get('gate_ob_ratio') is None else r.get('gate_ob_ratio')}</td>
                 <td>{fmt_pct(r.get('premium')) if r.get('premium') is not None else '-'}</td>
-                <td>{r.get('ma_compression','-')}</td>
+                <td>{na(r.get('ma_compression'))}</td>
                 <td>{r.get('lead','-')}</td>
                 <td>{r.get('score','-')}</td>
                 <td><span class="pill { 'yes' if r.get('pass') else 'no' }">{'PASS' if r.get('pass') else 'NO'}</span></td>
@@ -281,12 +451,12 @@ async def scan_table():
             """)
     else:
         rows_html.append("""
-        <tr><td colspan="10" style="text-align:center;color:#999;">No candidates</td></tr>
+        <tr><td colspan="11" style="text-align:center;color:#999;">No candidates</td></tr>
         """)
 
     err_html = ""
     if errors:
-        err_items = "".join([f"<li><code>{e.get('symbol','?')}</code> — {e.get('error','')}</li>" for e in errors])
+        err_items = "".join([f"<li><code>{escape(str(e.get('symbol','?')))}</code> — {escape(str(e.get('error','')))}</li>" for e in errors])
         err_html = f"""
         <details class="errors"><summary>Errors ({len(errors)})</summary>
             <ul>{err_items}</ul>
@@ -319,6 +489,7 @@ async def scan_table():
   th {{ background:#1b2130; position:sticky; top:0; z-index:1; }}
   td.sym, th.sym {{ text-align:left; }}
   tr:hover {{ background:#19202c; }}
+  tr.lite td {{ color:var(--muted); }}
   .pill {{ padding:2px 8px; border-radius:999px; font-weight:600; font-size:12px; }}
   .pill.yes {{ background:rgba(34,197,94,.15); color:var(--ok); border:1px solid rgba(34,197,94,.35); }}
   .pill.no {{ background:rgba(239,68,68,.12); color:var(--no); border:1px solid rgba(239,68,68,.35); }}
@@ -333,14 +504,17 @@ async def scan_table():
   <h1>급등 후보 스캐너 — Table view</h1>
   <div class="meta">
     <div>ok: <b>{'true' if ok else 'false'}</b></div>
-    <div>lead_thresh: <b>{lead_thresh:.2f}</b></div>
+    <div>lead_thresh: <b id="lt">{lead_thresh:.2f}</b></div>
+    <div>snapshot: <b id="ver">v{data.get('version', 0)}</b> · age <b id="age">{'-' if age_sec is None else f'{age_sec:.1f}s'}</b></div>
+    <div>live: <b id="live">-</b></div>
     <div>params: <code>{params}</code></div>
     <div><a href="{base_scan_url}" target="_blank">원본 JSON 보기</a></div>
+    <div>흐린 행·— : 정밀 검사 밖(봉/호가 미수집, detail=false)</div>
   </div>
 
   <div class="card">
     <div class="toolbar">
-      <div>총 {len(candidates)}개</div>
+      <div>총 <span id="cnt">{len(candidates)}</span>개</div>
       <div>
         <a href="/scan/table?only_pass=1&top=3">PASS 상위3</a> ·
         <a href="/scan/table?only_pass=1&top=20&sort=lead">리드TOP20</a> ·
@@ -355,6 +529,7 @@ async def scan_table():
           <th>24h Value</th>
           <th>Vol×</th>
           <th>OB Ratio</th>
+          <th>Gate OB</th>
           <th>Premium</th>
           <th>MAcmp</th>
           <th>Lead</th>
@@ -362,7 +537,7 @@ async def scan_table():
           <th>Pass</th>
         </tr>
       </thead>
-      <tbody>
+      <tbody id="rows">
         {''.join(rows_html)}
       </tbody>
     </table>
@@ -370,6 +545,10 @@ async def scan_table():
 
   {err_html}
 </div>
+<script>
+const STREAM_URL = "/scan/stream" + location.search;
+{_TABLE_JS}
+</script>
 </body>
 </html>
 """
@@ -378,4 +557,5 @@ async def scan_table():
 # ===== 로컬 실행 =====
 if __name__ == "__main__":
     port = int(os.getenv("PORT", "8000"))
+    init_background()   # 트래픽 받기 전에 수집/워밍업 시작
     app.run(host="0.0.0.0", port=port)
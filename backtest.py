@@ -0,0 +1,281 @@
+# backtest.py — 기록 데이터 위에서 스캐너 통과/점수 규칙을 오프라인으로 평가
+#
+#   python backtest.py extract REC_DIR TAPE_DIR [--sample 1.0]
+#   python backtest.py run TAPE_DIR [--set PREMIUM_MIN=0.01 ...] [--events 30]
+#   python backtest.py sweep TAPE_DIR --grid VOLUME_SURGE_RATIO=3,5,7 --grid LEAD_THRESH_BASE=0.7,0.9 [--workers N]
+#
+# 1) extract: replay.Replayer 로 기록을 한 번 재생하면서 sample 초 격자마다 매핑 심볼 전체의
+#    입력(빗썸 가격/거래대금/호가비, Gate 중간가/OFI/체결률/스프레드, 1h 봉 압축도/거래량 급증)을
+#    (시각 x 심볼) 컬럼 테이프(.npy)로 저장한다. 1h 봉·빗썸 호가는 기록된 REST 응답을 시각 순으로 반영한다.
+# 2) run / sweep: 테이프를 mmap 으로 열어 규칙을 배열 연산으로 평가한다. 파라미터와 무관한
+#    lead / premium / 시장 vps 중앙값은 워커당 한 번만 계산하고, 조합마다 비교 연산만 한다.
+#    발화는 심볼별 쿨다운(ALERT_COOLDOWN_SEC)을 적용하고, 발화 시점 대비 5/15/60분 후 빗썸 가격 수익률을 잰다.
+
+import argparse, itertools, json, os, re, time
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+
+import numpy as np
+
+from config import (
+    PREMIUM_MIN, ORDERBOOK_IMBAL_RATIO, VOLUME_SURGE_RATIO, MA_COMPRESSION_MAX,
+    LEAD_THRESH_BASE, ALERT_COOLDOWN_SEC
+)
+from indicators import adaptive_lead_threshold
+from batch_score import lead_vec
+
+COLS = ("price", "value", "mid", "ofi", "trades_ps", "vol_ps", "dba", "ob_ratio", "cmp", "vol_surge")
+HORIZONS_MIN = (5, 15, 60)
+DEFAULTS = {
+    "VOLUME_SURGE_RATIO": VOLUME_SURGE_RATIO, "ORDERBOOK_IMBAL_RATIO": ORDERBOOK_IMBAL_RATIO,
+    "PREMIUM_MIN": PREMIUM_MIN, "MA_COMPRESSION_MAX": MA_COMPRESSION_MAX,
+    "LEAD_THRESH_BASE": LEAD_THRESH_BASE, "ALERT_COOLDOWN_SEC": ALERT_COOLDOWN_SEC,
+}
+RULES = ("vol_surge", "orderbook", "premium", "compression", "lead")
+
+# ===== 1) 추출 =====
+class FeatureTape:
+    """재생 중 격자 시각마다 매핑 심볼 전체의 규칙 입력을 한 행씩 쌓는다."""
+
+    def __init__(self, rec_dir: str):
+        import recorder
+        self._rest = recorder.iter_source(rec_dir, "rest")
+        self._next = next(self._rest, None)
+        self.all_px = {}       # sym -> (price, value) 최근 ALL_KRW
+        self.usdt = 0.0
+        self.ob = {}           # sym -> 최근 REST 호가비
+        self.bars = {}         # sym -> 1h 봉
+        self.ind = {}          # sym -> RollingIndicators
+        self.syms = self.pairs = None
+        self.ts, self.usdt_col = [], []
+        self.rows = {c: [] for c in COLS}
+
+    def _on_rest(self, url: str, body):
+        import httpx
+        from candle_store import CandleStore, KEEP_BARS, v1_row
+        from indicators import RollingIndicators
+        from scan_engine import orderbook_ratio
+        u = httpx.URL(url)
+        path = u.path
+        if path.endswith("/public/ticker/ALL_KRW"):
+            for sym, row in (body.get("data") or {}).items():
+                if isinstance(row, dict):
+                    self.all_px[sym] = (float(row.get("closing_price") or 0), float(row.get("acc_trade_value_24H") or 0))
+            self.usdt = self.all_px.get("USDT", (0.0, 0.0))[0]
+        elif (m := re.search(r"/public/orderbook/(\w+)_KRW$", path)):
+            self.ob[m.group(1)] = orderbook_ratio(body)
+        elif (m := re.search(r"/public/candlestick/(\w+)_KRW/1h$", path)):
+            rows = [c for c in body.get("data", []) if isinstance(c, (list, tuple)) and len(c) >= 6][-KEEP_BARS:]
+            ind = self.ind.setdefault(m.group(1), RollingIndicators())
+            ind.reset([float(c[2]) for c in rows], [float(c[5]) for c in rows])
+            self.bars[m.group(1)] = rows
+        elif path.endswith("/v1/candles/minutes/60") and isinstance(body, list):
+            sym = u.params.get("market", "-").split("-", 1)[1]
+            if sym in self.bars:
+                CandleStore.merge(self.bars[sym], sorted((v1_row(c) for c in body), key=lambda r: r[0]), self.ind[sym])
+
+    def _advance(self, ts: float):
+        while self._next is not None and self._next[0] <= ts:
+            _, _, url, data = self._next
+            try:
+                self._on_rest(url, json.loads(str(data, "utf-8")))
+            except Exception:
+                pass
+            self._next = next(self._rest, None)
+
+    def sample(self, ts: float):
+        import bithumb_stream as bstream
+        from batch_score import Universe
+        from scan_engine import ENGINE
+        if self.syms is None:
+            self.syms = sorted(ENGINE.symbol_map)
+            self.pairs = [ENGINE.symbol_map[s] for s in self.syms]
+        self._advance(ts)
+        u = Universe(self.syms, self.pairs)
+        mid = u.load_gate()
+        nan = float("nan")
+        px, val, ob, cmp, vs = [], [], [], [], []
+        for s in self.syms:
+            p, v = bstream.live_ticker(s) or self.all_px.get(s, (nan, nan))
+            px.append(p); val.append(v)
+            r = bstream.live_ob_ratio(s)
+            ob.append(self.ob.get(s, nan) if r is None else r)
+            ind = self.ind.get(s)
+            cmp.append(ind.compression() if ind else 1.0)
+            vs.append(ind.vol_surge() if ind else 0.0)
+        self.ts.append(ts)
+        self.usdt_col.append(bstream.live_usdt_price() or self.usdt)
+        for c, col in zip(COLS, (px, val, mid, u.ofi, u.trades_ps, u.vol_ps, u.dba, ob, cmp, vs)):
+            self.rows[c].append(np.asarray(col, dtype=np.float32))
+
+    def save(self, out_dir: str, sample_sec: float):
+        os.makedirs(out_dir, exist_ok=True)
+        np.save(os.path.join(out_dir, "ts.npy"), np.asarray(self.ts, dtype=np.float64))
+        np.save(os.path.join(out_dir, "usdt.npy"), np.asarray(self.usdt_col, dtype=np.float32))
+        for c in COLS:
+            np.save(os.path.join(out_dir, f"{c}.npy"), np.vstack(self.rows[c]) if self.rows[c] else np.zeros((0, 0), np.float32))
+        with open(os.path.join(out_dir, "meta.json"), "w") as f:
+            json.dump({"symbols": self.syms or [], "pairs": self.pairs or [], "sample_sec": sample_sec}, f)
+
+def extract(rec_dir: str, out_dir: str, sample_sec: float = 1.0) -> dict:
+    import http_pool
+    from replay import Replayer
+    tape = FeatureTape(rec_dir)
+    res = http_pool.run(Replayer(rec_dir, detect=False, on_sample=tape.sample, sample_every=sample_sec).run())
+    tape.save(out_dir, sample_sec)
+    return {**res, "samples": len(tape.ts), "symbols": len(tape.syms or [])}
+
+# ===== 2) 평가 =====
+def load(tape_dir: str, mmap: bool = True) -> SimpleNamespace:
+    mode = "r" if mmap else None
+    with open(os.path.join(tape_dir, "meta.json")) as f:
+        meta = json.load(f)
+    t = SimpleNamespace(**meta)
+    t.ts = np.load(os.path.join(tape_dir, "ts.npy"))
+    t.usdt = np.load(os.path.join(tape_dir, "usdt.npy"), mmap_mode=mode)
+    for c in COLS:
+        setattr(t, c, np.load(os.path.join(tape_dir, f"{c}.npy"), mmap_mode=mode))
+    return t
+
+def prepare(t: SimpleNamespace) -> SimpleNamespace:
+    """파라미터와 무관한 파생 컬럼(lead, premium, 리드 임계치 오프셋)."""
+    t.lead = lead_vec(t).astype(np.float32)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        prem = (t.price / t.usdt[:, None]) / t.mid - 1.0
+    t.premium = np.where((t.mid > 0) & (t.usdt[:, None] > 0), prem, np.nan).astype(np.float32)
+    n = t.vol_ps.shape[1]
+    med = np.sort(t.vol_ps, axis=1)[:, n // 2] if n else np.zeros(len(t.ts))   # market_vps_median 과 같은 위치
+    t.thresh_off = np.vectorize(adaptive_lead_threshold, otypes=[float])(med) - LEAD_THRESH_BASE
+    prem0 = np.nan_to_num(t.premium, nan=0.0)
+    t.prem_boost = 1.0 + np.clip(prem0, 0.0, 0.01)
+    return t
+
+def rule_masks(t: SimpleNamespace, p: dict) -> dict:
+    with np.errstate(invalid="ignore"):
+        m = {
+            "vol_surge": t.vol_surge >= p["VOLUME_SURGE_RATIO"],
+            "orderbook": t.ob_ratio >= p["ORDERBOOK_IMBAL_RATIO"],
+            "premium": t.premium >= p["PREMIUM_MIN"],
+            "compression": t.cmp <= p["MA_COMPRESSION_MAX"],
+            "lead": t.lead >= (t.thresh_off + p["LEAD_THRESH_BASE"])[:, None],
+        }
+    m["all"] = m["vol_surge"] & m["orderbook"] & m["premium"] & m["compression"] & m["lead"]
+    return m
+
+def fire_events(mask: np.ndarray, ts: np.ndarray, cooldown: float) -> tuple[np.ndarray, np.ndarray]:
+    """(시각 인덱스, 심볼 인덱스) — 조건 성립 시점마다 발화하되 심볼별 쿨다운 동안은 건너뛴다."""
+    ti_out, si_out = [], []
+    for j in np.flatnonzero(mask.any(axis=0)):
+        idx = np.flatnonzero(mask[:, j])
+        k = 0
+        while k < len(idx):
+            i = idx[k]
+            ti_out.append(i); si_out.append(j)
+            k = np.searchsorted(idx, np.searchsorted(ts, ts[i] + cooldown), side="left")
+    return np.asarray(ti_out, dtype=np.int64), np.asarray(si_out, dtype=np.int64)
+
+def forward_returns(t: SimpleNamespace, ti: np.ndarray, si: np.ndarray) -> dict:
+    out = {}
+    p0 = t.price[ti, si].astype(np.float64)
+    for h in HORIZONS_MIN:
+        tj = np.searchsorted(t.ts, t.ts[ti] + h * 60.0)
+        ok = tj < len(t.ts)
+        r = np.full(len(ti), np.nan)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r[ok] = t.price[tj[ok], si[ok]] / p0[ok] - 1.0
+        out[h] = r
+    return out
+
+def _ret_stats(r: np.ndarray) -> dict:
+    r = r[np.isfinite(r)]
+    if not len(r):
+        return {"n": 0, "mean": None, "median": None, "hit": None}
+    return {"n": int(len(r)), "mean": round(float(r.mean()), 5), "median": round(float(np.median(r)), 5),
+            "hit": round(float((r > 0).mean()), 3)}
+
+def evaluate(t: SimpleNamespace, params: dict | None = None, events: bool = False) -> dict:
+    p = {**DEFAULTS, **(params or {})}
+    masks = rule_masks(t, p)
+    cd = float(p["ALERT_COOLDOWN_SEC"])
+    rules = {name: int(len(fire_events(masks[name], t.ts, cd)[0])) for name in RULES}
+    ti, si = fire_events(masks["all"], t.ts, cd)
+    rets = forward_returns(t, ti, si)
+    res = {
+        "params": {k: p[k] for k in DEFAULTS}, "fires": int(len(ti)), "rule_fires": rules,
+        "returns": {f"{h}m": _ret_stats(rets[h]) for h in HORIZONS_MIN},
+    }
+    if events:
+        cmp_boost = 1.0 + np.maximum(0.0, p["MA_COMPRESSION_MAX"] - t.cmp[ti, si])
+        score = t.lead[ti, si] * t.prem_boost[ti, si] * cmp_boost
+        res["events"] = [
+            {"ts": float(t.ts[i]), "symbol": t.symbols[j], "price": float(t.price[i, j]),
+             "lead": round(float(t.lead[i, j]), 3), "premium": round(float(t.premium[i, j]), 4),
+             "score": round(float(s), 3), **{f"ret_{h}m": (None if np.isnan(rets[h][k]) else round(float(rets[h][k]), 4)) for h in HORIZONS_MIN}}
+            for k, (i, j, s) in enumerate(zip(ti, si, score))
+        ]
+    return res
+
+# ===== 파라미터 스윕(프로세스 풀) =====
+_TAPE = None
+
+def _init_worker(tape_dir: str):
+    global _TAPE
+    _TAPE = prepare(load(tape_dir))
+
+def _eval_worker(params: dict) -> dict:
+    return evaluate(_TAPE, params)
+
+def sweep(tape_dir: str, grid: dict, workers: int | None = None) -> list:
+    keys = list(grid)
+    combos = [dict(zip(keys, vals)) for vals in itertools.product(*(grid[k] for k in keys))]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(combos)))
+    if workers == 1:
+        _init_worker(tape_dir)
+        return [_eval_worker(c) for c in combos]
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(tape_dir,)) as ex:
+        return list(ex.map(_eval_worker, combos, chunksize=max(1, len(combos) // (workers * 4))))
+
+def _parse_kv(items, multi: bool) -> dict:
+    out = {}
+    for it in items or []:
+        k, v = it.split("=", 1)
+        if k not in DEFAULTS:
+            raise SystemExit(f"unknown parameter: {k} ({', '.join(DEFAULTS)})")
+        out[k] = [float(x) for x in v.split(",")] if multi else float(v)
+    return out
+
+def main():
+    ap = argparse.ArgumentParser(description="scanner rule backtest over recorded feeds")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    a = sub.add_parser("extract"); a.add_argument("rec_dir"); a.add_argument("tape_dir"); a.add_argument("--sample", type=float, default=1.0)
+    r = sub.add_parser("run"); r.add_argument("tape_dir"); r.add_argument("--set", action="append"); r.add_argument("--events", type=int, default=20)
+    s = sub.add_parser("sweep"); s.add_argument("tape_dir"); s.add_argument("--grid", action="append", required=True)
+    s.add_argument("--workers", type=int, default=None); s.add_argument("--top", type=int, default=20)
+    s.add_argument("--sort", default="15m", help="수익률 기준 구간(5m/15m/60m)")
+    args = ap.parse_args()
+
+    if args.cmd == "extract":
+        print(json.dumps(extract(args.rec_dir, args.tape_dir, args.sample), ensure_ascii=False, indent=2))
+    elif args.cmd == "run":
+        t = prepare(load(args.tape_dir))
+        res = evaluate(t, _parse_kv(args.set, False), events=True)
+        evs = sorted(res.pop("events"), key=lambda e: e["score"], reverse=True)[:args.events]
+        print(json.dumps(res, ensure_ascii=False, indent=2))
+        for e in evs:
+            print(json.dumps(e, ensure_ascii=False))
+    else:
+        grid = _parse_kv(args.grid, True)
+        t0 = time.perf_counter()
+        results = sweep(args.tape_dir, grid, args.workers)
+        wall = time.perf_counter() - t0
+        t = load(args.tape_dir)
+        cells = t.price.size * len(results)
+        key = lambda r: (r["returns"][args.sort]["mean"] is not None, r["returns"][args.sort]["mean"] or 0.0)
+        for res in sorted(results, key=key, reverse=True)[:args.top]:
+            st = res["returns"][args.sort]
+            print(f"fires={res['fires']:5d}  {args.sort} mean={st['mean']} hit={st['hit']} n={st['n']}  "
+                  + " ".join(f"{k}={v}" for k, v in res["params"].items() if k in grid))
+        print(f"combos={len(results)} cells={cells:,} wall={wall:.2f}s  ({cells / wall * 60 / 1e6:,.0f}M symbol-samples/min)")
+
+if __name__ == "__main__":
+    main()
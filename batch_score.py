@@ -0,0 +1,72 @@
+# batch_score.py — 전체 유니버스 컬럼 단위 점수 계산 (NumPy)
+#
+# indicators.final_score 와 scan 의 통과 조건을 심볼 루프 없이 배열 연산 한 번으로 계산한다.
+# 결과는 final_score 와 같다(누락 지표는 final_score 의 기본값으로 채움).
+
+import numpy as np
+
+from config import PREMIUM_MIN, ORDERBOOK_IMBAL_RATIO, VOLUME_SURGE_RATIO, MA_COMPRESSION_MAX
+from gate_stream import STATE
+
+GATE_FIELDS = ("OFI", "trades_ps", "vol_ps", "dba")
+
+class Universe:
+    """심볼 순서가 고정된 컬럼 묶음. premium 누락은 NaN."""
+    __slots__ = ("symbols", "pairs", "price", "value", "vol_surge", "ob_ratio",
+                 "premium", "cmp", "ofi", "trades_ps", "vol_ps", "dba")
+
+    def __init__(self, symbols, pairs):
+        n = len(symbols)
+        self.symbols = list(symbols)
+        self.pairs = list(pairs)   # Gate 페어("" = 매핑 없음)
+        self.price = np.zeros(n)
+        self.value = np.zeros(n)
+        self.vol_surge = np.zeros(n)         # 봉 없음 → 0.0
+        self.ob_ratio = np.zeros(n)          # 호가 없음 → 0.0
+        self.premium = np.full(n, np.nan)
+        self.cmp = np.ones(n)                # 봉 없음 → 1.0
+        self.ofi = np.zeros(n)
+        self.trades_ps = np.zeros(n)
+        self.vol_ps = np.zeros(n)
+        self.dba = np.full(n, 1e-6)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def load_gate(self, metrics=None, book=None):
+        """Gate 지표/호가 스냅샷을 컬럼으로 옮긴다(심볼당 dict 조회 1회)."""
+        metrics = STATE.metrics if metrics is None else metrics
+        book = STATE.book if book is None else book
+        empty = {}
+        ms = [metrics.get(p, empty) for p in self.pairs]
+        rows = [(m.get("OFI", 0.0), m.get("trades_ps", 0.0), m.get("vol_ps", 0.0), m.get("dba", 1e-6)) for m in ms]
+        if rows:
+            self.ofi[:], self.trades_ps[:], self.vol_ps[:], self.dba[:] = np.array(rows, dtype=float).T
+        bs = [book.get(p) for p in self.pairs]
+        return np.array([(b["best_bid"] + b["best_ask"]) / 2.0 if b else 0.0 for b in bs], dtype=float)
+
+    def set_premium(self, usdt_price: float, mids: np.ndarray):
+        ok = (mids > 0) & (usdt_price > 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            prem = (self.price / usdt_price) / mids - 1.0 if usdt_price > 0 else np.full(len(self), np.nan)
+        self.premium = np.where(ok, prem, np.nan)
+
+def lead_vec(u: Universe) -> np.ndarray:
+    dba = np.maximum(1e-6, u.dba)
+    return (0.6*np.abs(u.ofi)) + (0.25*np.log1p(u.vol_ps)) + (0.15*np.log1p(u.trades_ps)) - (0.1*np.log1p(dba))
+
+def score_batch(u: Universe, lead_thresh: float) -> dict:
+    """{"lead","score","pass","alert"} 배열"""
+    lead = lead_vec(u)
+    prem = np.nan_to_num(u.premium, nan=0.0)
+    prem_boost = 1.0 + np.maximum(0.0, np.minimum(prem, 0.01))
+    cmp_boost = 1.0 + np.maximum(0.0, MA_COMPRESSION_MAX - u.cmp)
+    score = lead * prem_boost * cmp_boost
+    has_prem = ~np.isnan(u.premium)
+    passed = (
+        (u.vol_surge >= VOLUME_SURGE_RATIO) &
+        (u.ob_ratio >= ORDERBOOK_IMBAL_RATIO) &
+        has_prem & (prem >= PREMIUM_MIN) &
+        (u.cmp <= MA_COMPRESSION_MAX)
+    )
+    return {"lead": lead, "score": score, "pass": passed, "alert": passed & (lead >= lead_thresh)}
@@ -0,0 +1,69 @@
+# bench_alert_latency.py — Gate 틱 → 알림 판정 → 발송 완료 지연 (실시간 감지 경로)
+#
+#   python bench/bench_alert_latency.py [n_pairs] [ticks_per_sec] [send_ms]   (기본: 200 2000 300)
+#
+# 수집 스레드 흉내로 spot.trades 틱을 on_trades 에 넣는다. 매 10번째 페어는 리드만 빼고 통과
+# 조건을 갖춰 두고, 0.25초마다 하나씩 리드(OFI)를 올려 알림을 유도한다.
+# 텔레그램 발송은 send_ms 만큼 걸리는 가짜로 바꾼다.
+
+import os, sys, asyncio, random, threading, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import gate_stream
+import telegram_notify
+from gate_stream import STATE
+from scan_engine import ENGINE
+from alert_detector import DETECTOR
+
+USDT = 1400.0
+
+def setup(n, rnd):
+    ENGINE.symbol_map = {f"S{i}": f"S{i}_USDT" for i in range(n)}
+    rows = []
+    for i, (sym, p) in enumerate(ENGINE.symbol_map.items()):
+        hot = i % 10 == 0
+        price = rnd.uniform(100, 10000)
+        mid = price / USDT / (1.02 if hot else 1.0)
+        STATE.book[p] = {"best_bid": mid * 0.9999, "best_ask": mid * 1.0001, "depth_ratio": 1.0, "ts": time.time()}
+        STATE.metrics[p] = {"OFI": 0.0, "trades_ps": 0.0, "vol_ps": 0.0, "dba": 0.0}
+        ENGINE._features[sym] = (0.01, 10.0) if hot else (0.2, 1.0)
+        rows.append(ENGINE._row(sym, price, 1e9, 10.0, 3.0 if hot else 1.0, None, 0.01, 0.0, 0.0, False))
+    ENGINE._usdt_price = USDT
+    ENGINE._publish(0.9, rows, [], 0.0)
+
+def feed(pairs, rate, secs, rnd):
+    gap = 1.0 / rate
+    hot = pairs[::10]
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < secs:
+        k = int((time.perf_counter() - t0) / 0.25)
+        if k < len(hot) and STATE.metrics[hot[k]]["OFI"] == 0.0:
+            STATE.metrics[hot[k]]["OFI"] = 2.0
+            gate_stream.on_trades([{"s": hot[k], "q": "50"}], time.time())
+        gate_stream.on_trades([{"s": rnd.choice(pairs), "q": str(rnd.uniform(0.001, 0.01))}], time.time())
+        time.sleep(gap)
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    rate = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    send_ms = float(sys.argv[3]) if len(sys.argv) > 3 else 300.0
+    rnd = random.Random(5)
+
+    async def fake_send(text):
+        await asyncio.sleep(send_ms / 1000.0)
+    telegram_notify.send_telegram = fake_send
+
+    setup(n, rnd)
+    DETECTOR.start()
+    t = threading.Thread(target=feed, args=(list(ENGINE.symbol_map.values()), rate, 0.25 * (n // 10) + 0.5, rnd))
+    t.start(); t.join()
+    time.sleep(send_ms / 1000.0 + 0.5)
+
+    h = DETECTOR.health()
+    print(f"pairs={n} ticks/s={rate} send={send_ms:.0f}ms")
+    print(f"  ticks={h['ticks']} evals={h['evals']} (틱 합침 {h['ticks'] / max(1, h['evals']):.1f}x) signals={h['signals']}")
+    print(f"  tick→판정  {h['tick_to_decision_ms']}")
+    print(f"  tick→발송  {h['outbox']['latency_ms']}  sent={h['outbox']['sent']} dropped={h['outbox']['dropped']}")
+
+if __name__ == "__main__":
+    main()
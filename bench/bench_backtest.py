@@ -0,0 +1,66 @@
+# bench_backtest.py — 합성 테이프 위 규칙 평가/스윕 처리량
+#
+#   python bench/bench_backtest.py [n_symbols] [hours] [workers]   (기본: 300 6 2)
+#
+# 1초 격자 랜덤워크 가격에 드문 급등 구간(리드·프리미엄·거래량 급증 동반)을 섞은 테이프를
+# backtest.py 형식으로 만들고, 기본값 1회 평가와 3x3x3 파라미터 스윕 시간을 잰다.
+
+import os, sys, json, tempfile, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import numpy as np
+import backtest
+
+def synth_tape(d, n, hours, seed=7):
+    rng = np.random.default_rng(seed)
+    T = int(hours * 3600)
+    ts = 1_700_000_000.0 + np.arange(T, dtype=np.float64)
+    price = np.exp(np.cumsum(rng.normal(0, 2e-4, (T, n)), axis=0)).astype(np.float32) * 1000
+    hot = np.zeros((T, n), dtype=bool)
+    for _ in range(n // 5):   # 급등 구간: 120초 조짐 후 가격 상승
+        j, i = rng.integers(n), rng.integers(T - 4000)
+        hot[i:i + 120, j] = True
+        price[i + 120:, j] *= np.float32(1.0 + rng.uniform(0.0, 0.05))
+    usdt = np.full(T, 1400.0, dtype=np.float32)
+    mid = price / 1400.0 / np.where(hot, 1.012, 1.0 + rng.normal(0, 0.002, (T, n))).astype(np.float32)
+    cols = {
+        "price": price, "value": np.full((T, n), 1e9, np.float32), "mid": mid.astype(np.float32),
+        "ofi": np.where(hot, 2.0, rng.normal(0, 0.3, (T, n))).astype(np.float32),
+        "trades_ps": rng.uniform(0, 5, (T, n)).astype(np.float32),
+        "vol_ps": rng.uniform(0, 3, (T, n)).astype(np.float32),
+        "dba": rng.uniform(0, 0.005, (T, n)).astype(np.float32),
+        "ob_ratio": np.where(hot, 2.5, rng.uniform(0.5, 2.0, (T, n))).astype(np.float32),
+        "cmp": np.where(hot, 0.02, rng.uniform(0.01, 0.2, (T, n))).astype(np.float32),
+        "vol_surge": np.where(hot, 8.0, rng.uniform(0, 6, (T, n))).astype(np.float32),
+    }
+    np.save(os.path.join(d, "ts.npy"), ts)
+    np.save(os.path.join(d, "usdt.npy"), usdt)
+    for c in backtest.COLS:
+        np.save(os.path.join(d, f"{c}.npy"), cols[c])
+    with open(os.path.join(d, "meta.json"), "w") as f:
+        json.dump({"symbols": [f"S{j}" for j in range(n)], "pairs": [f"S{j}_USDT" for j in range(n)], "sample_sec": 1.0}, f)
+    return T * n
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    hours = float(sys.argv[2]) if len(sys.argv) > 2 else 6
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+    with tempfile.TemporaryDirectory() as d:
+        cells = synth_tape(d, n, hours)
+        t0 = time.perf_counter()
+        t = backtest.prepare(backtest.load(d))
+        t_prep = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        res = backtest.evaluate(t)
+        t_eval = time.perf_counter() - t0
+        print(f"tape {n} symbols x {hours}h = {cells:,} symbol-samples  prepare {t_prep:.2f}s  evaluate {t_eval:.3f}s "
+              f"({cells / t_eval * 60 / 1e6:,.0f}M/min)  fires={res['fires']} 15m={res['returns']['15m']}")
+        grid = {"VOLUME_SURGE_RATIO": [3.0, 5.0, 7.0], "PREMIUM_MIN": [0.005, 0.008, 0.011], "LEAD_THRESH_BASE": [0.7, 0.9, 1.1]}
+        t0 = time.perf_counter()
+        results = backtest.sweep(d, grid, workers)
+        wall = time.perf_counter() - t0
+        total = cells * len(results)
+        print(f"sweep {len(results)} combos x {workers} workers  {wall:.2f}s  ({total / wall * 60 / 1e6:,.0f}M symbol-samples/min)")
+
+if __name__ == "__main__":
+    main()
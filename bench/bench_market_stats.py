@@ -0,0 +1,62 @@
+# bench_market_stats.py — 시장 통계 읽기 비용: 매번 정렬(기존) vs RankedValues 증분 유지(현행)
+#
+#   python bench/bench_market_stats.py [pairs] [updates] [read_every]   (기본: 2000 200000 10)
+#
+# 페어별 vol_ps / 24h 거래대금이 무작위로 바뀌는 스트림을 흘리면서 read_every 갱신마다
+# vol_ps 중앙값과 거래대금 상위 TOP_N_BY_VALUE 를 읽는다. 갱신 중 바뀌는 값의 비율은 실제
+# 틱처럼 일부(같은 값 재기록 포함)다. 두 방식의 결과가 같은지도 확인한다.
+
+import os, random, sys, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from config import TOP_N_BY_VALUE
+from market_stats import RankedValues
+
+def make_events(n_pairs, n, seed=3):
+    rnd = random.Random(seed)
+    keys = [f"P{i}" for i in range(n_pairs)]
+    vps = [0.0, 0.5, 1.0, 2.0]
+    return keys, [(rnd.choice(keys), rnd.choice(vps) if rnd.random() < 0.5 else rnd.uniform(0, 20),
+                   rnd.uniform(1e8, 1e11)) for _ in range(n)]
+
+def run_sorted(keys, events, read_every):
+    vps, val = dict.fromkeys(keys, 0.0), dict.fromkeys(keys, 1.0)
+    out = []
+    t0 = time.perf_counter()
+    for i, (k, v, w) in enumerate(events):
+        vps[k], val[k] = v, w
+        if i % read_every == 0:
+            s = sorted(vps.values())
+            med = s[len(s) // 2]
+            top = sorted(val, key=val.get, reverse=True)[:TOP_N_BY_VALUE]
+            out.append((med, top))
+    return time.perf_counter() - t0, out
+
+def run_ranked(keys, events, read_every):
+    vps, val = RankedValues(), RankedValues()
+    for k in keys:
+        vps.set(k, 0.0)
+        val.set(k, 1.0)
+    out = []
+    t0 = time.perf_counter()
+    for i, (k, v, w) in enumerate(events):
+        vps.set(k, v)
+        val.set(k, w)
+        if i % read_every == 0:
+            out.append((vps.median(), val.top(TOP_N_BY_VALUE)))
+    return time.perf_counter() - t0, out
+
+def main():
+    n_pairs = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 200000
+    read_every = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+    keys, events = make_events(n_pairs, n)
+    dt_s, out_s = run_sorted(keys, events, read_every)
+    dt_r, out_r = run_ranked(keys, events, read_every)
+    assert [m for m, _ in out_s] == [m for m, _ in out_r]
+    print(f"pairs={n_pairs} updates={n} read every {read_every} (median + top{TOP_N_BY_VALUE})")
+    for name, dt in (("sorted", dt_s), ("ranked", dt_r)):
+        print(f"{name:7s}: {dt * 1e6 / n:8.2f} us/update (reads amortized)  total {dt:6.2f}s")
+
+if __name__ == "__main__":
+    main()
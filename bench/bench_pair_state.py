@@ -0,0 +1,185 @@
+# bench_pair_state.py — Gate 페어 상태 갱신 비용: 페어별 dict 재생성 + deque 튜플(기존) vs PairState 제자리 갱신(현행)
+#
+#   python bench/bench_pair_state.py [pairs] [updates]   (기본: 2000 300000)
+#
+# 호가 공개(_publish_book)와 체결 윈도(on_trades → _refresh_rate)를 7:3 으로 섞어 돌리고
+#   - 갱신 1회당 시간
+#   - 갱신 1회당 새로 만들어져 상태에 남는 객체 수(dict·튜플·float — 아래 설명)
+#   - 상태 유지 메모리(tracemalloc, 페어당 바이트, 체결 윈도가 찬 상태)
+# 를 비교한다. L2 호가창 비용은 양쪽에서 빼려고 최우선 호가만 돌려주는 가짜 책을 쓴다.
+#
+# 할당 수: 정상 상태에서는 할당과 해제가 맞물려 gen0 수집 횟수·sys.getallocatedblocks()·tracemalloc
+# 차분이 모두 0 에 가깝고, float/dict/tuple 은 프리리스트에서 재사용돼 할당기 수준에서는 안 보인다.
+# 그래서 갱신 직전에 그 페어 상태가 참조하는 객체를 전부 붙잡아 두고(주소 재사용 방지),
+# 갱신 뒤 상태가 참조하는 객체 중 처음 보는 id 를 센다 = 그 갱신이 만들어 남긴 객체 수.
+
+import gc, os, sys, random, time, tracemalloc
+from collections import deque, defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import gate_stream
+
+ALLOC_SAMPLE = 50000   # 객체 생성 수를 세는 갱신 수
+
+# ===== 기존 구현(커밋 이전 gate_stream 과 동일한 자료구조) =====
+class LegacyWindow:
+    __slots__ = ("q", "vol", "maxlen")
+
+    def __init__(self, maxlen: int = 200):
+        self.q = deque()
+        self.vol = 0.0
+        self.maxlen = maxlen
+
+    def add(self, ts, sz):
+        if len(self.q) >= self.maxlen:
+            self.vol -= self.q.popleft()[1]
+        self.q.append((ts, sz))
+        self.vol += sz
+
+    def expire(self, cutoff):
+        q = self.q
+        while q and q[0][0] < cutoff:
+            self.vol -= q.popleft()[1]
+        if not q:
+            self.vol = 0.0
+
+class LegacyState:
+    def __init__(self):
+        self.book, self.metrics = {}, {}
+        self.trades_q = defaultdict(LegacyWindow)
+
+def legacy_publish(st, p, lb, now):
+    bb, ba = lb.best_bid(), lb.best_ask()
+    prev = st.book.get(p, {})
+    ofi = (bb - prev.get("best_bid", bb)) - (ba - prev.get("best_ask", ba))
+    st.book[p] = {"best_bid": bb, "best_ask": ba, "depth_ratio": lb.depth_ratio(10), "ts": now}
+    m = st.metrics.get(p, {"OFI": 0.0, "trades_ps": 0.0, "vol_ps": 0.0, "dba": 0.0})
+    m["OFI"] = 0.8*m["OFI"] + 0.2*ofi
+    m["dba"] = 0.8*m["dba"] + 0.2*((ba - bb) / ba)
+    st.metrics[p] = m
+
+def legacy_trades(st, trades, now):
+    touched = set()
+    for t in trades:
+        st.trades_q[t["s"]].add(now, float(t["q"]))
+        touched.add(t["s"])
+    for p in touched:
+        w = st.trades_q[p]
+        w.expire(now - 1.0)
+        m = st.metrics.get(p, {"OFI": 0.0, "trades_ps": 0.0, "vol_ps": 0.0, "dba": 0.0})
+        m["trades_ps"] = float(len(w.q))
+        m["vol_ps"] = float(w.vol)
+        st.metrics[p] = m
+
+# ===== 공통 입력 =====
+class FakeBook:
+    __slots__ = ("bb", "ba")
+
+    def __init__(self, mid):
+        self.bb, self.ba = mid * 0.999, mid * 1.001
+
+    def best_bid(self): return self.bb
+    def best_ask(self): return self.ba
+    def depth_ratio(self, n): return 1.0
+
+def make_events(n_pairs, n, seed=9):
+    rnd = random.Random(seed)
+    pairs = [f"P{i}_USDT" for i in range(n_pairs)]
+    books = {p: FakeBook(rnd.uniform(0.1, 100)) for p in pairs}
+    out, t = [], 0.0
+    for _ in range(n):
+        t += 0.0005
+        p = rnd.choice(pairs)
+        if rnd.random() < 0.7:
+            out.append((t, p, None))
+        else:
+            out.append((t, p, [{"s": p, "q": f"{rnd.uniform(0.1, 5):.3f}"}]))
+    return pairs, books, out
+
+def legacy_refs(st, p) -> list:
+    out = []
+    for d in (st.book.get(p), st.metrics.get(p)):
+        if d is not None:
+            out.append(d)
+            out += d.values()
+    w = st.trades_q.get(p)
+    if w is not None:
+        out += [w, w.vol, *w.q]
+    return out
+
+def pairstate_refs(st, p) -> list:
+    ps = st.table.get(p)
+    if ps is None:
+        return []
+    w = ps.trades
+    return [ps, *(getattr(ps, f) for f in gate_stream.BOOK_FIELDS + gate_stream.METRIC_FIELDS), w, w.vol, w.ts, w.sz]
+
+def objects_per_update(refs, pub, trd, events) -> tuple:
+    """(갱신당 새 객체 수, 그중 GC 추적 컨테이너 수) — 입력 메시지의 객체(now 등)는 제외"""
+    created = tracked = 0
+    for now, p, trades in events:
+        before = refs(p)          # 살아 있는 동안은 같은 주소가 새 객체에 쓰이지 않는다
+        seen = {id(o) for o in before}
+        seen.add(id(now))
+        if trades is None:
+            pub(p, now)
+        else:
+            trd(trades, now)
+        for o in refs(p):
+            if id(o) not in seen:
+                seen.add(id(o))
+                created += 1
+                tracked += gc.is_tracked(o)
+        del before
+    return created / len(events), tracked / len(events)
+
+def run(kind, pairs, books, events):
+    if kind == "legacy":
+        st = LegacyState()
+        pub = lambda p, now: legacy_publish(st, p, books[p], now)
+        trd = lambda trades, now: legacy_trades(st, trades, now)
+        refs = lambda p: legacy_refs(st, p)
+    else:
+        st = gate_stream.STATE = gate_stream.GateState()
+        pub = lambda p, now: gate_stream._publish_book(p, books[p], now)
+        trd = gate_stream.on_trades
+        refs = lambda p: pairstate_refs(st, p)
+    # 상태 메모리: 전 페어 공개 + 윈도 가득(maxlen) 채운 뒤 측정
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    for p in pairs:
+        pub(p, 0.0)
+        for k in range(200):
+            trd([{"s": p, "q": "1.0"}], 0.0)
+    retained = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+
+    gc.collect()
+    t0 = time.perf_counter()
+    for now, p, trades in events:
+        if trades is None:
+            pub(p, now)
+        else:
+            trd(trades, now)
+    dt = time.perf_counter() - t0
+    # 시간 측정과 분리: 참조 수집 자체가 느리므로 정상 상태에서 일부 구간만 다시 돌린다
+    t_end = events[-1][0]
+    tail = [(t_end + now, p, trades) for now, p, trades in events[:ALLOC_SAMPLE]]
+    objs, tracked = objects_per_update(refs, pub, trd, tail)
+    return {"us_per_update": dt * 1e6 / len(events), "objs_per_update": objs, "gc_objs_per_update": tracked,
+            "bytes_per_pair": retained / len(pairs)}
+
+def main():
+    n_pairs = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 300000
+    pairs, books, events = make_events(n_pairs, n)
+    res = {k: run(k, pairs, books, events) for k in ("legacy", "pairstate")}
+    print(f"pairs={n_pairs} updates={n} (book 70% / trades 30%)")
+    for k, r in res.items():
+        print(f"{k:10s}: {r['us_per_update']:6.2f} us/update  {r['objs_per_update']:5.2f} new objects/update "
+              f"({r['gc_objs_per_update']:4.2f} GC-tracked)  "
+              f"state {r['bytes_per_pair'] / 1024:6.2f} KiB/pair")
+
+if __name__ == "__main__":
+    main()
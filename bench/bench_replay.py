@@ -0,0 +1,74 @@
+# bench_replay.py — 합성 Gate 피드를 기록 → 최대 속도 재생 처리량
+#
+#   python bench/bench_replay.py [n_pairs] [minutes] [msgs_per_sec]   (기본: 100 10 1000)
+#
+# recorder.Recorder 로 호가 diff/체결 메시지와 REST(ALL_KRW, currency_pairs, 호가 스냅샷)를
+# 임시 디렉터리에 쓰고, replay.Replayer 로 다시 흘려 재생 배속과 초당 메시지 수를 잰다.
+
+import os, sys, asyncio, json, random, tempfile, time
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import recorder
+from config import BITHUMB_BASE, GATE_REST
+from replay import Replayer
+
+def synth(dirpath, n_pairs, minutes, rate, seed=3):
+    rnd = random.Random(seed)
+    syms = [f"C{i}" for i in range(n_pairs)]
+    pairs = [f"{s}_USDT" for s in syms]
+    t0 = 1_700_000_000.0
+    rest = recorder.Recorder(dirpath, "rest")
+    put = lambda url, params, body: rest.write(recorder.KIND_REST, str(httpx.URL(url, params=params)), json.dumps(body), t0)
+    put(f"{BITHUMB_BASE}/public/ticker/ALL_KRW", None,
+        {"status": "0000", "data": {**{s: {"closing_price": "1000", "acc_trade_value_24H": "1e9"} for s in syms}, "USDT": {"closing_price": "1400"}, "date": "0"}})
+    put(f"{GATE_REST}/spot/currency_pairs", None, [{"id": p, "quote": "USDT"} for p in pairs])
+    mids = {p: rnd.uniform(0.5, 5.0) for p in pairs}
+    for p in pairs:
+        m = mids[p]
+        put(f"{GATE_REST}/spot/order_book", {"currency_pair": p, "limit": 100, "with_id": "true"},
+            {"id": 0, "bids": [[f"{m * (1 - 0.001 * k):.6f}", "10"] for k in range(1, 21)],
+             "asks": [[f"{m * (1 + 0.001 * k):.6f}", "10"] for k in range(1, 21)]})
+    rest.close()
+
+    gate = recorder.Recorder(dirpath, "gate")
+    seq = {p: 0 for p in pairs}
+    n = int(minutes * 60 * rate)
+    for i in range(n):
+        ts = t0 + i / rate
+        p = rnd.choice(pairs)
+        m = mids[p]
+        if rnd.random() < 0.7:
+            U = seq[p] + 1
+            seq[p] = u = U + rnd.randint(0, 2)
+            side = "b" if rnd.random() < 0.5 else "a"
+            px = m * (1 - 0.001 * rnd.randint(1, 20)) if side == "b" else m * (1 + 0.001 * rnd.randint(1, 20))
+            res = {"s": p, "U": U, "u": u, "b": [], "a": []}
+            res[side] = [[f"{px:.6f}", f"{rnd.choice([0, rnd.uniform(1, 20)]):.3f}"]]
+            msg = {"time_ms": int(ts * 1000), "channel": "spot.order_book_update", "event": "update", "result": res}
+        else:
+            msg = {"time_ms": int(ts * 1000), "channel": "spot.trades", "event": "update",
+                   "result": [{"s": p, "q": f"{rnd.uniform(0.1, 50):.3f}"}]}
+        gate.write(recorder.KIND_GATE_WS, "", json.dumps(msg), ts)
+    gate.close()
+    return n
+
+def main():
+    n_pairs = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    minutes = float(sys.argv[2]) if len(sys.argv) > 2 else 10
+    rate = int(sys.argv[3]) if len(sys.argv) > 3 else 1000
+    with tempfile.TemporaryDirectory() as d:
+        t = time.perf_counter()
+        n = synth(d, n_pairs, minutes, rate)
+        t_write = time.perf_counter() - t
+        size = sum(os.path.getsize(os.path.join(d, f)) for f in os.listdir(d))
+        t = time.perf_counter()
+        read = sum(1 for _ in recorder.read(d, ("gate",)))
+        t_read = time.perf_counter() - t
+        res = asyncio.run(Replayer(d).run())
+        print(json.dumps(res, ensure_ascii=False))
+        print(f"msgs={n} write {n / t_write:,.0f}/s  file {size / 1e6:.1f} MB ({size / n:.1f} B/msg)  "
+              f"raw read {read / t_read:,.0f}/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# bench_scoring.py — 심볼 루프(final_score) vs 컬럼 배치(batch_score) 평가 비용
+#
+#   python bench/bench_scoring.py [n ...]     (기본: 30 300 1000)
+
+import os, sys, random, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import numpy as np
+from config import PREMIUM_MIN, ORDERBOOK_IMBAL_RATIO, VOLUME_SURGE_RATIO, MA_COMPRESSION_MAX
+from gate_stream import STATE
+from indicators import final_score
+from batch_score import Universe, score_batch
+
+USDT = 1400.0
+LEAD_THRESH = 0.9
+
+def make_universe(n, seed=11):
+    rnd = random.Random(seed)
+    syms = [f"S{i}" for i in range(n)]
+    pairs = [f"S{i}_USDT" if rnd.random() < 0.8 else "" for i in range(n)]
+    STATE.metrics, STATE.book = {}, {}
+    feats = {}
+    for s, p in zip(syms, pairs):
+        px = rnd.uniform(1, 1000)
+        if p:
+            STATE.metrics[p] = {"OFI": rnd.gauss(0, 1), "trades_ps": rnd.uniform(0, 20),
+                                "vol_ps": rnd.uniform(0, 50), "dba": rnd.uniform(0, 0.01)}
+            mid = px / USDT * rnd.uniform(0.98, 1.0)
+            STATE.book[p] = {"best_bid": mid * 0.999, "best_ask": mid * 1.001}
+        feats[s] = (px, rnd.uniform(1e6, 1e9), rnd.uniform(0, 10), rnd.uniform(0, 3), rnd.uniform(0, 0.1))
+    return syms, pairs, feats
+
+def loop_path(syms, pairs, feats):
+    out = []
+    for s, p in zip(syms, pairs):
+        price, value, vol_surge, ob_ratio, cmp_ratio = feats[s]
+        prem = None
+        if p and p in STATE.book:
+            b = STATE.book[p]
+            mid = (b["best_bid"] + b["best_ask"]) / 2.0
+            prem = ((price / USDT) / mid) - 1.0 if mid > 0 else None
+        score, lead = final_score(p, prem, cmp_ratio)
+        passed = (vol_surge >= VOLUME_SURGE_RATIO and ob_ratio >= ORDERBOOK_IMBAL_RATIO and
+                  (prem is not None and prem >= PREMIUM_MIN) and cmp_ratio <= MA_COMPRESSION_MAX)
+        out.append((lead, score, passed))
+    return out
+
+def build(syms, pairs, feats):
+    u = Universe(syms, pairs)
+    cols = np.array([feats[s] for s in syms])
+    u.price[:], u.value[:], u.vol_surge[:], u.ob_ratio[:], u.cmp[:] = cols.T
+    u.set_premium(USDT, u.load_gate())
+    return u
+
+def batch_path(syms, pairs, feats):
+    return score_batch(build(syms, pairs, feats), LEAD_THRESH)
+
+def bench(fn, *args, reps=50):
+    fn(*args)
+    t0 = time.perf_counter()
+    for _ in range(reps):
+        fn(*args)
+    return (time.perf_counter() - t0) / reps
+
+def main():
+    sizes = [int(x) for x in sys.argv[1:]] or [30, 300, 1000]
+    for n in sizes:
+        syms, pairs, feats = make_universe(n)
+        ref, res = loop_path(syms, pairs, feats), batch_path(syms, pairs, feats)
+        diff = max(max(abs(r[0] - l), abs(r[1] - s)) for r, l, s in zip(ref, res["lead"], res["score"]))
+        same_pass = all(r[2] == bool(p) for r, p in zip(ref, res["pass"]))
+        tl, tb = bench(loop_path, syms, pairs, feats), bench(batch_path, syms, pairs, feats)
+        ts = bench(score_batch, build(syms, pairs, feats), LEAD_THRESH)   # 컬럼 적재 제외
+        print(f"n={n:5d}  loop {tl*1e3:7.3f} ms  batch {tb*1e3:7.3f} ms (score only {ts*1e3:6.3f} ms)  "
+              f"max|diff|={diff:.1e} pass_equal={same_pass} passed={int(res['pass'].sum())}")
+
+if __name__ == "__main__":
+    main()
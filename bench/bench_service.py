@@ -0,0 +1,182 @@
+# bench_service.py — 가짜 거래소(fake_exchange.py) 위에서 서비스 전체를 띄워 규모별로 잰다
+#
+#   python bench/bench_service.py [--pairs 30,100,300,1000,2000] [--rate 2000] [--duration 20]
+#                                 [--concurrency 8] [--replay DIR] [--out bench/results/service-*.json]
+#
+# 규모(페어 수)마다: 가짜 서버 → app.py 를 새 프로세스로 띄우고, 첫 스냅샷이 나오면 warmup 뒤
+# duration 초 동안 /scan 부하(동시 concurrency)를 걸면서 같은 구간의 /metrics 차분으로
+# Gate 수신 msg/s·지연, 서비스 RSS 를 기록한다. 결과는 JSON 으로 저장해 실행끼리 비교한다.
+# 부하 발생기·가짜 서버·서비스가 같은 머신의 CPU 를 나눠 쓰므로 절대값보다 규모별 추이를 본다.
+
+import argparse, json, os, platform, subprocess, sys, threading, time
+import httpx
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+FAKE = os.path.join(ROOT, "bench", "fake_exchange.py")
+
+def scrape(url: str) -> dict:
+    """Prometheus 텍스트 → {(name, labels_str): value}"""
+    out = {}
+    for line in httpx.get(url, timeout=10).text.splitlines():
+        if not line or line[0] == "#":
+            continue
+        key, _, v = line.rpartition(" ")
+        name, _, labels = key.partition("{")
+        out[(name, labels.rstrip("}"))] = float(v)
+    return out
+
+def hist_delta(a: dict, b: dict, name: str, labels: str) -> dict:
+    """두 스크레이프 사이 히스토그램 구간의 count/mean/p50/p99(버킷 상한)"""
+    def sel(d):
+        rows = []
+        for (n, lab), v in d.items():
+            if n == name + "_bucket" and lab.startswith(labels):
+                le = lab.rsplit('le="', 1)[1].rstrip('"')
+                rows.append((float(le), v))
+        return dict(rows)
+    ba, bb = sel(a), sel(b)
+    n = b.get((name + "_count", labels), 0) - a.get((name + "_count", labels), 0)
+    s = b.get((name + "_sum", labels), 0) - a.get((name + "_sum", labels), 0)
+    if n <= 0:
+        return {"n": 0}
+    pct = lambda q: next((le for le in sorted(bb) if bb[le] - ba.get(le, 0) >= q * n), None)
+    ms = lambda x: None if x is None or x == float("inf") else round(x * 1000, 2)
+    return {"n": int(n), "mean_ms": round(s / n * 1000, 2), "p50_ms_le": ms(pct(0.5)), "p99_ms_le": ms(pct(0.99))}
+
+def rss_mb(pid: int) -> dict:
+    out = {}
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith(("VmRSS", "VmHWM")):
+                k, v = line.split(":")
+                out[k.lower()] = round(int(v.split()[0]) / 1024, 1)
+    return out
+
+def load_scan(base: str, duration: float, concurrency: int) -> dict:
+    lats, errors = [], [0]
+    stop = time.perf_counter() + duration
+
+    def worker():
+        with httpx.Client(base_url=base, timeout=10) as c:
+            while time.perf_counter() < stop:
+                t = time.perf_counter()
+                try:
+                    r = c.get("/scan", params={"only_pass": "0", "top": "50"})
+                    r.raise_for_status()
+                    lats.append(time.perf_counter() - t)
+                except Exception:
+                    errors[0] += 1
+
+    ts = [threading.Thread(target=worker) for _ in range(concurrency)]
+    t0 = time.perf_counter()
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    wall = time.perf_counter() - t0
+    lats.sort()
+    pct = lambda q: round(lats[min(len(lats) - 1, int(q * len(lats)))] * 1000, 2) if lats else None
+    return {"requests": len(lats), "errors": errors[0], "rps": round(len(lats) / wall, 1),
+            "p50_ms": pct(0.5), "p99_ms": pct(0.99), "max_ms": pct(1.0)}
+
+def wait_ready(base: str, timeout: float) -> dict:
+    t_end = time.time() + timeout
+    while time.time() < t_end:
+        try:
+            h = httpx.get(base + "/health", timeout=120).json()   # 첫 요청이 초기화를 돌린다
+            if h["scan"]["version"] > 0:
+                return h
+        except Exception:
+            pass
+        time.sleep(0.5)
+    raise TimeoutError("service did not publish a snapshot")
+
+def run_one(n_pairs: int, a, port: int) -> dict:
+    fake_cmd = [sys.executable, FAKE, "--pairs", str(n_pairs), "--rate", str(a.rate), "--port", str(port)]
+    if a.replay:
+        fake_cmd += ["--replay", a.replay, "--speed", str(a.speed)]
+    fake = subprocess.Popen(fake_cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    svc = None
+    try:
+        ready = json.loads(fake.stdout.readline())
+        env = {**os.environ, **ready["env"], "PORT": str(port + 10)}
+        svc = subprocess.Popen([sys.executable, "app.py"], cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        base = f"http://127.0.0.1:{port + 10}"
+        fake_url = f"http://127.0.0.1:{port}/_stats"
+        t0 = time.perf_counter()
+        wait_ready(base, a.timeout)
+        t_first = time.perf_counter() - t0
+        time.sleep(a.warmup)
+
+        m0, f0, w0 = scrape(base + "/metrics"), httpx.get(fake_url).json(), time.perf_counter()
+        scan = load_scan(base, a.duration, a.concurrency)
+        m1, f1, w1 = scrape(base + "/metrics"), httpx.get(fake_url).json(), time.perf_counter()
+        health = httpx.get(base + "/health", timeout=10).json()
+        # 거래대금 상위 50 심볼 중 Gate 호가가 선 수(스냅샷 우선순위 확인용) — 순위는 가짜 서버의 ALL_KRW 기준
+        all_krw = httpx.get(ready["env"]["BITHUMB_BASE"] + "/public/ticker/ALL_KRW", timeout=10).json()["data"]
+        mapping = httpx.get(base + "/symbols", timeout=10).json()["mapped"]
+        synced = {l.split('"')[1] for (n, l) in m1 if n == "scanner_gate_book_age_seconds"}
+        by_value = sorted((s for s in mapping if s in all_krw), key=lambda s: -float(all_krw[s]["acc_trade_value_24H"]))
+        top_pairs = [mapping[s] for s in by_value[:50]]
+        wall = w1 - w0
+        gate_key = ("scanner_ingest_messages_total", 'source="gate"')
+        stage = lambda s: hist_delta(m0, m1, "scanner_scan_stage_seconds", f'stage="{s}"')
+        return {
+            "pairs": n_pairs, "mapped": health["mapped"], "first_snapshot_sec": round(t_first, 2),
+            "scan_http": scan,
+            "gate": {
+                "sent_per_sec": round((f1["gate_sent"] - f0["gate_sent"]) / wall, 1),
+                "consumed_per_sec": round((m1.get(gate_key, 0) - m0.get(gate_key, 0)) / wall, 1),
+                "lag": hist_delta(m0, m1, "scanner_ingest_lag_seconds", 'source="gate"'),
+                "decode": hist_delta(m0, m1, "scanner_ingest_decode_seconds", 'source="gate"'),
+                "shards": len(health["ws_shards"]),
+                "books_synced": len(synced),
+                "books_synced_top50": sum(1 for p in top_pairs if p in synced),
+            },
+            "pipeline": {"scan": stage("total"), "fanout": stage("fanout"), "boost": stage("boost")},
+            "telegram_sent": f1["telegram"] - f0["telegram"],
+            "memory_mb": rss_mb(svc.pid),
+        }
+    finally:
+        for p in (svc, fake):
+            if p is not None:
+                p.terminate()
+                try:
+                    p.wait(5)
+                except subprocess.TimeoutExpired:
+                    p.kill()
+
+def main():
+    ap = argparse.ArgumentParser(description="end-to-end service benchmark against local fake exchanges")
+    ap.add_argument("--pairs", default="30,100,300,1000,2000")
+    ap.add_argument("--rate", type=float, default=2000.0, help="Gate 합성 피드 전체 msg/s")
+    ap.add_argument("--replay", default=None, help="합성 대신 recorder 디렉터리의 Gate 원문")
+    ap.add_argument("--speed", type=float, default=1.0)
+    ap.add_argument("--duration", type=float, default=20.0)
+    ap.add_argument("--warmup", type=float, default=5.0)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--timeout", type=float, default=180.0, help="첫 스냅샷 대기 한도(초)")
+    ap.add_argument("--port", type=int, default=18080)
+    ap.add_argument("--out", default=None)
+    a = ap.parse_args()
+
+    runs = []
+    for n in [int(x) for x in a.pairs.split(",")]:
+        r = run_one(n, a, a.port)
+        runs.append(r)
+        g, s = r["gate"], r["scan_http"]
+        print(f"pairs={n:5d}  /scan {s['rps']:8.1f} req/s p99 {s['p99_ms']} ms  "
+              f"gate {g['consumed_per_sec']:8.1f}/{g['sent_per_sec']:.0f} msg/s lag p99<={g['lag'].get('p99_ms_le')} ms  "
+              f"books {g['books_synced']} (top50 {g['books_synced_top50']})  "
+              f"rss {r['memory_mb'].get('vmrss')} MB", flush=True)
+
+    out = a.out or os.path.join(ROOT, "bench", "results", time.strftime("service-%Y%m%d-%H%M%S.json"))
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump({"meta": {"ts": time.time(), "args": vars(a), "python": platform.python_version(),
+                            "cpus": os.cpu_count(), "machine": platform.machine()}, "runs": runs}, f, indent=2)
+    print(f"saved {out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# bench_sse.py — /scan/stream 구독자 수별 발행 1회당 비용: 구독자마다 필터+전체 JSON(폴링과 같은 일) vs 공유 diff 프레임(현행)
+#
+#   python bench/bench_sse.py [viewers] [publishes] [rows]   (기본: 500 20 300)
+#
+# 가짜 엔진에 행 rows 개짜리 스냅샷을 발행하고, 구독자 viewers 명(스레드, 필터 4종을 나눠 가짐)이
+# 프레임을 받아 버리는 데까지의 CPU 시간(process_time)과 발행→마지막 구독자 수신 시간을 잰다.
+# 소켓 쓰기 비용은 양쪽에 같으므로 빼고 프레임 생성 비용만 비교한다.
+
+import json, os, random, sys, threading, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from scan_engine import ScanEngine
+from scan_stream import ScanFeed
+
+FILTERS = [(True, 3, 0.0, 0.0, "score", True), (True, 20, 0.0, 0.0, "lead", True),
+           (False, 40, 0.0, 0.0, "value", True), (False, 10, 0.0, 1.0, "score", True)]
+
+def pick(snap, only_pass, top, min_lead, min_score, sort_by, sort_desc):
+    key = {"lead": "lead", "value": "value_24h"}.get(sort_by, "score")
+    out = sorted(snap.rows, key=lambda x: (x["pass"], x[key]), reverse=sort_desc)
+    return [r for r in out if (r["pass"] or not only_pass) and r["lead"] >= max(snap.lead_thresh, min_lead)
+            and r["score"] >= min_score][:top]
+
+def make_rows(n, rnd):
+    return [{"symbol": f"S{i}", "price": rnd.uniform(1, 1e5), "value_24h": rnd.uniform(1e8, 1e11),
+             "lead": round(rnd.uniform(0, 3), 3), "score": round(rnd.uniform(0, 3), 3), "pass": rnd.random() < 0.2,
+             "premium": rnd.uniform(-0.01, 0.01)} for i in range(n)]
+
+def naive_events(eng, params):
+    version = eng.snapshot.version
+    while True:
+        with eng.cond:
+            eng.cond.wait_for(lambda: eng.snapshot.version != version)
+        snap = eng.snapshot
+        version = snap.version
+        yield f"data: {json.dumps({'version': version, 'rows': pick(snap, *params)})}\n\n"
+
+def run(kind, viewers, publishes, n_rows):
+    rnd = random.Random(5)
+    eng = ScanEngine()
+    eng._publish(1.0, make_rows(n_rows, rnd), [], 0.0)
+    if kind == "shared":
+        feed = ScanFeed(eng, pick)
+        gen = lambda p: feed.events(p)
+    else:
+        eng.cond = threading.Condition()
+        def wake(snap):
+            with eng.cond:
+                eng.cond.notify_all()
+        eng.listeners.append(wake)
+        gen = lambda p: naive_events(eng, p)
+
+    done = threading.Semaphore(0)
+    def viewer(i):
+        g = gen(FILTERS[i % len(FILTERS)])
+        if kind == "shared":
+            next(g)   # 접속 직후 snapshot
+        for _ in range(publishes):
+            next(g)
+            done.release()
+    ts = [threading.Thread(target=viewer, args=(i,), daemon=True) for i in range(viewers)]
+    for t in ts:
+        t.start()
+    time.sleep(0.5)
+
+    cpu, lat = 0.0, []
+    for _ in range(publishes):
+        rows = make_rows(n_rows, rnd)
+        c0, t0 = time.process_time(), time.perf_counter()
+        eng._publish(1.0, rows, [], 0.0)
+        for _ in range(viewers):
+            done.acquire()
+        lat.append(time.perf_counter() - t0)
+        cpu += time.process_time() - c0
+    lat.sort()
+    return {"cpu_ms_per_publish": cpu * 1000 / publishes, "fanout_ms_p50": lat[len(lat) // 2] * 1000}
+
+def main():
+    viewers = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    publishes = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    n_rows = int(sys.argv[3]) if len(sys.argv) > 3 else 300
+    print(f"viewers={viewers} publishes={publishes} rows={n_rows} filters={len(FILTERS)}")
+    for kind in ("naive", "shared"):
+        r = run(kind, viewers, publishes, n_rows)
+        print(f"{kind:7s}: {r['cpu_ms_per_publish']:8.2f} ms CPU/publish  fan-out p50 {r['fanout_ms_p50']:8.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# bench_trade_rate.py — spot.trades 처리 비용: 전체 재스캔(기존) vs 증분 윈도(현행)
+#
+#   python bench/bench_trade_rate.py [pairs] [messages]
+
+import os, sys, random, time
+from collections import deque, defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import gate_stream
+from gate_stream import STATE, on_trades, sweep_rates
+
+def legacy_on_trades(trades_q, metrics, trades, now):
+    # 기존 _consumer 의 spot.trades 분기(모든 페어 재스캔 + sum 재계산)
+    for t in trades:
+        trades_q[t["s"]].append((now, float(t["q"])))
+    for p, dq in list(trades_q.items()):
+        cutoff = now - 1.0
+        while dq and dq[0][0] < cutoff: dq.popleft()
+        m = metrics.get(p, {"OFI":0.0,"trades_ps":0.0,"vol_ps":0.0,"dba":0.0})
+        m["trades_ps"] = float(len(dq))
+        m["vol_ps"] = float(sum(x[1] for x in dq))
+        metrics[p] = m
+
+def make_msgs(n_pairs, n_msgs, seed=7):
+    rnd = random.Random(seed)
+    pairs = [f"P{i}_USDT" for i in range(n_pairs)]
+    t, out = 0.0, []
+    for _ in range(n_msgs):
+        t += 0.002   # 500 msg/s
+        trades = [{"s": rnd.choice(pairs), "q": f"{rnd.random()*10:.4f}"} for _ in range(rnd.randint(1, 3))]
+        out.append((t, trades))
+    return out
+
+def main():
+    n_pairs = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    n_msgs = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    msgs = make_msgs(n_pairs, n_msgs)
+
+    trades_q, metrics = defaultdict(lambda: deque(maxlen=200)), {}
+    t0 = time.perf_counter()
+    for now, trades in msgs:
+        legacy_on_trades(trades_q, metrics, trades, now)
+    legacy = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    next_sweep = 0.0
+    for now, trades in msgs:
+        on_trades(trades, now)
+        if now >= next_sweep:
+            sweep_rates(now)
+            next_sweep = now + gate_stream.TRADE_SWEEP_SEC
+    incr = time.perf_counter() - t0
+
+    # 최종 시점에 만료를 맞춘 뒤 값 비교
+    sweep_rates(msgs[-1][0])
+    worst = max(
+        abs(metrics[p]["vol_ps"] - STATE.metrics[p]["vol_ps"]) +
+        abs(metrics[p]["trades_ps"] - STATE.metrics[p]["trades_ps"])
+        for p in metrics
+    )
+    print(f"pairs={n_pairs} msgs={n_msgs}")
+    print(f"legacy      : {legacy*1e6/n_msgs:8.2f} us/msg")
+    print(f"incremental : {incr*1e6/n_msgs:8.2f} us/msg  (x{legacy/incr:.1f})")
+    print(f"max abs diff: {worst:.3e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+# fake_exchange.py — 벤치마크용 로컬 가짜 빗썸 REST / Gate REST·웹소켓 / 텔레그램 서버
+#
+#   python bench/fake_exchange.py [--pairs 300] [--rate 2000] [--port 18080] [--replay DIR] [--tg-delay 0.05]
+#
+# 한 이벤트 루프에서 모두 돈다. 호스트 단위 레이트 리밋(http_pool)이 서로 섞이지 않도록
+# 서버마다 다른 루프백 주소를 쓴다(리눅스는 127.0.0.0/8 전체가 lo).
+#   빗썸 REST   http://127.0.0.1:PORT       (ALL_KRW, 개별 ticker/orderbook, candlestick, v1 candles)
+#   Gate REST   http://127.0.0.2:PORT/api/v4 (currency_pairs, order_book)
+#   Gate WS     ws://127.0.0.2:PORT+1/ws/v4/ (spot.order_book_update / spot.trades, 전체 --rate msg/s)
+#   텔레그램    http://127.0.0.3:PORT        (sendMessage 는 받기만 하고 센다)
+# GET /_stats (아무 서버나) : 보낸 메시지/받은 요청 수.  GET /_listings?add=N&remove=M : 상장/폐지 흉내.
+# --replay DIR 이면 recorder 로 남긴 Gate 원문을 기록 순서대로(--rate 배속 대신 --speed) 다시 보낸다.
+# 준비가 끝나면 stdout 에 {"ready": true, "env": {...}} 한 줄을 쓴다 — 서비스에 넘길 환경변수.
+
+import argparse, asyncio, json, os, random, sys, tempfile, time
+from datetime import datetime, timezone
+from urllib.parse import parse_qs, urlsplit
+
+import websockets
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+HOSTS = {"bithumb": "127.0.0.1", "gate": "127.0.0.2", "telegram": "127.0.0.3"}
+USDT_KRW = 1400.0
+TICK_SEC = 0.01   # Gate 피드 송신 주기(이 간격마다 rate*TICK_SEC 개씩 묶어 보냄)
+
+def service_env(port: int) -> dict:
+    """서비스(app.py)를 가짜 서버로 돌리기 위한 환경변수"""
+    return {
+        "BITHUMB_BASE": f"http://{HOSTS['bithumb']}:{port}",
+        "GATE_REST": f"http://{HOSTS['gate']}:{port}/api/v4",
+        "GATE_WS": f"ws://{HOSTS['gate']}:{port + 1}/ws/v4/",
+        "TELEGRAM_API": f"http://{HOSTS['telegram']}:{port}",
+        "TELEGRAM_BOT_TOKEN": "bench", "TELEGRAM_CHAT_ID": "1",
+        "BITHUMB_STREAM": "0",   # 빗썸은 REST 경로만 잰다
+        # 실행마다 새 매핑 캐시 — 이전 규모의 캐시를 재사용하거나 운영 캐시를 가짜 페어로 덮지 않게
+        "SYMBOL_MAP_CACHE": os.path.join(tempfile.gettempdir(), f"bench-symbol-map-{port}-{os.getpid()}.json"),
+        "SHARED_STORE": "", "HISTORY_FILE": "",   # 운영 공유 저장소/이력 파일에 붙지 않음
+    }
+
+class FakeMarket:
+    def __init__(self, n_pairs: int, seed: int = 11, pairs=None):
+        rnd = self.rnd = random.Random(seed)
+        self.pairs = list(pairs) if pairs else [f"C{i}_USDT" for i in range(n_pairs)]
+        self.syms = [p.split("_")[0] for p in self.pairs]
+        self.mid = {p: rnd.uniform(0.05, 50.0) for p in self.pairs}
+        self.value = {s: rnd.uniform(1e8, 5e10) for s in self.syms}
+        self.seq = {p: 1000 for p in self.pairs}   # 페어별 마지막 update id(스냅샷 id 와 diff U/u 연속)
+        self.stats = {"gate_sent": 0, "gate_conns": 0, "telegram": 0, "rest": {}}
+
+    def relist(self, add: int, remove: int):
+        for p in self.pairs[:remove]:
+            self.mid.pop(p, None)
+        self.pairs = self.pairs[remove:]
+        n0 = max((int(p.split("_")[0][1:]) for p in self.pairs if p[1:].split("_")[0].isdigit()), default=-1) + 1
+        for i in range(n0, n0 + add):
+            p = f"C{i}_USDT"
+            self.pairs.append(p)
+            self.mid[p] = self.rnd.uniform(0.05, 50.0)
+            self.value[p.split("_")[0]] = self.rnd.uniform(1e8, 5e10)
+            self.seq[p] = 1000
+        self.syms = [p.split("_")[0] for p in self.pairs]
+
+    # ---- 빗썸 ----
+    def krw(self, sym: str) -> float:
+        return self.mid.get(f"{sym}_USDT", 1.0) * USDT_KRW * (1.0 + self.rnd.uniform(-0.004, 0.012))
+
+    def all_krw(self) -> dict:
+        data = {s: {"closing_price": f"{self.krw(s):.4f}", "acc_trade_value_24H": f"{self.value[s]:.0f}"} for s in self.syms}
+        data["USDT"] = {"closing_price": f"{USDT_KRW}", "acc_trade_value_24H": "1e10"}
+        data["date"] = str(int(time.time() * 1000))
+        return {"status": "0000", "data": data}
+
+    def ticker(self, sym: str) -> dict:
+        px = USDT_KRW if sym == "USDT" else self.krw(sym)
+        return {"status": "0000", "data": {"closing_price": f"{px:.4f}", "acc_trade_value_24H": f"{self.value.get(sym, 1e9):.0f}"}}
+
+    def orderbook(self, sym: str) -> dict:
+        px = self.krw(sym)
+        lv = lambda sgn: [{"price": f"{px * (1 + sgn * 0.001 * k):.4f}", "quantity": f"{self.rnd.uniform(1, 30):.3f}"} for k in range(1, 31)]
+        return {"status": "0000", "data": {"bids": lv(-1), "asks": lv(1)}}
+
+    def candles(self, sym: str, n: int = 150) -> list:
+        t0 = int(time.time()) // 3600 * 3600 * 1000 - (n - 1) * 3600_000
+        px = self.krw(sym)
+        rows = []
+        for i in range(n):
+            c = px * (1 + 0.01 * ((i * 7919) % 13 - 6) / 6)
+            rows.append([t0 + i * 3600_000, f"{c:.4f}", f"{c:.4f}", f"{c * 1.01:.4f}", f"{c * 0.99:.4f}", f"{10 + (i * 31) % 17}"])
+        return rows
+
+    def v1_candles(self, sym: str, count: int) -> list:
+        out = []
+        for r in self.candles(sym, count)[::-1]:
+            ts = datetime.fromtimestamp(r[0] / 1000, timezone.utc).replace(tzinfo=None)
+            out.append({"candle_date_time_utc": ts.isoformat(), "opening_price": float(r[1]), "trade_price": float(r[2]),
+                        "high_price": float(r[3]), "low_price": float(r[4]), "candle_acc_trade_volume": float(r[5])})
+        return out
+
+    # ---- Gate ----
+    def gate_book(self, pair: str) -> dict:
+        m = self.mid.get(pair, 1.0)
+        lv = lambda sgn: [[f"{m * (1 + sgn * 0.0005 * k):.8f}", f"{self.rnd.uniform(1, 50):.3f}"] for k in range(1, 51)]
+        return {"id": self.seq.get(pair, 0), "current": int(time.time() * 1000), "update": int(time.time() * 1000),
+                "bids": lv(-1), "asks": lv(1)}
+
+    def synth_msg(self, pair: str, now: float) -> dict:
+        rnd, m = self.rnd, self.mid[pair]
+        if rnd.random() < 0.7:
+            U = self.seq[pair] + 1
+            self.seq[pair] = u = U + rnd.randint(0, 2)
+            side = "b" if rnd.random() < 0.5 else "a"
+            px = m * (1 - 0.0005 * rnd.randint(1, 50)) if side == "b" else m * (1 + 0.0005 * rnd.randint(1, 50))
+            res = {"t": int(now * 1000), "s": pair, "U": U, "u": u, "b": [], "a": []}
+            res[side] = [[f"{px:.8f}", "0" if rnd.random() < 0.3 else f"{rnd.uniform(1, 50):.3f}"]]
+            return {"time": int(now), "time_ms": int(now * 1000), "channel": "spot.order_book_update", "event": "update", "result": res}
+        self.mid[pair] = m * (1 + rnd.gauss(0, 2e-4))
+        return {"time": int(now), "time_ms": int(now * 1000), "channel": "spot.trades", "event": "update",
+                "result": [{"s": pair, "q": f"{rnd.uniform(0.1, 50):.3f}", "p": f"{m:.8f}", "side": rnd.choice(("buy", "sell"))}]}
+
+# ===== 최소 HTTP/1.1 서버(keep-alive) =====
+async def _http_conn(reader, writer, route):
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            method, target, _ = line.decode("latin-1").split(" ", 2)
+            n = 0
+            while True:
+                h = await reader.readline()
+                if h in (b"\r\n", b"\n", b""):
+                    break
+                k, _, v = h.decode("latin-1").partition(":")
+                if k.strip().lower() == "content-length":
+                    n = int(v)
+            body = await reader.readexactly(n) if n else b""
+            status, obj = await route(method, urlsplit(target), body)
+            payload = json.dumps(obj).encode()
+            writer.write(f"HTTP/1.1 {status} X\r\ncontent-type: application/json\r\ncontent-length: {len(payload)}\r\n\r\n".encode() + payload)
+            await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+class FakeExchange:
+    def __init__(self, market: FakeMarket, rate: float = 2000.0, tg_delay: float = 0.05,
+                 replay_dir: str | None = None, speed: float = 1.0):
+        self.m = market
+        self.rate = rate
+        self.tg_delay = tg_delay
+        self.replay_dir = replay_dir
+        self.speed = speed
+        self.owner = {}   # pair -> 구독한 웹소켓
+
+    def _count(self, key: str):
+        r = self.m.stats["rest"]
+        r[key] = r.get(key, 0) + 1
+
+    async def route(self, method, url, body):
+        path, q = url.path, parse_qs(url.query)
+        if path == "/_stats":
+            return 200, {**self.m.stats, "subscribed": len(self.owner)}
+        if path == "/_listings":   # 상장/폐지 흉내: ?add=N&remove=M (매핑 갱신 시험용)
+            self.m.relist(int(q.get("add", ["0"])[0]), int(q.get("remove", ["0"])[0]))
+            return 200, {"pairs": len(self.m.pairs)}
+        if path.endswith("/sendMessage"):
+            self.m.stats["telegram"] += 1
+            if self.tg_delay:
+                await asyncio.sleep(self.tg_delay)
+            return 200, {"ok": True, "result": {"message_id": self.m.stats["telegram"]}}
+        parts = path.strip("/").split("/")
+        if path.startswith("/api/v4/spot/"):
+            self._count(parts[-1])
+            if parts[-1] == "currency_pairs":
+                return 200, [{"id": p, "base": p.split("_")[0], "quote": "USDT", "trade_status": "tradable"} for p in self.m.pairs]
+            if parts[-1] == "order_book":
+                return 200, self.m.gate_book(q.get("currency_pair", [""])[0])
+        if path.startswith("/public/"):
+            kind, arg = parts[1], parts[2] if len(parts) > 2 else ""
+            self._count(kind if arg != "ALL_KRW" else "ALL_KRW")
+            sym = arg.rsplit("_", 1)[0]
+            if kind == "ticker":
+                return 200, self.m.all_krw() if arg == "ALL_KRW" else self.m.ticker(sym)
+            if kind == "orderbook":
+                return 200, self.m.orderbook(sym)
+            if kind == "candlestick":
+                return 200, {"status": "0000", "data": self.m.candles(sym)}
+        if path == "/v1/candles/minutes/60":
+            self._count("v1_candles")
+            sym = q.get("market", ["KRW-X"])[0].split("-", 1)[1]
+            return 200, self.m.v1_candles(sym, int(q.get("count", ["2"])[0]))
+        return 404, {"error": "not found", "path": path}
+
+    async def ws_handler(self, ws):
+        self.m.stats["gate_conns"] += 1
+        try:
+            async for raw in ws:
+                msg = json.loads(raw)
+                ev = msg.get("event")
+                if ev in ("subscribe", "unsubscribe"):
+                    for p in msg.get("payload", [])[:1]:
+                        if ev == "subscribe":
+                            self.owner[p] = ws
+                        elif self.owner.get(p) is ws:
+                            del self.owner[p]
+                    await ws.send(json.dumps({"time": int(time.time()), "channel": msg.get("channel"), "event": ev,
+                                              "result": {"status": "success"}}))
+        finally:
+            for p in [p for p, w in self.owner.items() if w is ws]:
+                del self.owner[p]
+
+    def _send(self, batch: dict):
+        """ws -> [msg, ...] 를 연결마다 한 태스크로 순서대로 보낸다."""
+        for ws, msgs in batch.items():
+            if ws.open:
+                asyncio.ensure_future(self._send_all(ws, msgs))
+                self.m.stats["gate_sent"] += len(msgs)
+
+    @staticmethod
+    async def _send_all(ws, msgs):
+        try:
+            for msg in msgs:
+                await ws.send(json.dumps(msg))
+        except websockets.ConnectionClosed:
+            pass
+
+    async def synth_feed(self):
+        carry = 0.0
+        while True:
+            await asyncio.sleep(TICK_SEC)
+            live = [p for p in self.owner if p in self.m.mid]   # 폐지된 페어 구독은 보내지 않음
+            if not live:
+                continue
+            carry += self.rate * TICK_SEC
+            k, carry = int(carry), carry - int(carry)
+            now = time.time()
+            batch = {}
+            for _ in range(k):
+                p = self.m.rnd.choice(live)
+                batch.setdefault(self.owner[p], []).append(self.m.synth_msg(p, now))
+            self._send(batch)
+
+    async def replay_feed(self):
+        import recorder
+        while not self.owner:
+            await asyncio.sleep(0.1)
+        await asyncio.sleep(1.0)   # 나머지 샤드 구독 대기
+        t_first = wall0 = None
+        for ts, _, _, data in recorder.read(self.replay_dir, ("gate",)):
+            if t_first is None:
+                t_first, wall0 = ts, time.time()
+            lag = (ts - t_first) / self.speed - (time.time() - wall0)
+            if lag > 0:
+                await asyncio.sleep(lag)
+            msg = json.loads(str(data, "utf-8"))
+            res = msg.get("result")
+            pair = res.get("s") if isinstance(res, dict) else (res[0].get("s") if res else None)
+            if pair is None:
+                continue
+            if isinstance(res, dict) and "u" in res:
+                self.m.seq[pair] = int(res["u"])
+            msg["time_ms"] = int(time.time() * 1000)   # 지연 측정은 송신 시각 기준
+            ws = self.owner.get(pair)
+            if ws is not None:
+                self._send({ws: [msg]})
+
+    async def serve(self, port: int):
+        route = lambda r, w: _http_conn(r, w, self.route)
+        for host in HOSTS.values():
+            await asyncio.start_server(route, host, port)
+        await websockets.serve(self.ws_handler, HOSTS["gate"], port + 1, max_size=None, ping_interval=None)
+        print(json.dumps({"ready": True, "pairs": len(self.m.pairs), "env": service_env(port)}), flush=True)
+        await (self.replay_feed() if self.replay_dir else self.synth_feed())
+        await asyncio.Event().wait()
+
+def replay_pairs(dirpath: str) -> list:
+    import recorder
+    seen = {}
+    for _, _, _, data in recorder.read(dirpath, ("gate",)):
+        res = json.loads(str(data, "utf-8")).get("result")
+        p = res.get("s") if isinstance(res, dict) else (res[0].get("s") if res else None)
+        if p:
+            seen[p] = True
+    return list(seen)
+
+def main():
+    ap = argparse.ArgumentParser(description="local fake Bithumb/Gate/Telegram servers")
+    ap.add_argument("--pairs", type=int, default=300)
+    ap.add_argument("--rate", type=float, default=2000.0, help="Gate 전체 송신 msg/s(합성)")
+    ap.add_argument("--port", type=int, default=18080)
+    ap.add_argument("--replay", default=None, help="recorder 디렉터리의 Gate 원문 재전송")
+    ap.add_argument("--speed", type=float, default=1.0, help="--replay 배속")
+    ap.add_argument("--tg-delay", type=float, default=0.05, help="텔레그램 응답 지연(초)")
+    a = ap.parse_args()
+    market = FakeMarket(a.pairs, pairs=replay_pairs(a.replay) if a.replay else None)
+    ex = FakeExchange(market, a.rate, a.tg_delay, a.replay, a.speed)
+    try:
+        asyncio.run(ex.serve(a.port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+# bithumb_stream.py — 빗썸 웹소켓(ticker / orderbookdepth / transaction) 수집
+#
+# gate_stream 과 같은 구조: 모듈 싱글턴 STATE 에 심볼별 틱커/로컬 호가/체결률을 유지한다.
+# 스캔 엔진은 여기서 가격·24h 거래대금·호가 불균형을 읽고, 값이 없거나 오래됐을 때만 REST 로 내려간다.
+#
+# orderbookdepth 는 레벨 절대 수량 diff(0 = 삭제)만 오므로 REST 호가로 한 번 시드한 뒤
+# 스냅샷 시각 이후 diff 를 이어 붙인다. 다시 시드하는 것은 호가가 틀렸을 때뿐이다:
+# diff 시각 역전, 교차 호가, BITHUMB_STREAM_MAX_AGE 넘게 끊겼다 다시 온 diff, 재접속.
+
+import asyncio, json, random, time
+import websockets
+
+from config import (
+    BITHUMB_BASE, BITHUMB_WS, BITHUMB_STREAM_MAX_AGE,
+    GATE_WS_BACKOFF_BASE, GATE_WS_BACKOFF_MAX, GATE_WS_STALL_SEC
+)
+from gate_stream import RateWindow, TRADE_WINDOW_SEC
+from l2book import BookSide
+import http_pool
+import recorder
+from metrics import INGEST_MSGS, INGEST_DECODE, INGEST_LAG, collector
+
+DEPTH_LEVELS = 10          # orderbook_ratio 계산 레벨(REST 경로와 동일)
+SEED_CONCURRENCY = 5
+SUB_CHUNK = 100            # 구독 메시지당 심볼 수
+
+def _now(): return time.time()
+
+class SymBook:
+    __slots__ = ("bids", "asks", "seeded_at", "buffer", "ts", "dt")
+
+    def __init__(self):
+        self.bids = BookSide(True)
+        self.asks = BookSide(False)
+        self.seeded_at = 0.0
+        self.buffer = []     # 시드 전 diff: (datetime_us, side, price, qty)
+        self.ts = 0.0
+        self.dt = 0          # 마지막으로 적용한 diff 의 datetime(µs)
+
+    def apply(self, side: str, price: float, qty: float):
+        (self.bids if side == "bid" else self.asks).set(price, qty)
+
+    def ratio(self, n: int = DEPTH_LEVELS) -> float:
+        ask = self.asks.depth(n)
+        return (self.bids.depth(n) / ask) if ask > 0 else 0.0
+
+class BithumbState:
+    def __init__(self):
+        self.ticker = {}     # sym -> {"price","value","ts"}
+        self.books = {}      # sym -> SymBook
+        self.trades = {}     # sym -> RateWindow
+        self.symbols = []
+        self.seeding = set()
+        self.dropped = set() # 구독 목록에서 빠진 심볼 — 구독 해제가 없으므로 수신분을 버린다
+        self.reseeds = 0
+        self.connected = False
+        self.msgs = 0
+        self.last_msg = 0.0
+        self.reconnects = 0
+        self.last_error = None
+        self.listeners = []  # 갱신 콜백 fn(sym, now) — 실시간 알림 감지 등
+        self.ws = None
+        self.loop = None
+
+STATE = BithumbState()
+
+# ===== 조회(스캔 엔진용) =====
+def live_ticker(sym: str, max_age: float = BITHUMB_STREAM_MAX_AGE):
+    t = STATE.ticker.get(sym)
+    if t and _now() - t["ts"] <= max_age:
+        return t["price"], t["value"]
+    return None
+
+def live_ob_ratio(sym: str, max_age: float = BITHUMB_STREAM_MAX_AGE):
+    b = STATE.books.get(sym)
+    if b and b.seeded_at and _now() - max(b.ts, b.seeded_at) <= max_age and len(b.asks):
+        return b.ratio()
+    return None
+
+def live_usdt_price(max_age: float = BITHUMB_STREAM_MAX_AGE) -> float:
+    t = live_ticker("USDT", max_age)
+    return t[0] if t else 0.0
+
+def fresh(max_age: float = BITHUMB_STREAM_MAX_AGE) -> bool:
+    return STATE.connected and (_now() - STATE.last_msg) <= max_age and live_usdt_price(max_age) > 0
+
+# ===== 메시지 처리 =====
+def on_ticker(c: dict, now: float):
+    sym = (c.get("symbol") or "").replace("_KRW", "")
+    if sym in STATE.dropped:
+        return
+    try:
+        price = float(c.get("closePrice") or 0)
+        value = float(c.get("value") or 0)
+    except (TypeError, ValueError):
+        return
+    if sym and price > 0:
+        STATE.ticker[sym] = {"price": price, "value": value, "ts": now}
+
+def on_depth(content: dict, now: float):
+    dt = int(content.get("datetime") or 0)
+    touched = set()
+    for lv in content.get("list", []):
+        sym = (lv.get("symbol") or "").replace("_KRW", "")
+        if sym in STATE.dropped:
+            continue
+        b = STATE.books.get(sym)
+        if b is None:
+            b = STATE.books[sym] = SymBook()
+        if b.seeded_at and (dt < b.dt or now - max(b.ts, b.seeded_at) > BITHUMB_STREAM_MAX_AGE):
+            _invalidate(b)   # 순서가 뒤집혔거나 오래 끊겼던 호가 → 사이 diff 를 놓쳤을 수 있다
+        side, price, qty = lv.get("orderType"), float(lv.get("price") or 0), float(lv.get("quantity") or 0)
+        if not b.seeded_at:
+            b.buffer.append((dt, side, price, qty))
+            if len(b.buffer) > 5000:
+                del b.buffer[:1000]   # 시드가 계속 실패하는 경우 메모리 상한
+        else:
+            b.apply(side, price, qty)
+            b.ts, b.dt = now, dt
+        touched.add(sym)
+    for sym in touched:
+        b = STATE.books[sym]
+        if b.seeded_at and len(b.bids) and len(b.asks) and b.bids.best() >= b.asks.best():
+            _invalidate(b)   # 교차 호가
+        if not b.seeded_at:
+            _request_seed(sym)
+
+def _invalidate(b: SymBook):
+    # 다시 시드될 때까지 diff 는 버퍼로, 조회(live_ob_ratio)는 REST 로 내려간다
+    b.seeded_at = 0.0
+    b.buffer = []
+    STATE.reseeds += 1
+
+def on_transaction(content: dict, now: float):
+    for t in content.get("list", []):
+        sym = (t.get("symbol") or "").replace("_KRW", "")
+        if sym in STATE.dropped:
+            continue
+        w = STATE.trades.get(sym)
+        if w is None:
+            w = STATE.trades[sym] = RateWindow()
+        w.add(now, float(t.get("contQty") or 0))
+        w.expire(now - TRADE_WINDOW_SEC)
+        tk = STATE.ticker.get(sym)
+        if tk is not None:
+            # 체결가로 가격을 더 자주 갱신(거래대금은 틱커 값 유지)
+            tk["price"] = float(t.get("contPrice") or tk["price"])
+            tk["ts"] = now
+
+def handle(msg: dict, now: float):
+    typ = msg.get("type")
+    content = msg.get("content") or {}
+    if typ == "ticker":
+        on_ticker(content, now)
+        syms = [content.get("symbol") or ""]
+    elif typ == "orderbookdepth":
+        on_depth(content, now)
+        syms = {lv.get("symbol") or "" for lv in content.get("list", [])}
+    elif typ == "transaction":
+        on_transaction(content, now)
+        syms = {t.get("symbol") or "" for t in content.get("list", [])}
+    else:
+        return
+    if STATE.listeners:
+        for s in syms:
+            s = s.replace("_KRW", "")
+            if s in STATE.dropped:
+                continue
+            for fn in STATE.listeners:
+                fn(s, now)
+
+# ===== 호가 시드(REST) =====
+_seed_sem = None
+
+async def _seed(sym: str):
+    try:
+        async with _seed_sem:
+            data = await http_pool.get_json(f"{BITHUMB_BASE}/public/orderbook/{sym}_KRW")
+        book = data.get("data") or {}
+        b = STATE.books.get(sym) or SymBook()
+        b.bids.load((x["price"], x["quantity"]) for x in book.get("bids", []) if isinstance(x, dict))
+        b.asks.load((x["price"], x["quantity"]) for x in book.get("asks", []) if isinstance(x, dict))
+        snap_us = int(book.get("timestamp") or 0) * 1000
+        pending, b.buffer = b.buffer, []
+        b.dt = snap_us
+        for dt, side, price, qty in pending:
+            if dt >= snap_us:
+                b.apply(side, price, qty)
+                b.dt = max(b.dt, dt)
+        b.seeded_at = b.ts = _now()
+        STATE.books[sym] = b
+    except Exception:
+        await asyncio.sleep(1.0)
+    finally:
+        STATE.seeding.discard(sym)
+
+def _request_seed(sym: str):
+    if sym not in STATE.seeding:
+        STATE.seeding.add(sym)
+        asyncio.get_running_loop().create_task(_seed(sym))
+
+# ===== 연결 =====
+async def _subscribe(ws, symbols):
+    # 구독 메시지는 연결 안에서 누적된다 — 심볼 추가는 메시지만 더 보내면 된다
+    ticks = [f"{s}_KRW" for s in symbols]
+    books = [f"{s}_KRW" for s in symbols if s != "USDT"]
+    for i in range(0, len(ticks), SUB_CHUNK):
+        await ws.send(json.dumps({"type": "ticker", "symbols": ticks[i:i + SUB_CHUNK], "tickTypes": ["24H"]}))
+    for i in range(0, len(books), SUB_CHUNK):
+        await ws.send(json.dumps({"type": "orderbookdepth", "symbols": books[i:i + SUB_CHUNK]}))
+        await ws.send(json.dumps({"type": "transaction", "symbols": books[i:i + SUB_CHUNK]}))
+
+async def _consumer(symbols):
+    async with websockets.connect(BITHUMB_WS, ping_interval=20, ping_timeout=10) as ws:
+        STATE.ws = ws
+        # 재연결 동안 놓친 diff 가 있으므로 모든 호가를 다시 시드
+        for b in STATE.books.values():
+            b.seeded_at = 0.0
+        await _subscribe(ws, symbols)
+        STATE.connected = True
+        rec = recorder.get("bithumb")
+        while True:
+            raw = await asyncio.wait_for(ws.recv(), timeout=GATE_WS_STALL_SEC)
+            t0 = time.perf_counter()
+            msg = json.loads(raw)
+            now = _now()
+            if rec:
+                rec.write(recorder.KIND_BITHUMB_WS, "", raw, now)
+            STATE.msgs += 1
+            STATE.last_msg = now
+            handle(msg, now)
+            INGEST_MSGS.inc(source="bithumb")
+            INGEST_DECODE.observe(time.perf_counter() - t0, source="bithumb")
+            dt = (msg.get("content") or {}).get("datetime")   # orderbookdepth: µs
+            if dt:
+                INGEST_LAG.observe(max(0.0, now - int(dt) / 1e6), source="bithumb")
+
+async def run_stream(symbols):
+    global _seed_sem
+    STATE.symbols = sorted(set(symbols) | {"USDT"})
+    STATE.loop = asyncio.get_running_loop()
+    _seed_sem = asyncio.Semaphore(SEED_CONCURRENCY)
+    attempt = 0
+    while True:
+        seen = STATE.msgs
+        try:
+            await _consumer(STATE.symbols)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            STATE.last_error = f"{type(e).__name__}: {e}"
+        STATE.connected = False
+        STATE.ws = None
+        STATE.reconnects += 1
+        attempt = 0 if STATE.msgs > seen else attempt + 1
+        delay = min(GATE_WS_BACKOFF_MAX, GATE_WS_BACKOFF_BASE * (2 ** attempt))
+        await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+
+# ===== 구독 심볼 교체 =====
+async def _resubscribe(symbols):
+    old, keep = set(STATE.symbols), set(symbols)
+    for d in (STATE.ticker, STATE.books, STATE.trades):
+        for sym in [s for s in d if s not in keep]:
+            del d[sym]
+    STATE.dropped = (STATE.dropped | (old - keep)) - keep
+    STATE.symbols = symbols
+    added = [s for s in symbols if s not in old]
+    if STATE.ws is not None and added:
+        await _subscribe(STATE.ws, added)   # 기존 연결·호가·시드는 그대로, 새 심볼만 시드
+
+def update_symbols(symbols):
+    """다른 스레드에서 호출. 목록이 바뀌었을 때만 재구독한다."""
+    symbols = sorted(set(symbols) | {"USDT"})
+    if symbols == STATE.symbols:
+        return None
+    if STATE.loop is None:
+        STATE.symbols = symbols
+        return None
+    return asyncio.run_coroutine_threadsafe(_resubscribe(symbols), STATE.loop)
+
+@collector
+def _metrics():
+    now = _now()
+    return [
+        ("scanner_bithumb_book_age_seconds", "gauge", "seconds since the symbol's local book changed",
+         [({"symbol": s}, now - max(b.ts, b.seeded_at)) for s, b in list(STATE.books.items()) if b.seeded_at]),
+        ("scanner_bithumb_ws_connected", "gauge", "1 if the Bithumb websocket is connected", [({}, float(STATE.connected))]),
+    ]
+
+def health() -> dict:
+    return {
+        "connected": STATE.connected, "symbols": len(STATE.symbols), "msgs": STATE.msgs,
+        "last_msg_age": None if not STATE.last_msg else round(_now() - STATE.last_msg, 2),
+        "tickers": len(STATE.ticker), "books_seeded": sum(1 for b in STATE.books.values() if b.seeded_at),
+        "reseeds": STATE.reseeds, "reconnects": STATE.reconnects, "last_error": STATE.last_error
+    }
@@ -0,0 +1,116 @@
+# candle_store.py — 심볼별 1h 봉 캐시 (봉 시작 시각 기준 증분 갱신 + LRU 퇴출)
+#
+# 1h 봉은 진행 중인 마지막 봉을 빼면 한 시간에 한 번만 바뀐다. 처음 한 번만 전체 이력을
+# 받고, 이후에는 최근 2개 봉(직전 확정봉 + 진행봉)만 받아 시작 시각 기준으로 병합한다.
+# 행 형식은 빗썸 candlestick API 와 같다: [open_ms, open, close, high, low, volume]
+# 심볼마다 indicators.RollingIndicators 를 같이 갱신해 압축도/거래량 급증을 O(1) 로 읽는다.
+
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from config import BITHUMB_BASE, CANDLE_CACHE_SIZE
+from indicators import RollingIndicators
+import http_pool
+
+KEEP_BARS = 140
+
+async def fetch_full(sym: str) -> list:
+    data = await http_pool.get_json(f"{BITHUMB_BASE}/public/candlestick/{sym}_KRW/1h")
+    if data.get("status") != "0000":
+        return []
+    return data.get("data", [])[-KEEP_BARS:]
+
+def v1_row(c: dict) -> list:
+    ts = datetime.fromisoformat(c["candle_date_time_utc"]).replace(tzinfo=timezone.utc)
+    return [
+        int(ts.timestamp() * 1000), float(c["opening_price"]), float(c["trade_price"]),
+        float(c["high_price"]), float(c["low_price"]), float(c["candle_acc_trade_volume"])
+    ]
+
+async def fetch_recent(sym: str, count: int = 2) -> list:
+    """v1 분봉 API — 필요한 개수만 받는다(최신이 앞). 시작 시각 오름차순으로 반환."""
+    data = await http_pool.get_json(
+        f"{BITHUMB_BASE}/v1/candles/minutes/60", params={"market": f"KRW-{sym}", "count": count}
+    )
+    if not isinstance(data, list):
+        return []
+    return sorted((v1_row(c) for c in data), key=lambda r: r[0])
+
+class CandleStore:
+    def __init__(self, capacity: int = CANDLE_CACHE_SIZE):
+        self.capacity = capacity
+        self._bars = OrderedDict()   # sym -> [row, ...] 시작 시각 오름차순, 마지막 = 진행봉
+        self._ind = {}               # sym -> RollingIndicators
+        self.stats = {"full": 0, "incremental": 0, "evicted": 0, "fallback": 0}
+
+    def __contains__(self, sym):
+        return sym in self._bars
+
+    def __len__(self):
+        return len(self._bars)
+
+    def _touch(self, sym: str, bars: list):
+        self._bars[sym] = bars
+        self._bars.move_to_end(sym)
+        while len(self._bars) > self.capacity:
+            old, _ = self._bars.popitem(last=False)   # 가장 오래 안 쓰인 심볼(상위권 이탈)부터
+            self._ind.pop(old, None)
+            self.stats["evicted"] += 1
+
+    @staticmethod
+    def merge(bars: list, recent: list, ind: RollingIndicators | None = None) -> bool:
+        """recent 를 bars(와 ind) 에 반영. 중간 봉이 빠졌으면 False(전체 재로딩 필요)."""
+        if not recent or not bars:
+            return False
+        last_ts = int(bars[-1][0])
+        if int(recent[0][0]) > last_ts:
+            return False   # 캐시의 진행봉 확정값을 못 받음 → 이력 구멍
+        for row in recent:
+            ts = int(row[0])
+            if ts > int(bars[-1][0]):
+                bars.append(row)           # 새 봉 시작
+                if ind is not None:
+                    ind.push(float(row[2]), float(row[5]))
+            else:
+                for back in range(1, min(3, len(bars)) + 1):
+                    if int(bars[-back][0]) == ts:
+                        bars[-back] = row  # 진행봉/직전봉 값 갱신
+                        if ind is not None:
+                            ind.set_bar(back, float(row[2]), float(row[5]))
+                        break
+        del bars[:-KEEP_BARS]
+        return True
+
+    async def get(self, sym: str) -> list:
+        bars = self._bars.get(sym)
+        if bars:
+            try:
+                recent = await fetch_recent(sym)
+                if self.merge(bars, recent, self._ind.get(sym)):
+                    self.stats["incremental"] += 1
+                    self._touch(sym, bars)
+                    return bars
+            except Exception:
+                self.stats["fallback"] += 1
+        bars = list(await fetch_full(sym))
+        self.stats["full"] += 1
+        if bars:
+            rows = [c for c in bars if isinstance(c, (list, tuple)) and len(c) >= 6]
+            ind = self._ind.get(sym) or RollingIndicators()
+            ind.reset([float(c[2]) for c in rows], [float(c[5]) for c in rows])
+            self._ind[sym] = ind
+            self._touch(sym, bars)
+        return bars
+
+    def features(self, sym: str) -> tuple[float, float]:
+        """(ma_compression, vol_surge) — 캐시에 없으면 빈 봉과 같은 값"""
+        ind = self._ind.get(sym)
+        if ind is None:
+            return 1.0, 0.0
+        return ind.compression(), ind.vol_surge()
+
+    def drop(self, sym: str):
+        self._bars.pop(sym, None)
+        self._ind.pop(sym, None)
+
+CANDLES = CandleStore()
@@ -1,30 +1,103 @@
 import os
+from urllib.parse import urlparse
 
 # ===== 최적 효율(단기 폭등 전용) 파라미터 =====
 TOP_N_BY_VALUE = 30          # 24H 거래대금 상위만 정밀 검사
+SCAN_LEAD_EXTRA = 20         # + Gate 리드 상위 N개도 정밀 검사(소형 급등 후보)
 PREMIUM_MIN = 0.008          # +0.8% 이상
 ORDERBOOK_IMBAL_RATIO = 1.5  # 매수벽/매도벽
 VOLUME_SURGE_RATIO = 5.0     # 최근 1시간 / 직전 5시간평균 (강화)
 MA_COMPRESSION_MAX = 0.05    # 1h MA20·60·120 압축 (완화: 장대양봉 직전 허용)
 
+# 1h 봉 캐시 최대 심볼 수(LRU) — 상위권 이탈 심볼부터 퇴출
+CANDLE_CACHE_SIZE = 100
+
 # 리드 신호 민감도
 LEAD_THRESH_BASE = 0.9       # 조기 감지 강화를 위해 하향
 
+# 백그라운드 스캔 주기(초) — /scan 은 최신 스냅샷만 읽음
+SCAN_INTERVAL_SEC = 8
+
 # 빗썸 폴링 부스트 윈도(초) — Gate 임계치 진입 시
 BOOST_WINDOW_SEC = 30        # 30초 동안 1초 폴링 유지
+BOOST_POLL_SEC = 1           # 부스트 심볼 폴링 간격
+BOOST_MAX_SYMBOLS = 10       # 동시에 부스트할 최대 심볼 수(리드 순)
 
 # 텔레그램 알림: 같은 코인 재알림 쿨다운(초)
 ALERT_COOLDOWN_SEC = 120     # 단축
 
-# 환경
-BITHUMB_BASE = "https://api.bithumb.com"
-GATE_REST = "https://api.gateio.ws/api/v4"
-GATE_WS = "wss://api.gateio.ws/ws/v4/"
+# 실시간 알림 감지: Gate/빗썸 틱마다 해당 심볼만 재평가
+ALERT_DETECTOR_ENABLED = os.getenv("ALERT_DETECTOR", "1") == "1"
+ALERT_POLL_SEC = 0.25        # process 모드(틱 콜백 없음)에서 전체 재평가 주기
+TELEGRAM_OUTBOX_MAX = 100    # 발송 대기 큐 상한 — 넘치면 가장 오래된 알림부터 버림
+TELEGRAM_OUTBOX_WORKERS = 2  # 동시 발송 수(HTTP_HOST_LIMITS 의 텔레그램 동시성과 맞춤)
+
+# 환경(벤치마크/스테이징은 환경변수로 가짜 서버를 가리킬 수 있음 — bench/fake_exchange.py)
+BITHUMB_BASE = os.getenv("BITHUMB_BASE", "https://api.bithumb.com")
+BITHUMB_WS = os.getenv("BITHUMB_WS", "wss://pubwss.bithumb.com/pub/ws")
+GATE_REST = os.getenv("GATE_REST", "https://api.gateio.ws/api/v4")
+GATE_WS = os.getenv("GATE_WS", "wss://api.gateio.ws/ws/v4/")
+TELEGRAM_API = os.getenv("TELEGRAM_API", "https://api.telegram.org")
+
+# HTTP 풀: 호스트별 (초당 요청, 버스트, 최대 동시성) — 429/5xx 시 동시성 자동 축소
+HTTP_MAX_CONNECTIONS = 32
+HTTP_DEFAULT_LIMIT = (10.0, 10, 8)
+HTTP_HOST_LIMITS = {
+    urlparse(BITHUMB_BASE).hostname: (40.0, 40, 16),
+    urlparse(GATE_REST).hostname: (10.0, 10, 8),
+    urlparse(TELEGRAM_API).hostname: (5.0, 5, 2),
+}
+
+# Gate 웹소켓 샤딩: 연결당 페어 수, 재접속 백오프(초), 무수신 시 재접속(초)
+GATE_WS_PAIRS_PER_SHARD = 40
+GATE_WS_BACKOFF_BASE = 1.0
+GATE_WS_BACKOFF_MAX = 30.0
+GATE_WS_STALL_SEC = 30.0
+
+# 빗썸 웹소켓: 틱커/호가를 실시간 상태로 유지, REST 는 폴백
+BITHUMB_STREAM_ENABLED = os.getenv("BITHUMB_STREAM", "1") == "1"
+BITHUMB_STREAM_MAX_AGE = 10.0    # 이보다 오래된 실시간 값은 버리고 REST 사용(초)
+BITHUMB_ALL_REFRESH_SEC = 60     # 스트림 정상 시 ALL_KRW(미매핑 심볼 포함 전체 목록) 갱신 주기
+
+# Gate 수집 실행 방식: thread(Flask 프로세스 내 스레드) | process(별도 프로세스 + 공유 메모리)
+GATE_INGEST_MODE = os.getenv("GATE_INGEST_MODE", "thread")
+SHM_CAPACITY = 4096          # 공유 메모리 테이블 최대 페어 수
+
+# 원본 시세 기록(빈 값이면 끔): 웹소켓 원문 + REST 응답을 세그먼트 파일로 — replay.py 로 재생
+RECORD_DIR = os.getenv("RECORD_DIR", "")
+RECORD_BLOCK_BYTES = 256 * 1024      # 압축 블록 크기(원문 기준)
+RECORD_FLUSH_SEC = 1.0               # 블록이 덜 찼어도 이 시간이 지나면 기록
+RECORD_SEGMENT_SEC = 3600            # 세그먼트 파일 교체 주기
+RECORD_SEGMENT_BYTES = 256 * 1024 * 1024
+
+# 페어별 지표/점수 이력 링버퍼(/history/<symbol>): 해상도(초), 보관 구간(초), 최대 심볼 수
+# HISTORY_FILE 을 주면 memmap 파일로 유지(재기동 후에도 최근 이력 보존), 빈 값이면 메모리만
+HISTORY_RES_SEC = 1.0
+HISTORY_SEC = int(os.getenv("HISTORY_SEC", "600"))
+HISTORY_CAPACITY = 1024
+HISTORY_FILE = os.getenv("HISTORY_FILE", "")
+
+# 샘플링 프로파일러(0 = 끔): 초당 스택 샘플 수 — /debug/profile
+PROFILE_HZ = float(os.getenv("PROFILE_HZ", "0"))
+
+# /scan/stream(SSE) 구독자 상한(워커당, 0 = 무제한): 구독자 1명이 연결 내내 스레드 하나를 잡으므로
+# 넘치면 503 으로 돌려보내 /scan 등 일반 요청용 스레드를 남긴다(gunicorn 은 GUNICORN_THREADS 보다 작게)
+SSE_MAX_VIEWERS = int(os.getenv("SSE_MAX_VIEWERS", "32"))
 
 # 텔레그램
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID", "")
 
+# 빗썸↔Gate 심볼 매핑 디스크 캐시: 기동 시 바로 사용, TTL 이 지나면 백그라운드에서 다시 받아 증분 (해제)구독
+SYMBOL_MAP_CACHE = os.getenv("SYMBOL_MAP_CACHE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "symbol_map.json"))
+SYMBOL_MAP_TTL_SEC = float(os.getenv("SYMBOL_MAP_TTL_SEC", "600"))
+
+# 다중 워커(gunicorn 등): 같은 SQLite 파일을 가리키면 flock 을 잡은 워커 하나만 수집/스캔/알림(리더),
+# 나머지는 저장소에서 스냅샷을 읽어 응답만 한다(팔로워). 빈 값이면 단일 프로세스 동작
+SHARED_STORE = os.getenv("SHARED_STORE", "")
+SHARED_POLL_SEC = 0.2        # 팔로워: 스냅샷 버전 확인 + 리더 락 재시도 주기
+SHARED_PUBLISH_SEC = 2.0     # 리더: /health·/metrics·심볼 매핑 게시 주기(스냅샷은 발행 즉시)
+
 # 수동 심볼 매핑 예외(이름 불일치 보정)
 MANUAL_SYMBOL_MAP = {
     # 필요 시 여기에 추가
@@ -1,66 +1,553 @@
-import asyncio, json, time
-from collections import deque, defaultdict
+import asyncio, heapq, json, random, time
+from array import array
+from collections import defaultdict
+from collections.abc import Mapping
 import websockets
-from config import GATE_WS
+from config import (
+    GATE_WS, GATE_REST, GATE_WS_PAIRS_PER_SHARD,
+    GATE_WS_BACKOFF_BASE, GATE_WS_BACKOFF_MAX, GATE_WS_STALL_SEC
+)
+from l2book import LocalBook
+from market_stats import RankedValues
+import http_pool
+import recorder
+from metrics import INGEST_MSGS, INGEST_DECODE, INGEST_LAG, collector
+
+TRADE_WINDOW_SEC = 1.0
+TRADE_SWEEP_SEC = 0.25   # 체결 없는 페어의 만료 주기
+SNAPSHOT_LIMIT = 100     # REST 스냅샷 깊이
+SNAPSHOT_CONCURRENCY = 5 # 동시 스냅샷 요청 수
+DEPTH_LEVELS = 10        # depth_ratio 계산 레벨
+
+class RateWindow:
+    """슬라이딩 윈도 체결 수/거래량 — 러닝 합계를 유지해 체결당 O(1) 분할상환.
+    (시각, 수량)을 고정 크기 array('d') 링에 보관 → 체결마다 튜플/float 객체를 만들지 않는다."""
+    __slots__ = ("ts", "sz", "head", "n", "vol", "maxlen")
+
+    def __init__(self, maxlen: int = 200):
+        self.ts = array("d", bytes(8 * maxlen))
+        self.sz = array("d", bytes(8 * maxlen))
+        self.head = 0    # 가장 오래된 항목 위치
+        self.n = 0
+        self.vol = 0.0
+        self.maxlen = maxlen
+
+    def add(self, ts: float, sz: float):
+        if self.n >= self.maxlen:
+            self.vol -= self.sz[self.head]
+            self.head = (self.head + 1) % self.maxlen
+            self.n -= 1
+        i = (self.head + self.n) % self.maxlen
+        self.ts[i] = ts
+        self.sz[i] = sz
+        self.n += 1
+        self.vol += sz
+
+    def oldest(self) -> float:
+        return self.ts[self.head] if self.n else 0.0
+
+    def expire(self, cutoff: float):
+        ts, sz, maxlen = self.ts, self.sz, self.maxlen
+        while self.n and ts[self.head] < cutoff:
+            self.vol -= sz[self.head]
+            self.head = (self.head + 1) % maxlen
+            self.n -= 1
+        if not self.n:
+            self.vol = 0.0   # 부동소수 누적 오차 리셋
+
+    def __len__(self):
+        return self.n
+
+class Shard:
+    """웹소켓 연결 1개 = 샤드 1개. 연결/소비 태스크와 건강 지표를 따로 가진다."""
+    def __init__(self, sid: int, pairs):
+        self.id = sid
+        self.pairs = list(pairs)
+        self.connected = False
+        self.msgs = 0
+        self.rate = 0.0          # msg/s (1초 창 EWMA)
+        self.lag = 0.0           # 수신 시각 - 거래소 이벤트 시각(초, EWMA)
+        self.last_msg = 0.0
+        self.reconnects = 0
+        self.last_error = None
+        self.ws = None           # 연결 중인 웹소켓(증분 구독용)
+        self.task = None
+        self._win_start = 0.0
+        self._win_count = 0
+
+    def on_msg(self, now: float, event_ms):
+        self.msgs += 1
+        self.last_msg = now
+        self._win_count += 1
+        if now - self._win_start >= 1.0:
+            inst = self._win_count / (now - self._win_start) if self._win_start else 0.0
+            self.rate = 0.7*self.rate + 0.3*inst if self.rate else inst
+            self._win_start, self._win_count = now, 0
+        if event_ms:
+            self.lag = 0.9*self.lag + 0.1*max(0.0, now - event_ms / 1000.0)
+
+    def health(self) -> dict:
+        now = _now()
+        rate = self.rate if (now - self.last_msg) < 2.0 else 0.0   # 수신 끊긴 샤드는 0
+        return {
+            "id": self.id, "pairs": len(self.pairs), "connected": self.connected,
+            "msgs": self.msgs, "msg_rate": round(rate, 1), "lag_ms": round(self.lag * 1000, 1),
+            "last_msg_age": None if not self.last_msg else round(now - self.last_msg, 2),
+            "reconnects": self.reconnects, "last_error": self.last_error
+        }
+
+# ===== 페어별 상태(제자리 갱신) =====
+BOOK_FIELDS = ("best_bid", "best_ask", "depth_ratio", "ts")
+METRIC_FIELDS = ("OFI", "trades_ps", "vol_ps", "dba")
+
+class PairState:
+    """페어 1개의 호가 요약 + 지표 + 체결 윈도. 갱신마다 새 dict 를 만들지 않고 필드를 덮어쓴다.
+    읽는 쪽(indicators / batch_score / scan_engine)을 위해 dict 처럼 ps["OFI"], ps.get("ts") 를 지원."""
+    __slots__ = BOOK_FIELDS + METRIC_FIELDS + ("trades", "has_book", "has_metrics")
+
+    def __init__(self):
+        self.best_bid = self.best_ask = self.depth_ratio = self.ts = 0.0
+        self.OFI = self.trades_ps = self.vol_ps = self.dba = 0.0
+        self.trades = RateWindow()
+        self.has_book = False      # 양쪽 최우선 호가가 한 번이라도 공개됨
+        self.has_metrics = False
+
+    def __getitem__(self, k):
+        if k not in _FIELD_SET:
+            raise KeyError(k)
+        return getattr(self, k)
+
+    def __setitem__(self, k, v):
+        if k not in _FIELD_SET:
+            raise KeyError(k)
+        setattr(self, k, v)
+
+    def __contains__(self, k):
+        return k in _FIELD_SET
+
+    def get(self, k, default=None):
+        return getattr(self, k) if k in _FIELD_SET else default
+
+    def keys(self):
+        return BOOK_FIELDS + METRIC_FIELDS
+
+    def __iter__(self):
+        return iter(BOOK_FIELDS + METRIC_FIELDS)
+
+_FIELD_SET = frozenset(BOOK_FIELDS + METRIC_FIELDS)
+
+class _PairView(Mapping):
+    """STATE.book / STATE.metrics 의 dict 호환 읽기 뷰 — 값은 PairState 자체(복사 없음)."""
+    flag = ""
+    fields = ()
+
+    def __init__(self, table: dict):
+        self.t = table
+
+    def __getitem__(self, p):
+        ps = self.t.get(p)
+        if ps is None or not getattr(ps, self.flag):
+            raise KeyError(p)
+        return ps
+
+    def get(self, p, default=None):
+        ps = self.t.get(p)
+        return ps if ps is not None and getattr(ps, self.flag) else default
+
+    def __contains__(self, p):
+        ps = self.t.get(p)
+        return ps is not None and getattr(ps, self.flag)
+
+    def __iter__(self):
+        flag = self.flag
+        return iter([p for p, ps in self.t.items() if getattr(ps, flag)])
+
+    def __len__(self):
+        flag = self.flag
+        return sum(1 for ps in self.t.values() if getattr(ps, flag))
+
+    def values(self):
+        flag = self.flag
+        return [ps for ps in self.t.values() if getattr(ps, flag)]
+
+    def items(self):
+        flag = self.flag
+        return [(p, ps) for p, ps in self.t.items() if getattr(ps, flag)]
+
+    def __setitem__(self, p, d):
+        """벤치/재생 도구용: dict 로 값을 채운다(주어지지 않은 필드는 유지)."""
+        ps = self.t.get(p)
+        if ps is None:
+            ps = self.t[p] = PairState()
+        for k in self.fields:
+            if k in d:
+                setattr(ps, k, d[k])
+        setattr(ps, self.flag, True)
+
+class BookView(_PairView):
+    flag = "has_book"
+    fields = BOOK_FIELDS
+
+class MetricsView(_PairView):
+    flag = "has_metrics"
+    fields = METRIC_FIELDS
 
 class GateState:
     def __init__(self):
-        self.book = {}
-        self.metrics = {}
-        self.trades_q = defaultdict(lambda: deque(maxlen=200))
+        self.table = {}                        # pair -> PairState
+        self.book = BookView(self.table)       # 프로세스 모드에서는 공유 메모리 뷰로 교체
+        self.metrics = MetricsView(self.table)
+        self.l2 = defaultdict(LocalBook)   # 페어별 로컬 L2 호가창
+        self.syncing = set()               # 스냅샷 요청 중인 페어
+        self.resyncs = 0
+        self.resumed = 0      # 재접속 후 첫 diff 가 이어져 재동기화 없이 유지한 호가창 수
+        self.resuming = set() # 재접속 후 연속성 확인 대기 중인 페어
+        self.active = set()   # 윈도가 비어있지 않은 페어(스위퍼 대상)
         self.pairs = []
+        self.rank = {}        # pair -> STATE.pairs 내 순서(거래대금 순) — 스냅샷 요청 우선순위
+        self.shards = []
+        self.sink = None      # 갱신 페어 콜백(수집 프로세스 → 공유 메모리)
+        self.remote = None    # 프로세스 모드에서 샤드 상태 읽기
+        self.listeners = []   # 틱 콜백 fn(pair, now) — 실시간 알림 감지 등
+        self.dropped = set()  # 구독 해제된 페어(해제 직후 도착한 메시지 무시)
+        self.loop = None      # 스트림 이벤트 루프(다른 스레드에서 페어 교체 요청용)
+        self.vps = RankedValues()   # 지표가 있는 페어의 vol_ps 순서통계(시장 중앙값용)
+
+    def pair(self, p: str) -> PairState:
+        ps = self.table.get(p)
+        if ps is None:
+            ps = self.table[p] = PairState()
+        return ps
 
 STATE = GateState()
 
 def _now(): return time.time()
 
-def ofi_delta(bids, asks, prev):
-    best_bid = float(bids[0][0]) if bids else prev.get("best_bid", 0.0)
-    best_ask = float(asks[0][0]) if asks else prev.get("best_ask", 0.0)
-    ofi = (best_bid - prev.get("best_bid", best_bid)) - (best_ask - prev.get("best_ask", best_ask))
-    return ofi, best_bid, best_ask
+# ===== 로컬 L2 동기화 =====
+class SnapshotGate:
+    """동시 스냅샷 요청 상한. 자리가 나면 도착 순이 아니라 순위가 높은(숫자가 작은) 페어부터 넘긴다 —
+    STATE.pairs 가 거래대금 순이라 콜드 스타트/대량 재동기화 때 상위 심볼 호가가 먼저 선다."""
+
+    def __init__(self, n: int):
+        self.free = n
+        self._wait = []   # heap (rank, seq, future)
+        self._seq = 0
+
+    async def acquire(self, rank: int):
+        if self.free > 0 and not self._wait:
+            self.free -= 1
+            return
+        fut = asyncio.get_running_loop().create_future()
+        self._seq += 1
+        heapq.heappush(self._wait, (rank, self._seq, fut))
+        try:
+            await fut     # release() 가 자리를 넘겨준다
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                self.release()   # 넘겨받은 직후 취소됨 → 자리 반납
+            raise
+
+    def release(self):
+        while self._wait:
+            fut = heapq.heappop(self._wait)[2]
+            if not fut.done():   # 기다리다 취소된 요청은 건너뜀
+                fut.set_result(None)
+                return
+        self.free += 1
+
+_snap_sem = None
+
+async def _fetch_snapshot(p: str):
+    await _snap_sem.acquire(STATE.rank.get(p, len(STATE.rank)))
+    try:
+        return await http_pool.get_json(
+            f"{GATE_REST}/spot/order_book",
+            params={"currency_pair": p, "limit": SNAPSHOT_LIMIT, "with_id": "true"}, timeout=10.0
+        )
+    finally:
+        _snap_sem.release()
+
+async def _sync_book(p: str):
+    try:
+        for _ in range(3):
+            snap = await _fetch_snapshot(p)
+            if p in STATE.dropped:
+                return
+            lb = STATE.l2[p]
+            if lb.load_snapshot(snap["id"], snap.get("bids", []), snap.get("asks", [])):
+                _publish_book(p, lb, _now())
+                return
+            lb.reset()   # 버퍼와 스냅샷이 이어지지 않음 → 다시
+            STATE.resyncs += 1
+    except Exception:
+        await asyncio.sleep(1.0)   # 다음 diff 에서 재요청 — REST 폭주 방지
+        lb = STATE.l2.get(p)       # 그 사이 제거된 페어면 호가창을 되살리지 않는다
+        if lb is not None and p not in STATE.dropped:
+            lb.reset()
+    finally:
+        STATE.syncing.discard(p)
 
-async def _consumer():
+def _request_sync(p: str):
+    if p not in STATE.syncing:
+        STATE.syncing.add(p)
+        asyncio.get_running_loop().create_task(_sync_book(p))
+
+def _publish_book(p: str, lb: LocalBook, now: float):
+    bb, ba = lb.best_bid(), lb.best_ask()
+    if not (bb and ba):
+        return
+    ps = STATE.pair(p)
+    ofi = (bb - ps.best_bid) - (ba - ps.best_ask) if ps.has_book else 0.0
+    ps.best_bid, ps.best_ask, ps.depth_ratio, ps.ts = bb, ba, lb.depth_ratio(DEPTH_LEVELS), now
+    ps.OFI = 0.8*ps.OFI + 0.2*ofi
+    ps.dba = 0.8*ps.dba + 0.2*((ba - bb) / ba)
+    if not ps.has_metrics:
+        STATE.vps.set(p, ps.vol_ps)   # 체결 전이라도 지표 페어로 집계(기존 중앙값 정의와 동일)
+    ps.has_book = ps.has_metrics = True
+    _notify(p, now)
+
+def _notify(p: str, now: float):
+    if STATE.sink:
+        STATE.sink(p)
+    for fn in STATE.listeners:
+        fn(p, now)
+
+def on_book_update(res: dict, now: float):
+    p = res.get("s")
+    if p in STATE.dropped:
+        return
+    lb = STATE.l2[p]
+    if not lb.ready:
+        lb.apply(int(res.get("U", 0)), int(res.get("u", 0)), res.get("b", []), res.get("a", []))
+        _request_sync(p)
+        return
+    ok = lb.apply(int(res.get("U", 0)), int(res.get("u", 0)), res.get("b", []), res.get("a", []))
+    if STATE.resuming and p in STATE.resuming:
+        STATE.resuming.discard(p)
+        if ok:
+            STATE.resumed += 1   # 끊긴 사이 변경이 없었음 → 스냅샷 없이 그대로 사용
+    if not ok:
+        # 업데이트 ID 누락/교차 호가 → 버리고 재동기화
+        lb.reset()
+        STATE.resyncs += 1
+        _request_sync(p)
+        return
+    _publish_book(p, lb, now)
+
+def _sub_msgs(pairs, event: str = "subscribe") -> list:
     subs = []
-    for p in STATE.pairs:
+    for p in pairs:
         subs += [
-            {"channel":"spot.order_book_update","event":"subscribe","payload":[p, "100ms"]},
-            {"channel":"spot.trades","event":"subscribe","payload":[p]}
+            {"channel":"spot.order_book_update","event":event,"payload":[p, "100ms"]},
+            {"channel":"spot.trades","event":event,"payload":[p]}
         ]
+    return subs
+
+async def _consumer(shard: Shard):
     async with websockets.connect(GATE_WS, ping_interval=20, ping_timeout=10) as ws:
+        # ws 공개와 구독 목록 작성 사이에 await 가 없어야 set_pairs 의 증분 구독이 빠지지 않는다
+        shard.ws = ws
+        subs = _sub_msgs(shard.pairs)
+        # 재연결: 호가창을 바로 버리지 않는다. 업데이트 ID 는 연결과 무관하게 이어지므로 첫 diff 가
+        # 직전 id 에 이어지면 그대로 쓰고, 끊긴 사이 변경이 있었으면 apply() 가 누락을 잡아 그때 재동기화
+        for p in shard.pairs:
+            lb = STATE.l2.get(p)
+            if lb is not None and lb.ready:
+                STATE.resuming.add(p)
         for s in subs:
             await ws.send(json.dumps(s))
+        shard.connected = True
+        rec = recorder.get("gate")
         while True:
-            msg = json.loads(await ws.recv())
-            ch = msg.get("channel"); ev = msg.get("event")
-            if ch == "spot.order_book_update" and ev in ("update","all"):
-                res = msg.get("result", {})
-                p = res.get("s")
-                bids = res.get("b", []); asks = res.get("a", [])
-                prev = STATE.book.get(p, {})
-                ofi, bb, ba = ofi_delta(bids, asks, prev)
-                STATE.book[p] = {"best_bid": bb, "best_ask": ba, "ts": _now()}
-                dba = (ba - bb) / ba if ba else 0.0
-                m = STATE.metrics.get(p, {"OFI":0.0,"trades_ps":0.0,"vol_ps":0.0,"dba":0.0})
-                m["OFI"] = 0.8*m["OFI"] + 0.2*ofi
-                m["dba"] = 0.8*m["dba"] + 0.2*dba
-                STATE.metrics[p] = m
-            elif ch == "spot.trades" and ev == "update":
-                for t in msg.get("result", []):
-                    p = t["s"]; sz = float(t["q"]); ts = _now()
-                    STATE.trades_q[p].append((ts, sz))
-                for p, dq in list(STATE.trades_q.items()):
-                    cutoff = _now() - 1.0
-                    while dq and dq[0][0] < cutoff: dq.popleft()
-                    m = STATE.metrics.get(p, {"OFI":0.0,"trades_ps":0.0,"vol_ps":0.0,"dba":0.0})
-                    m["trades_ps"] = float(len(dq))
-                    m["vol_ps"] = float(sum(x[1] for x in dq))
-                    STATE.metrics[p] = m
+            # 무응답 샤드는 끊고 재연결(다른 샤드는 영향 없음)
+            raw = await asyncio.wait_for(ws.recv(), timeout=GATE_WS_STALL_SEC)
+            t0 = time.perf_counter()
+            msg = json.loads(raw)
+            now = _now()
+            if rec:
+                rec.write(recorder.KIND_GATE_WS, "", raw, now)
+            event_ms = msg.get("time_ms")
+            shard.on_msg(now, event_ms)
+            handle(msg, now)
+            INGEST_MSGS.inc(source="gate")
+            INGEST_DECODE.observe(time.perf_counter() - t0, source="gate")
+            if event_ms:
+                INGEST_LAG.observe(max(0.0, now - event_ms / 1000.0), source="gate")
 
-async def run_stream(pairs):
-    STATE.pairs = list(pairs)
+def handle(msg: dict, now: float):
+    ch = msg.get("channel"); ev = msg.get("event")
+    if ch == "spot.order_book_update" and ev in ("update","all"):
+        on_book_update(msg.get("result", {}), now)
+    elif ch == "spot.trades" and ev == "update":
+        on_trades(msg.get("result", []), now)
+
+async def _run_shard(shard: Shard):
+    attempt = 0
     while True:
+        seen = shard.msgs
         try:
-            await _consumer()
-        except Exception:
-            await asyncio.sleep(3)
+            await _consumer(shard)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            shard.last_error = f"{type(e).__name__}: {e}"
+        shard.connected = False
+        shard.ws = None
+        shard.reconnects += 1
+        attempt = 0 if shard.msgs > seen else attempt + 1   # 수신이 있었으면 백오프 초기화
+        delay = min(GATE_WS_BACKOFF_MAX, GATE_WS_BACKOFF_BASE * (2 ** attempt))
+        await asyncio.sleep(delay * random.uniform(0.5, 1.0))   # 지터로 동시 재접속 분산
+
+def make_shards(pairs, per_shard: int | None = None) -> list:
+    pairs = list(pairs)
+    per_shard = max(1, per_shard or GATE_WS_PAIRS_PER_SHARD)
+    return [Shard(i, pairs[j:j + per_shard]) for i, j in enumerate(range(0, len(pairs), per_shard))]
+
+def _refresh_rate(p: str, now: float):
+    ps = STATE.pair(p)
+    w = ps.trades
+    w.expire(now - TRADE_WINDOW_SEC)
+    ps.trades_ps = float(w.n)
+    ps.vol_ps = w.vol
+    ps.has_metrics = True
+    STATE.vps.set(p, w.vol)
+    _notify(p, now)
+    if w.n:
+        STATE.active.add(p)
+    else:
+        STATE.active.discard(p)
+
+def on_trades(trades, now: float):
+    # 메시지에 등장한 페어만 갱신 — 나머지는 스위퍼가 만료 처리
+    touched = set()
+    for t in trades:
+        p = t["s"]
+        if p in STATE.dropped:
+            continue
+        STATE.pair(p).trades.add(now, float(t["q"]))
+        touched.add(p)
+    for p in touched:
+        _refresh_rate(p, now)
+
+def sweep_rates(now: float):
+    cutoff = now - TRADE_WINDOW_SEC
+    table = STATE.table
+    for p in list(STATE.active):
+        if table[p].trades.oldest() < cutoff:
+            _refresh_rate(p, now)
+
+async def _rate_sweeper():
+    while True:
+        await asyncio.sleep(TRADE_SWEEP_SEC)
+        sweep_rates(_now())
+
+@collector
+def _metrics():
+    now = _now()
+    book = STATE.book
+    shards = shard_health()
+    mk = market_stats()
+    return [
+        ("scanner_market_vol_ps", "gauge", "market-wide Gate vol_ps quantiles (incrementally maintained)",
+         [({"q": q}, mk.get(k)) for q, k in (("0.25", "vps_p25"), ("0.5", "vps_median"), ("0.75", "vps_p75"))]),
+        ("scanner_gate_book_age_seconds", "gauge", "seconds since the pair's top of book was updated",
+         [({"pair": p}, now - b["ts"]) for p, b in ((p, book.get(p)) for p in STATE.pairs) if b]),
+        ("scanner_gate_shard_messages_total", "counter", "messages received per websocket shard",
+         [({"shard": sh["id"]}, sh["msgs"]) for sh in shards]),
+        ("scanner_gate_shard_msg_rate", "gauge", "messages per second per shard",
+         [({"shard": sh["id"]}, sh["msg_rate"]) for sh in shards]),
+        ("scanner_gate_shard_lag_seconds", "gauge", "receive minus event time per shard (EWMA)",
+         [({"shard": sh["id"]}, sh["lag_ms"] / 1000.0) for sh in shards]),
+        ("scanner_gate_shard_connected", "gauge", "1 if the shard websocket is connected",
+         [({"shard": sh["id"]}, float(sh["connected"])) for sh in shards]),
+        ("scanner_gate_resyncs_total", "counter", "local L2 book resyncs", [({}, STATE.resyncs)]),
+        ("scanner_gate_books_resumed_total", "counter", "books kept across a reconnect without a snapshot",
+         [({}, STATE.resumed)]),
+    ]
+
+def market_stats() -> dict:
+    """전 페어 vol_ps 분위수 — 증분 유지된 순서통계에서 읽기만 한다(프로세스 모드는 수집 쪽 값)"""
+    if STATE.remote is not None:
+        return STATE.remote.market()
+    v = STATE.vps
+    return {"pairs": len(v), "vps_p25": v.quantile(0.25), "vps_median": v.median(), "vps_p75": v.quantile(0.75)}
+
+def shard_health() -> list:
+    if STATE.remote is not None:
+        return STATE.remote.shard_health()
+    return [sh.health() for sh in STATE.shards]
+
+async def run_stream(pairs):
+    global _snap_sem
+    STATE.pairs = list(pairs)
+    STATE.rank = {p: i for i, p in enumerate(STATE.pairs)}
+    STATE.loop = asyncio.get_running_loop()
+    _snap_sem = SnapshotGate(SNAPSHOT_CONCURRENCY)
+    STATE.shards = make_shards(STATE.pairs)
+    for sh in STATE.shards:
+        sh.task = asyncio.create_task(_run_shard(sh))
+    await _rate_sweeper()
+
+# ===== 구독 페어 교체(상장/폐지 반영) =====
+async def _send_subs(shard: Shard, pairs, event: str):
+    ws = shard.ws
+    if ws is None:
+        return   # 미연결 — 다음 접속 때 shard.pairs 기준으로 구독
+    try:
+        for m in _sub_msgs(pairs, event):
+            await ws.send(json.dumps(m))
+    except Exception:
+        pass     # 끊긴 연결은 재접속 시 다시 구독
+
+def _drop_pair(p: str):
+    STATE.dropped.add(p)
+    STATE.table.pop(p, None)
+    STATE.l2.pop(p, None)
+    STATE.resuming.discard(p)
+    STATE.active.discard(p)
+    STATE.vps.discard(p)
+    if STATE.sink:
+        STATE.sink(p)   # 공유 메모리 행 비우기
+
+async def set_pairs(pairs) -> dict:
+    """구독 페어 교체 — 바뀐 페어만 (해제)구독하고, 남는 자리가 없으면 샤드를 새로 연다.
+    기존 연결은 끊지 않으므로 유지되는 페어의 호가창/지표는 그대로다. 스트림 루프에서 실행."""
+    new = list(dict.fromkeys(pairs))
+    want, cur = set(new), set(STATE.pairs)
+    removed = cur - want
+    added = [p for p in new if p not in cur]
+    for sh in list(STATE.shards):
+        gone = [p for p in sh.pairs if p in removed]
+        if not gone:
+            continue
+        sh.pairs = [p for p in sh.pairs if p not in removed]
+        await _send_subs(sh, gone, "unsubscribe")
+        if not sh.pairs:
+            if sh.task:
+                sh.task.cancel()
+            STATE.shards.remove(sh)
+    for p in removed:
+        _drop_pair(p)
+    STATE.dropped -= want
+    todo = added
+    for sh in STATE.shards:
+        room = GATE_WS_PAIRS_PER_SHARD - len(sh.pairs)
+        if room > 0 and todo:
+            take, todo = todo[:room], todo[room:]
+            sh.pairs += take
+            await _send_subs(sh, take, "subscribe")
+    next_id = max((sh.id for sh in STATE.shards), default=-1) + 1
+    for sh in make_shards(todo):
+        sh.id += next_id
+        sh.task = asyncio.get_running_loop().create_task(_run_shard(sh))
+        STATE.shards.append(sh)
+    STATE.pairs = new
+    STATE.rank = {p: i for i, p in enumerate(new)}
+    return {"added": len(added), "removed": len(removed), "shards": len(STATE.shards)}
+
+def update_pairs(pairs):
+    """다른 스레드에서 호출 — 스트림 루프에 set_pairs 를 넘기고 바로 반환(concurrent Future)."""
+    if STATE.loop is None:
+        STATE.pairs = list(pairs)
+        return None
+    return asyncio.run_coroutine_threadsafe(set_pairs(pairs), STATE.loop)
@@ -0,0 +1,21 @@
+# gunicorn.conf.py — 다중 워커 배포 예시(SHARED_STORE 필요)
+#
+#   SHARED_STORE=/var/lib/scanner/store.db HISTORY_FILE=/var/lib/scanner/history.bin gunicorn -c gunicorn.conf.py app:app
+#
+# HISTORY_FILE 이 없으면 리더만 이력을 가지므로 팔로워의 /history 는 503 이다.
+#
+# 워커마다 요청을 기다리지 않고 바로 init_background() 를 불러 리더 1개가 수집을 시작하게 한다.
+# /scan/stream(SSE)은 연결마다 스레드 하나를 잡으므로 gthread 워커를 쓴다. 워커당 구독자는
+# SSE_MAX_VIEWERS(기본 32)까지만 받고 나머지는 503 — 스레드의 절반 이상을 일반 요청용으로 남긴다.
+# 시청자를 더 받으려면 두 값을 함께 올린다(전체 상한 = workers × SSE_MAX_VIEWERS).
+
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:" + os.getenv("PORT", "8000"))
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "64"))
+
+def post_worker_init(worker):
+    from app import init_background
+    init_background()
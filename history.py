@@ -0,0 +1,197 @@
+# history.py — 페어별 고정 크기 시계열 링버퍼(OFI·vol_ps·lead·score 등 최근 수 분)
+#
+# STATE.metrics 는 최신 EWMA 값만 들고 있어 "몇 분 동안 어떻게 변했는지"를 볼 수 없다.
+# 샘플러 스레드가 HISTORY_RES_SEC 마다 매핑된 전 심볼의 Gate 지표와 최신 스냅샷 점수를 한 칸씩 적는다.
+#
+# 저장: float64 배열 [capacity, slots, fields] 하나를 미리 잡아 두고 칸 = (ts // res) % slots 로 덮어쓴다.
+#   - 칸마다 ts 를 같이 적으므로 샘플이 빠진 칸(오래된 값)은 조회 때 걸러진다.
+#   - HISTORY_FILE 을 주면 같은 배열을 np.memmap 으로 파일에 매핑한다(재기동 후에도 최근 이력 유지).
+#     심볼→행 번호는 옆의 `<HISTORY_FILE>.idx.json` 에 둔다. 크기가 고정이라 메모리가 늘지 않는다.
+# 행이 다 차면 현재 매핑에 없는 심볼의 행부터 재사용한다.
+# 다중 워커(SHARED_STORE)의 팔로워는 리더가 쓰는 HISTORY_FILE 을 읽기 전용으로 매핑해 조회만 한다(attach).
+
+import json, os, threading, time
+import numpy as np
+
+from config import HISTORY_RES_SEC, HISTORY_SEC, HISTORY_CAPACITY, HISTORY_FILE
+from gate_stream import STATE
+from indicators import lead_score
+
+FIELDS = ("ts", "OFI", "trades_ps", "vol_ps", "dba", "lead", "score", "price")
+_F = {f: i for i, f in enumerate(FIELDS)}
+FLUSH_EVERY_SEC = 30.0   # memmap 더티 페이지를 디스크로(비정상 종료 대비)
+
+class HistoryStore:
+    def __init__(self, res: float = HISTORY_RES_SEC, seconds: float = HISTORY_SEC,
+                 capacity: int = HISTORY_CAPACITY, path: str = HISTORY_FILE):
+        self.res = res
+        self.slots = max(1, int(seconds / res))
+        self.capacity = capacity
+        self.path = path
+        self.rows = {}            # sym -> 행 번호
+        self.samples = 0
+        self.last_sample = 0.0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._engine = None
+        self._score_ver = -1
+        self._scores = {}         # sym -> (score, price) — 스냅샷 버전이 바뀔 때만 다시 만든다
+        self.buf = None           # start() 에서 할당/매핑
+        self.readonly = False     # attach() — 리더 파일을 읽기만 함
+        self._idx_mtime = 0.0
+
+    # ---- 저장소 ----
+    def _meta(self) -> dict:
+        return {"res": self.res, "slots": self.slots, "capacity": self.capacity, "fields": list(FIELDS)}
+
+    def _open(self):
+        shape = (self.capacity, self.slots, len(FIELDS))
+        if not self.path:
+            return np.zeros(shape)
+        idx = {}
+        try:
+            with open(self.path + ".idx.json") as f:
+                idx = json.load(f)
+        except (OSError, ValueError):
+            pass
+        nbytes = int(np.prod(shape)) * 8
+        reuse = (os.path.exists(self.path) and os.path.getsize(self.path) == nbytes
+                 and {k: idx.get(k) for k in self._meta()} == self._meta())
+        if reuse:
+            self.rows = dict(idx.get("rows", {}))
+        return np.memmap(self.path, dtype=np.float64, mode="r+" if reuse else "w+", shape=shape)
+
+    def _follow(self):
+        """읽기 전용: 리더가 인덱스를 고쳤으면 다시 읽고, 파일이 생겼으면 매핑한다."""
+        try:
+            mtime = os.stat(self.path + ".idx.json").st_mtime
+            if mtime == self._idx_mtime:
+                return
+            with open(self.path + ".idx.json") as f:
+                idx = json.load(f)
+        except (OSError, ValueError):
+            return
+        if {k: idx.get(k) for k in self._meta()} != self._meta():
+            return   # 리더와 설정(해상도/보관 구간/용량)이 다름
+        if self.buf is None:
+            self.buf = np.memmap(self.path, dtype=np.float64, mode="r",
+                                 shape=(self.capacity, self.slots, len(FIELDS)))
+        self.rows = dict(idx.get("rows", {}))
+        self._idx_mtime = mtime
+
+    def _save_index(self):
+        if not self.path:
+            return
+        tmp = self.path + ".idx.json.tmp"
+        with open(tmp, "w") as f:
+            json.dump({**self._meta(), "rows": self.rows}, f)
+        os.replace(tmp, self.path + ".idx.json")
+
+    def _assign(self, syms, active) -> bool:
+        """새 심볼에 행을 준다. 빈 행이 없으면 매핑에서 빠진 심볼의 행을 비워 재사용."""
+        new = [s for s in syms if s not in self.rows]
+        if not new:
+            return False
+        used = set(self.rows.values())
+        free = [i for i in range(self.capacity - 1, -1, -1) if i not in used]
+        stale = [s for s in self.rows if s not in active]
+        changed = False
+        for sym in new:
+            if free:
+                i = free.pop()
+            elif stale:
+                i = self.rows.pop(stale.pop())
+            else:
+                break   # 용량 초과 — 나머지 심볼은 기록하지 않음
+            self.buf[i] = 0.0
+            self.rows[sym] = i
+            changed = True
+        return changed
+
+    # ---- 샘플링 ----
+    def _snapshot_scores(self) -> dict:
+        snap = self._engine.snapshot
+        if snap.version != self._score_ver:
+            self._scores = {r["symbol"]: (r["score"], r["price"]) for r in snap.rows}
+            self._score_ver = snap.version
+        return self._scores
+
+    def sample(self, now: float | None = None):
+        """매핑된 전 심볼의 현재 지표를 now 가 속한 칸에 기록"""
+        now = time.time() if now is None else now
+        mapping = self._engine.symbol_map
+        scores = self._snapshot_scores()
+        metrics = STATE.metrics
+        with self._lock:
+            if self._assign(mapping, mapping):
+                self._save_index()
+            rows, block = [], []
+            nan = float("nan")
+            for sym, pair in mapping.items():
+                r = self.rows.get(sym)
+                if r is None:
+                    continue
+                m = metrics.get(pair)
+                score, price = scores.get(sym, (nan, nan))
+                if m is None:
+                    vals = (now, nan, nan, nan, nan, nan, score, price)
+                else:
+                    vals = (now, m["OFI"], m["trades_ps"], m["vol_ps"], m["dba"], lead_score(pair), score, price)
+                rows.append(r)
+                block.append(vals)
+            if rows:
+                self.buf[rows, int(now // self.res) % self.slots] = block
+            self.samples += 1
+            self.last_sample = now
+
+    def query(self, sym: str, seconds: float | None = None, fields=None, now: float | None = None):
+        """최근 seconds 초 이력을 시간순 컬럼으로. 모르는 심볼이면 None."""
+        now = time.time() if now is None else now
+        n = self.slots if seconds is None else max(1, min(self.slots, int(seconds / self.res)))
+        fields = [f for f in (fields or FIELDS) if f in _F]
+        with self._lock:
+            if self.readonly:
+                self._follow()
+            r = self.rows.get(sym)
+            if r is None or self.buf is None:
+                return None
+            cur = int(now // self.res)
+            block = np.array(self.buf[r, np.arange(cur - n + 1, cur + 1) % self.slots])
+        ts = block[:, 0]
+        block = block[(ts > now - n * self.res) & (ts <= now)]
+        out = {"res_sec": self.res, "count": len(block)}
+        for f in ["ts"] + [f for f in fields if f != "ts"]:
+            col = block[:, _F[f]]
+            out[f] = [None if v != v else round(v, 6) for v in col.tolist()]
+        return out
+
+    def _run(self):
+        next_flush = time.time() + FLUSH_EVERY_SEC
+        while True:
+            t = time.time()
+            try:
+                self.sample(t)
+            except Exception:
+                pass
+            if isinstance(self.buf, np.memmap) and t >= next_flush:
+                self.buf.flush()
+                next_flush = t + FLUSH_EVERY_SEC
+            time.sleep(max(0.0, self.res - (time.time() - t)))
+
+    def attach(self):
+        self.readonly = bool(self.path)
+
+    def start(self, engine):
+        self._engine = engine
+        if self._thread is None:
+            self.readonly = False
+            self.buf = self._open()
+            self._thread = threading.Thread(target=self._run, daemon=True, name="history")
+            self._thread.start()
+
+    def health(self) -> dict:
+        return {"symbols": len(self.rows), "capacity": self.capacity, "slots": self.slots, "res_sec": self.res,
+                "samples": self.samples, "file": self.path or None,
+                "last_sample_age": round(time.time() - self.last_sample, 3) if self.last_sample else None}
+
+HISTORY = HistoryStore()
@@ -0,0 +1,206 @@
+# http_pool.py — 공용 HTTP 클라이언트 풀 + 호스트별 토큰버킷 / 적응형 동시성 제한
+#
+# 모든 모듈(스캔 엔진, 심볼 동기화, Gate 스냅샷, 텔레그램)이 이 풀을 통해 나간다.
+# httpx.AsyncClient 는 이벤트 루프에 묶이므로 루프마다 keep-alive 클라이언트 1개를 재사용하고,
+# 레이트 리밋/동시성 상태는 호스트 단위로 스레드 간 공유한다. 스레드 진입점은 asyncio.run 대신
+# run() 을 써서 루프가 끝날 때 그 루프의 클라이언트(커넥션)를 닫는다.
+#
+#  - 토큰버킷: 초당 rps, 최대 burst
+#  - 동시성: AIMD — 성공 시 +1/limit, 429/5xx/네트워크 오류 시 절반
+#  - 429 는 Retry-After 만큼 해당 호스트 전체를 쉬게 한다
+
+import asyncio, contextvars, random, threading, time
+import httpx
+
+from config import HTTP_HOST_LIMITS, HTTP_MAX_CONNECTIONS, HTTP_DEFAULT_LIMIT
+import recorder
+from metrics import HTTP_REQUEST, HTTP_RETRIES
+
+HTTP_TIMEOUT = 8.0
+
+class HostLimiter:
+    def __init__(self, host: str, rps: float, burst: int, max_concurrency: int):
+        self.host = host
+        self.rate = float(rps)
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self.max_concurrency = max_concurrency
+        self.limit = float(max_concurrency)
+        self.inflight = 0
+        self.cooldown_until = 0.0
+        self._t = time.monotonic()
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "ok": 0, "retries": 0, "errors": 0, "rate_limited": 0, "waits": 0, "status": {}}
+
+    def _try_acquire(self) -> float:
+        """0 이면 획득, 아니면 기다릴 초"""
+        with self._lock:
+            now = time.monotonic()
+            if now < self.cooldown_until:
+                return self.cooldown_until - now
+            self.tokens = min(self.burst, self.tokens + (now - self._t) * self.rate)
+            self._t = now
+            if self.inflight >= int(self.limit):
+                return 0.01
+            if self.tokens < 1.0:
+                return (1.0 - self.tokens) / self.rate
+            self.tokens -= 1.0
+            self.inflight += 1
+            return 0.0
+
+    async def acquire(self):
+        waited = False
+        while True:
+            w = self._try_acquire()
+            if w <= 0:
+                if waited:
+                    self.stats["waits"] += 1
+                return
+            waited = True
+            await asyncio.sleep(w)
+
+    def release(self, status: int | None, retry_after: float = 0.0):
+        with self._lock:
+            self.inflight -= 1
+            self.stats["requests"] += 1
+            if status is not None:
+                self.stats["status"][status] = self.stats["status"].get(status, 0) + 1
+            self.stats["ok" if (status is not None and status < 400) else "errors"] += 1
+            if status is None or status == 429 or status >= 500:
+                self.limit = max(1.0, self.limit / 2.0)
+                if status == 429:
+                    self.stats["rate_limited"] += 1
+                    self.cooldown_until = time.monotonic() + max(retry_after, 1.0)
+            else:
+                self.limit = min(float(self.max_concurrency), self.limit + 1.0 / self.limit)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "inflight": self.inflight, "concurrency_limit": round(self.limit, 2),
+                "tokens": round(self.tokens, 2), "rps": self.rate,
+                "cooling": time.monotonic() < self.cooldown_until,
+                **{k: (dict(v) if isinstance(v, dict) else v) for k, v in self.stats.items()}
+            }
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def limiter_for(host: str) -> HostLimiter:
+    lim = _limiters.get(host)
+    if lim is None:
+        with _limiters_lock:
+            lim = _limiters.get(host)
+            if lim is None:
+                rps, burst, conc = HTTP_HOST_LIMITS.get(host, HTTP_DEFAULT_LIMIT)
+                lim = _limiters[host] = HostLimiter(host, rps, burst, conc)
+    return lim
+
+# ===== 호출 측 요청 수 =====
+_sent_to = contextvars.ContextVar("http_sent_to", default=None)
+
+def count_requests(stats: dict):
+    """현재 컨텍스트(와 이후 여기서 만든 태스크)에서 실제로 나간 요청(재시도 포함)을
+    stats["rest_calls"] 에 더한다. 캐시에서 끝난 호출은 세지 않는다."""
+    _sent_to.set(stats)
+
+# ===== 루프별 공유 클라이언트 =====
+_clients = {}   # loop -> httpx.AsyncClient (여러 스레드의 루프가 함께 쓰므로 _clients_lock)
+_clients_lock = threading.Lock()
+_stale = 0      # run() 을 거치지 않고 끝난 루프의 클라이언트(닫을 루프가 없어 버림)
+_transport = None   # 재생(replay) 시 기록된 응답을 돌려주는 transport
+_local_limiter = None
+
+def set_transport(transport):
+    """이후 만드는 클라이언트의 transport 교체. 로컬 transport 에는 레이트 리밋을 두지 않는다."""
+    global _transport, _local_limiter
+    _transport = transport
+    _local_limiter = HostLimiter("local", 1e9, 1e9, 1 << 20) if transport is not None else None
+
+def _make_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        transport=_transport,
+        headers={"accept": "application/json"},
+        limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_CONNECTIONS, keepalive_expiry=60.0),
+        timeout=HTTP_TIMEOUT,
+    )
+
+def get_client() -> httpx.AsyncClient:
+    global _stale
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(loop)
+            if client is None:
+                for old in [l for l in _clients if l.is_closed()]:
+                    del _clients[old]
+                    _stale += 1
+                client = _clients[loop] = _make_client()
+    return client
+
+async def aclose():
+    with _clients_lock:
+        client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+def run(coro):
+    """asyncio.run 과 같되, 루프를 닫기 전에 이 루프의 클라이언트를 aclose() 한다."""
+    async def _main():
+        try:
+            return await coro
+        finally:
+            await aclose()
+    return asyncio.run(_main())
+
+def _retryable(status: int | None) -> bool:
+    return status is None or status == 429 or status >= 500
+
+async def request(method: str, url: str, tries: int = 3, timeout: float = HTTP_TIMEOUT, **kw) -> httpx.Response:
+    """레이트 리밋/재시도를 거친 요청. 429·5xx·네트워크 오류만 재시도(지수 백오프 + 지터)."""
+    host = httpx.URL(url).host
+    lim = _local_limiter or limiter_for(host)
+    client = get_client()
+    sent_to = _sent_to.get()
+    last_err = None
+    for i in range(tries):
+        await lim.acquire()
+        if sent_to is not None:
+            sent_to["rest_calls"] += 1
+        status, retry_after = None, 0.0
+        t0 = time.perf_counter()
+        try:
+            r = await client.request(method, url, timeout=timeout, **kw)
+            status = r.status_code
+            if status == 429:
+                try:
+                    retry_after = float(r.headers.get("Retry-After") or 0)
+                except ValueError:
+                    retry_after = 0.0
+            r.raise_for_status()
+            return r
+        except Exception as e:
+            last_err = e
+        finally:
+            lim.release(status, retry_after)
+            HTTP_REQUEST.observe(time.perf_counter() - t0, host=host, status=status or "error")
+        if not _retryable(status) or i == tries - 1:
+            break
+        lim.stats["retries"] += 1
+        HTTP_RETRIES.inc(host=host)
+        await asyncio.sleep(min(4.0, 0.5 * (2 ** i)) * random.uniform(0.5, 1.0))
+    raise last_err
+
+async def get_json(url: str, params=None, tries: int = 3, timeout: float = HTTP_TIMEOUT):
+    r = await request("GET", url, tries=tries, timeout=timeout, params=params)
+    rec = recorder.get("rest")
+    if rec:
+        rec.write(recorder.KIND_REST, str(r.request.url), r.content, time.time())
+    return r.json()
+
+def pool_stats() -> dict:
+    return {
+        "clients": len(_clients), "stale_clients": _stale,
+        "hosts": {h: lim.snapshot() for h, lim in list(_limiters.items())}
+    }
@@ -1,4 +1,5 @@
 import math
+from collections import deque
 from typing import List
 from config import MA_COMPRESSION_MAX, LEAD_THRESH_BASE
 from gate_stream import STATE
@@ -12,17 +13,92 @@ def compression(close: List[float]) -> float:
     m20, m60, m120 = ma(close,20), ma(close,60), ma(close,120)
     return abs(max(m20,m60,m120)-min(m20,m60,m120)) / c if c else 1.0
 
-def final_score(pair_usdt: str, premium: float | None, cmp_ratio: float) -> tuple[float, float]:
+MA_WINDOWS = (20, 60, 120)
+VOL_BASE_BARS = 5
+RESYNC_EVERY = 500   # 러닝 합계 부동소수 오차 정리 주기(봉 추가 횟수)
+
+class RollingIndicators:
+    """심볼별 MA20/60/120 과 직전 5봉 거래량 합을 러닝 합계로 유지.
+    마지막 원소는 진행 중인 봉이며, 봉 추가/값 변경 모두 O(1).
+    compression() / vol_surge() 는 전체 리스트로 계산한 값과 같다."""
+    __slots__ = ("close", "vol", "sums", "vbase", "_pushes")
+
+    def __init__(self):
+        self.close = deque(maxlen=max(MA_WINDOWS) + 1)
+        self.vol = deque(maxlen=VOL_BASE_BARS + 1)
+        self.sums = [0.0] * len(MA_WINDOWS)   # 각 창: 최근 min(len, n) 봉 합
+        self.vbase = 0.0                      # vol[-6:-1] 합
+        self._pushes = 0
+
+    def reset(self, close: List[float], vol: List[float]):
+        self.close.clear(); self.vol.clear()
+        self.close.extend(close); self.vol.extend(vol)
+        c, v = list(self.close), list(self.vol)
+        self.sums = [sum(c[-n:]) for n in MA_WINDOWS]
+        self.vbase = sum(v[:-1][-VOL_BASE_BARS:])
+        self._pushes = 0
+
+    def push(self, close: float, vol: float):
+        """새 봉 시작(직전 진행봉은 확정)."""
+        c, v = self.close, self.vol
+        for i, n in enumerate(MA_WINDOWS):
+            if len(c) >= n:
+                self.sums[i] -= c[-n]   # 창에서 빠지는 봉
+            self.sums[i] += close
+        if v:
+            self.vbase += v[-1]         # 직전 진행봉이 기준 창으로
+            if len(v) > VOL_BASE_BARS:
+                self.vbase -= v[-VOL_BASE_BARS - 1]
+        c.append(close); v.append(vol)
+        self._pushes += 1
+        if self._pushes >= RESYNC_EVERY:
+            self.reset(list(c), list(v))
+
+    def set_bar(self, back: int, close: float, vol: float):
+        """뒤에서 back 번째(1 = 진행봉) 봉 값 변경."""
+        c, v = self.close, self.vol
+        if 1 <= back <= len(c):
+            dc = close - c[-back]
+            for i, n in enumerate(MA_WINDOWS):
+                if back <= n:
+                    self.sums[i] += dc
+            c[-back] = close
+        if 1 <= back <= len(v):
+            if back >= 2:
+                self.vbase += vol - v[-back]
+            v[-back] = vol
+
+    def compression(self) -> float:
+        if len(self.close) < max(MA_WINDOWS): return 1.0
+        c = self.close[-1]
+        m20, m60, m120 = (s / n for s, n in zip(self.sums, MA_WINDOWS))
+        return abs(max(m20,m60,m120)-min(m20,m60,m120)) / c if c else 1.0
+
+    def vol_surge(self) -> float:
+        base5 = (self.vbase / VOL_BASE_BARS) if len(self.vol) > VOL_BASE_BARS else 0.0
+        lastv = self.vol[-1] if self.vol else 0.0
+        return (lastv / base5) if base5 > 0 else 0.0
+
+def lead_score(pair_usdt: str) -> float:
     m = STATE.metrics.get(pair_usdt, {})
     ofi = abs(m.get("OFI",0.0))
     tps = m.get("trades_ps",0.0)
     vps = m.get("vol_ps",0.0)
     dba = max(1e-6, m.get("dba",1e-6))
-    lead = (0.6*ofi) + (0.25*math.log1p(vps)) + (0.15*math.log1p(tps)) - (0.1*math.log1p(dba))
+    return (0.6*ofi) + (0.25*math.log1p(vps)) + (0.15*math.log1p(tps)) - (0.1*math.log1p(dba))
+
+def final_score(pair_usdt: str, premium: float | None, cmp_ratio: float) -> tuple[float, float]:
+    lead = lead_score(pair_usdt)
     prem_boost = 1.0 + max(0.0, min(premium or 0.0, 0.01))
     cmp_boost  = 1.0 + max(0.0, (MA_COMPRESSION_MAX - cmp_ratio))
     return lead * prem_boost * cmp_boost, lead
 
+def market_vps_median() -> float:
+    # 수집 쪽에서 증분 유지하는 순서통계(STATE.vps)를 읽기만 한다 — O(1)
+    if STATE.remote is not None:
+        return STATE.remote.market().get("vps_median", 0.0)
+    return STATE.vps.median()
+
 def adaptive_lead_threshold(market_vps_median: float) -> float:
     if market_vps_median <= 0.5: 
         return LEAD_THRESH_BASE + 0.2
@@ -0,0 +1,121 @@
+# l2book.py — 로컬 L2 호가창 (REST 스냅샷 + 증분 diff, 업데이트 ID 연속성 검증)
+#
+# 가격 레벨은 정렬된 array('d') 두 개(키/수량)에 보관한다. 키는 최우선 호가가
+# 항상 배열 끝에 오도록 bid=+price, ask=-price 로 저장 → best / top-N 이 O(1).
+
+from array import array
+from bisect import bisect_left
+
+MAX_LEVELS = 200   # 한쪽 최대 보관 레벨(최우선에서 먼 레벨부터 버림)
+
+class BookSide:
+    __slots__ = ("sign", "keys", "sizes")
+
+    def __init__(self, is_bid: bool):
+        self.sign = 1.0 if is_bid else -1.0
+        self.keys = array("d")
+        self.sizes = array("d")
+
+    def clear(self):
+        del self.keys[:]
+        del self.sizes[:]
+
+    def set(self, price: float, size: float):
+        keys, k = self.keys, price * self.sign
+        i = bisect_left(keys, k)
+        if i < len(keys) and keys[i] == k:
+            if size > 0:
+                self.sizes[i] = size
+            else:
+                del keys[i]
+                del self.sizes[i]
+        elif size > 0:
+            keys.insert(i, k)
+            self.sizes.insert(i, size)
+
+    def load(self, levels):
+        self.clear()
+        pts = sorted((float(p) * self.sign, float(s)) for p, s in levels if float(s) > 0)
+        self.keys.extend(k for k, _ in pts)
+        self.sizes.extend(s for _, s in pts)
+
+    def trim(self, max_levels: int = MAX_LEVELS):
+        extra = len(self.keys) - max_levels
+        if extra > 0:
+            del self.keys[:extra]
+            del self.sizes[:extra]
+
+    def best(self) -> float:
+        return self.keys[-1] * self.sign if self.keys else 0.0
+
+    def depth(self, n: int) -> float:
+        """최우선부터 n 레벨 수량 합"""
+        return sum(self.sizes[-n:]) if n > 0 else 0.0
+
+    def top(self, n: int) -> list:
+        """[(price, size)] 최우선부터"""
+        k, s = self.keys[-n:], self.sizes[-n:]
+        return [(k[i] * self.sign, s[i]) for i in range(len(k) - 1, -1, -1)]
+
+    def __len__(self):
+        return len(self.keys)
+
+class LocalBook:
+    """Gate spot.order_book_update 규약: 스냅샷 id 기준으로 U <= id+1 <= u 인 첫 diff 부터
+    적용하고, 이후에는 U == 직전 u + 1 이어야 한다. 어긋나면 apply() 가 False → 재동기화."""
+    __slots__ = ("bids", "asks", "last_id", "ready", "buffer")
+
+    def __init__(self):
+        self.bids = BookSide(True)
+        self.asks = BookSide(False)
+        self.last_id = 0
+        self.ready = False
+        self.buffer = []   # 스냅샷 도착 전 diff 보관
+
+    def reset(self):
+        self.bids.clear(); self.asks.clear()
+        self.last_id = 0
+        self.ready = False
+        self.buffer = []
+
+    def _apply_levels(self, bids, asks):
+        for p, s in bids:
+            self.bids.set(float(p), float(s))
+        for p, s in asks:
+            self.asks.set(float(p), float(s))
+        self.bids.trim(); self.asks.trim()
+
+    def load_snapshot(self, snap_id: int, bids, asks) -> bool:
+        """스냅샷 적용 후 버퍼 diff 를 이어 붙인다. 연속성이 깨지면 False."""
+        self.bids.load(bids); self.bids.trim()
+        self.asks.load(asks); self.asks.trim()
+        self.last_id = int(snap_id)
+        self.ready = True
+        pending, self.buffer = self.buffer, []
+        for U, u, b, a in pending:
+            if not self.apply(U, u, b, a):
+                return False
+        return True
+
+    def apply(self, U: int, u: int, bids, asks) -> bool:
+        if not self.ready:
+            self.buffer.append((U, u, bids, asks))
+            return True
+        if u <= self.last_id:
+            return True                      # 이미 반영된 diff
+        if U > self.last_id + 1:
+            return False                     # 누락 → 재동기화 필요
+        self._apply_levels(bids, asks)
+        self.last_id = u
+        bb, ba = self.bids.best(), self.asks.best()
+        return not (bb and ba and bb >= ba)  # 교차 호가 = 손상
+
+    def best_bid(self) -> float:
+        return self.bids.best()
+
+    def best_ask(self) -> float:
+        return self.asks.best()
+
+    def depth_ratio(self, n: int = 10) -> float:
+        ask = self.asks.depth(n)
+        return (self.bids.depth(n) / ask) if ask > 0 else 0.0
@@ -0,0 +1,60 @@
+# market_stats.py — 시장 전체 통계를 증분 유지(요청/스캔마다 전체 정렬하지 않음)
+#
+# RankedValues 는 key -> 값을 (값, key) 정렬 리스트로 들고 있는 순서통계 구조다.
+#   갱신: 이전 항목 bisect 제거 + insort  → O(log n) 비교 + 포인터 이동(수천 개면 수 µs 미만)
+#   읽기: 분위수는 인덱스 한 번(O(1)), 상위 N 은 끝에서 N 개(O(N))
+# 값이 그대로면 갱신은 dict 조회 한 번으로 끝난다. 틱 사이에 바뀌는 페어가 일부뿐이라
+# 매번 sorted() 를 돌리는 것보다 싸다. 사용처:
+#   - gate_stream.STATE.vps : 페어별 vol_ps → market_vps_median()(적응형 리드 임계치)
+#   - ScanEngine.by_value  : 심볼별 24h 거래대금 → 거래대금 순 유니버스/TOP_N_BY_VALUE
+
+from bisect import bisect_left, insort
+
+class RankedValues:
+    __slots__ = ("_vals", "_sorted")
+
+    def __init__(self):
+        self._vals = {}      # key -> 값
+        self._sorted = []    # (값, key) 오름차순
+
+    def set(self, key, v: float):
+        old = self._vals.get(key)
+        if old == v:
+            return
+        s = self._sorted
+        if old is not None:
+            del s[bisect_left(s, (old, key))]
+        self._vals[key] = v
+        insort(s, (v, key))
+
+    def discard(self, key):
+        old = self._vals.pop(key, None)
+        if old is not None:
+            s = self._sorted
+            del s[bisect_left(s, (old, key))]
+
+    def quantile(self, q: float) -> float:
+        """하위 q 분위 값(정렬 리스트의 int(q*n) 번째, 비었으면 0). q=0.5 는 기존 중앙값 정의와 같다."""
+        s = self._sorted
+        return s[min(len(s) - 1, int(q * len(s)))][0] if s else 0.0
+
+    def median(self) -> float:
+        s = self._sorted
+        return s[len(s) // 2][0] if s else 0.0
+
+    def top(self, n: int) -> list:
+        """값 내림차순 상위 n 개 key"""
+        s = self._sorted
+        return [k for _, k in reversed(s[max(0, len(s) - n):])]
+
+    def get(self, key, default=None):
+        return self._vals.get(key, default)
+
+    def keys(self):
+        return self._vals.keys()
+
+    def __len__(self):
+        return len(self._vals)
+
+    def __contains__(self, key):
+        return key in self._vals
@@ -0,0 +1,181 @@
+# metrics.py — 가벼운 카운터/게이지/히스토그램 + Prometheus 텍스트 출력 + 샘플링 프로파일러
+#
+# 외부 의존성 없이 /metrics 에 필요한 만큼만 구현한다. 지표는 정의 시 전역 레지스트리에 등록되고,
+# 라벨 값 조합마다 시계열 1개가 생긴다. 관측 비용은 dict 조회 + 락 1회.
+# 스크레이프 시점에만 의미 있는 값(호가 신선도, 샤드 상태 등)은 collector 콜백으로 만든다.
+#
+# 프로파일러(PROFILE_HZ > 0): 별도 스레드가 주기적으로 모든 스레드의 스택을 떠서 함수 경로별로
+# 센다. 결과는 flamegraph 의 collapsed stack 형식(`a;b;c N`)으로 /debug/profile 에서 본다.
+
+import bisect, sys, threading, time
+from contextlib import contextmanager
+
+from config import PROFILE_HZ
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FAST_BUCKETS = (1e-6, 5e-6, 1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3)
+
+_registry = []
+_collectors = []
+
+def _fmt_labels(names, values, extra: str = "") -> str:
+    parts = [f'{k}="{str(v)}"' for k, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _num(v: float) -> str:
+    return "+Inf" if v == float("inf") else repr(float(v))
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._series = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, kw) -> tuple:
+        return tuple(kw.get(k, "") for k in self.labels)
+
+    def header(self) -> list:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, n: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0.0) + n
+
+    def render(self) -> list:
+        return [f"{self.name}{_fmt_labels(self.labels, k)} {_num(v)}" for k, v in list(self._series.items())]
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, v: float, **labels):
+        self._series[self._key(labels)] = v
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, v: float, **labels):
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, v)
+        with self._lock:
+            s = self._series.get(key)
+            if s is None:
+                s = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            s[0][i] += 1
+            s[1] += v
+            s[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def render(self) -> list:
+        out = []
+        for key, (counts, total, n) in list(self._series.items()):
+            acc = 0
+            for b, c in zip(self.buckets + (float("inf"),), counts):
+                acc += c
+                le = 'le="' + _num(b) + '"'
+                out.append(f"{self.name}_bucket{_fmt_labels(self.labels, key, le)} {acc}")
+            out.append(f"{self.name}_sum{_fmt_labels(self.labels, key)} {_num(total)}")
+            out.append(f"{self.name}_count{_fmt_labels(self.labels, key)} {n}")
+        return out
+
+def collector(fn):
+    """fn() -> [(name, kind, help, [(labels_dict, value), ...]), ...] — 스크레이프마다 호출"""
+    _collectors.append(fn)
+    return fn
+
+def render() -> str:
+    lines = []
+    for m in _registry:
+        body = m.render()
+        if body:
+            lines += m.header() + body
+    for fn in _collectors:
+        try:
+            families = fn()
+        except Exception:
+            continue
+        for name, kind, help, samples in families:
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+            for labels, v in samples:
+                if v is None:
+                    continue
+                lines.append(f"{name}{_fmt_labels(labels.keys(), labels.values())} {_num(v)}")
+    return "\n".join(lines) + "\n"
+
+# ===== 공용 지표 =====
+SCAN_STAGE = Histogram("scanner_scan_stage_seconds", "scan pipeline stage duration", ("stage",))
+HTTP_REQUEST = Histogram("scanner_http_request_seconds", "outbound HTTP attempt duration", ("host", "status"))
+HTTP_RETRIES = Counter("scanner_http_retries_total", "outbound HTTP retries", ("host",))
+TELEGRAM_SEND = Histogram("scanner_telegram_send_seconds", "telegram sendMessage duration", ("result",))
+INGEST_MSGS = Counter("scanner_ingest_messages_total", "websocket messages received", ("source",))
+INGEST_DECODE = Histogram("scanner_ingest_decode_seconds", "websocket message decode+handle time", ("source",), FAST_BUCKETS)
+INGEST_LAG = Histogram("scanner_ingest_lag_seconds", "receive time minus exchange event time", ("source",))
+
+# ===== 샘플링 프로파일러 =====
+class SamplingProfiler:
+    def __init__(self, hz: float = PROFILE_HZ, max_depth: int = 40):
+        self.hz = hz
+        self.max_depth = max_depth
+        self.counts = {}
+        self.samples = 0
+        self._thread = None
+
+    def start(self):
+        if self.hz <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True, name="sampling-profiler")
+        self._thread.start()
+
+    def _run(self):
+        me = threading.get_ident()
+        names = {}
+        period = 1.0 / self.hz
+        while True:
+            time.sleep(period)
+            if len(names) != threading.active_count():
+                names = {t.ident: t.name for t in threading.enumerate()}
+            for tid, frame in sys._current_frames().items():
+                if tid == me:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    co = frame.f_code
+                    stack.append(f"{co.co_filename.rsplit('/', 1)[-1]}:{co.co_name}")
+                    frame = frame.f_back
+                stack.append(names.get(tid, str(tid)))
+                key = ";".join(reversed(stack))
+                self.counts[key] = self.counts.get(key, 0) + 1
+            self.samples += 1
+
+    def collapsed(self, top: int = 0) -> str:
+        items = sorted(self.counts.items(), key=lambda kv: kv[1], reverse=True)
+        if top:
+            items = items[:top]
+        return "\n".join(f"{k} {v}" for k, v in items) + "\n"
+
+    def reset(self):
+        self.counts = {}
+        self.samples = 0
+
+PROFILER = SamplingProfiler()
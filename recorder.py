@@ -0,0 +1,205 @@
+# recorder.py — 원본 시세 메시지 기록(세그먼트 파일) + 읽기
+#
+# RECORD_DIR 이 설정되면 Gate/빗썸 웹소켓 원문과 REST GET 응답을 수신 시각과 함께 남긴다.
+# 소스(gate / bithumb / rest)마다 파일을 따로 쓰므로 각 파일은 시각 순서가 보장되고,
+# 읽을 때 heapq.merge 로 합친다. 파일은 RECORD_SEGMENT_SEC / RECORD_SEGMENT_BYTES 마다 새로 연다.
+#
+# 파일 형식(리틀 엔디언)
+#   header : b"BSR1"
+#   block  : b"BSRB" | comp_len u32 | raw_len u32 | n u32 | t_first f64 | t_last f64 | zlib(records)
+#   record : ts f64 | kind u8 | key_len u16 | data_len u32 | key | data
+#
+# 블록 헤더만 훑으면 시각 범위로 건너뛸 수 있고, 읽기는 mmap 위에서 블록 단위로 압축을 푼다.
+# 기록 경로에서는 레코드를 버퍼에 붙이기만 하고 압축/쓰기는 전용 스레드가 한다.
+
+import atexit, heapq, mmap, os, queue, struct, threading, time, zlib
+
+from config import RECORD_DIR, RECORD_BLOCK_BYTES, RECORD_FLUSH_SEC, RECORD_SEGMENT_SEC, RECORD_SEGMENT_BYTES
+
+FILE_MAGIC = b"BSR1"
+BLOCK = struct.Struct("<4sIIIdd")
+BLOCK_MAGIC = b"BSRB"
+REC = struct.Struct("<dBHI")
+
+KIND_GATE_WS = 1
+KIND_BITHUMB_WS = 2
+KIND_REST = 3
+SOURCES = ("gate", "bithumb", "rest")
+
+# ===== 쓰기 =====
+class Recorder:
+    def __init__(self, dirpath: str, source: str, level: int = 1):
+        self.dir = dirpath
+        self.source = source
+        self.level = level
+        self._buf = bytearray()
+        self._n = 0
+        self._t_first = 0.0
+        self._t_last = 0.0
+        self._lock = threading.Lock()
+        self._q = queue.SimpleQueue()
+        self._f = None
+        self._seg_start = 0.0
+        self._seg_bytes = 0
+        self.stats = {"records": 0, "blocks": 0, "raw_bytes": 0, "bytes": 0, "segments": 0}
+        os.makedirs(dirpath, exist_ok=True)
+        self._thread = threading.Thread(target=self._writer, daemon=True)
+        self._thread.start()
+
+    def write(self, kind: int, key: str, data, ts: float):
+        if isinstance(data, str):
+            data = data.encode()
+        k = key.encode()
+        with self._lock:
+            if not self._n:
+                self._t_first = ts
+            self._buf += REC.pack(ts, kind, len(k), len(data))
+            self._buf += k
+            self._buf += data
+            self._n += 1
+            self._t_last = ts
+            if len(self._buf) >= RECORD_BLOCK_BYTES:
+                self._cut()
+
+    def _cut(self):
+        # 호출자가 _lock 보유. 압축은 writer 스레드에서
+        if self._n:
+            self._q.put((bytes(self._buf), self._n, self._t_first, self._t_last))
+            self._buf.clear()
+            self._n = 0
+
+    def flush(self, max_age: float = 0.0):
+        with self._lock:
+            if self._n and time.time() - self._t_first >= max_age:
+                self._cut()
+
+    def _open_segment(self):
+        if self._f is not None:
+            self._f.close()
+        name = f"{self.source}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.bsr"
+        self._f = open(os.path.join(self.dir, name), "ab")
+        self._f.write(FILE_MAGIC)
+        self._seg_start, self._seg_bytes = time.time(), len(FILE_MAGIC)
+        self.stats["segments"] += 1
+
+    def _write_block(self, raw: bytes, n: int, t_first: float, t_last: float):
+        if (self._f is None or time.time() - self._seg_start >= RECORD_SEGMENT_SEC
+                or self._seg_bytes >= RECORD_SEGMENT_BYTES):
+            self._open_segment()
+        comp = zlib.compress(raw, self.level)
+        self._f.write(BLOCK.pack(BLOCK_MAGIC, len(comp), len(raw), n, t_first, t_last))
+        self._f.write(comp)
+        self._f.flush()
+        self._seg_bytes += BLOCK.size + len(comp)
+        self.stats["records"] += n
+        self.stats["blocks"] += 1
+        self.stats["raw_bytes"] += len(raw)
+        self.stats["bytes"] += BLOCK.size + len(comp)
+
+    def _writer(self):
+        while True:
+            try:
+                item = self._q.get(timeout=RECORD_FLUSH_SEC)
+            except queue.Empty:
+                self.flush(RECORD_FLUSH_SEC)   # 조용한 소스도 RECORD_FLUSH_SEC 안에 디스크로
+                continue
+            if item is None:
+                break
+            self._write_block(*item)
+
+    def close(self):
+        self.flush()
+        self._q.put(None)
+        self._thread.join(timeout=5)
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+_recorders = {}
+_rec_lock = threading.Lock()
+
+def get(source: str) -> Recorder | None:
+    """RECORD_DIR 미설정이면 None — 기록 경로는 `if rec:` 한 번으로 끝난다."""
+    if not RECORD_DIR:
+        return None
+    rec = _recorders.get(source)
+    if rec is None:
+        with _rec_lock:
+            rec = _recorders.get(source)
+            if rec is None:
+                rec = _recorders[source] = Recorder(RECORD_DIR, source)
+    return rec
+
+def close_all():
+    for rec in list(_recorders.values()):
+        rec.close()
+
+atexit.register(close_all)
+
+def stats() -> dict:
+    return {"dir": RECORD_DIR or None, **{s: dict(r.stats) for s, r in _recorders.items()}}
+
+# ===== 읽기 =====
+def segments(dirpath: str, source: str) -> list:
+    names = sorted(n for n in os.listdir(dirpath) if n.startswith(source + "-") and n.endswith(".bsr"))
+    return [os.path.join(dirpath, n) for n in names]
+
+def iter_blocks(path: str, t0: float | None = None, t1: float | None = None):
+    """(t_first, t_last, n, raw) — 시각 범위 밖 블록은 압축을 풀지 않는다. 잘린 마지막 블록은 무시."""
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < len(FILE_MAGIC) + BLOCK.size:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm[:len(FILE_MAGIC)] != FILE_MAGIC:
+                raise ValueError(f"not a recording: {path}")
+            off = len(FILE_MAGIC)
+            while off + BLOCK.size <= size:
+                magic, clen, rlen, n, ta, tb = BLOCK.unpack_from(mm, off)
+                if magic != BLOCK_MAGIC:
+                    if mm[off:off + len(FILE_MAGIC)] == FILE_MAGIC:   # 같은 이름으로 이어 쓴 세그먼트
+                        off += len(FILE_MAGIC)
+                        continue
+                    break
+                start = off + BLOCK.size
+                if start + clen > size:
+                    break
+                off = start + clen
+                if (t1 is not None and ta > t1) or (t0 is not None and tb < t0):
+                    continue
+                yield ta, tb, n, zlib.decompress(mm[start:start + clen])
+
+def iter_records(path: str, t0: float | None = None, t1: float | None = None):
+    """(ts, kind, key, data) — data 는 블록 버퍼의 memoryview(복사 없음)"""
+    for _, _, n, raw in iter_blocks(path, t0, t1):
+        mv = memoryview(raw)
+        off = 0
+        unpack = REC.unpack_from
+        for _ in range(n):
+            ts, kind, klen, dlen = unpack(raw, off)
+            off += REC.size
+            key = bytes(mv[off:off + klen]).decode() if klen else ""
+            off += klen
+            data = mv[off:off + dlen]
+            off += dlen
+            if (t0 is None or ts >= t0) and (t1 is None or ts <= t1):
+                yield ts, kind, key, data
+
+def _chain(paths, t0, t1):
+    for path in paths:
+        yield from iter_records(path, t0, t1)
+
+def iter_source(dirpath: str, source: str, t0=None, t1=None):
+    # 프로세스(pid)별 세그먼트 열은 각각 시각 순 → 여러 프로세스가 같은 소스를 썼으면 병합
+    by_pid = {}
+    for path in segments(dirpath, source):
+        by_pid.setdefault(path.rsplit("-", 1)[-1], []).append(path)
+    its = [_chain(paths, t0, t1) for paths in by_pid.values()]
+    if len(its) <= 1:
+        return its[0] if its else iter(())
+    return heapq.merge(*its, key=lambda r: r[0])
+
+def read(dirpath: str, sources=("gate", "bithumb"), t0=None, t1=None):
+    """여러 소스를 시각 순으로 합친 레코드 스트림"""
+    its = [iter_source(dirpath, s, t0, t1) for s in sources]
+    return its[0] if len(its) == 1 else heapq.merge(*its, key=lambda r: r[0])
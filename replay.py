@@ -0,0 +1,186 @@
+# replay.py — recorder 로 남긴 시세를 GateState / 빗썸 상태 / 점수 파이프라인에 다시 흘려 넣는다
+#
+#   python replay.py DIR [--speed 1.0] [--from TS] [--to TS] [--scan SEC] [--no-detect]
+#
+# 웹소켓 원문은 기록 시각 그대로 gate_stream.handle / bithumb_stream.handle 로 들어가고,
+# 호가 스냅샷·시드·스캔이 부르는 REST 는 기록된 응답(해당 시각 이전 최신본)으로 답한다.
+# 수집·스캔 엔진·알림 쿨다운의 시계(_now)는 재생 시각으로 바꾸고, 알림은 텔레그램 대신 목록으로 모은다.
+# --speed 를 주지 않으면 최대 속도로 재생한다.
+
+import argparse, asyncio, bisect, json, time
+import httpx
+
+import bithumb_stream
+import gate_stream
+import http_pool
+import recorder
+import scan_engine
+import telegram_notify
+from alert_detector import DETECTOR
+from scan_engine import ENGINE
+from symbol_sync import build_intersection
+
+YIELD_EVERY = 256    # 이 메시지 수마다 이벤트 루프 양보(스냅샷/시드 작업 진행)
+DETECT_SEC = 0.1     # 틱 감지 판정 주기(재생 시각) — 라이브 감지 스레드의 틱 합치기와 같은 역할
+
+class ReplayClock:
+    def __init__(self):
+        self.t = 0.0
+
+    def now(self) -> float:
+        return self.t
+
+class RestArchive:
+    """URL -> 기록된 응답들. 요청 시각 이전 최신본, 없으면 가장 이른 것을 돌려준다."""
+
+    def __init__(self, dirpath: str, clock: ReplayClock, t1=None):
+        self.clock = clock
+        self._ts = {}
+        self._body = {}
+        for ts, _, key, data in recorder.iter_source(dirpath, "rest", None, t1):
+            self._ts.setdefault(key, []).append(ts)
+            self._body.setdefault(key, []).append(bytes(data))
+        self.hits = self.misses = 0
+
+    def __len__(self):
+        return sum(len(v) for v in self._ts.values())
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        key = str(request.url)
+        ts = self._ts.get(key)
+        if not ts:
+            self.misses += 1
+            return httpx.Response(404, json={"error": "not recorded", "url": key})
+        self.hits += 1
+        i = max(0, bisect.bisect_right(ts, self.clock.t) - 1)
+        return httpx.Response(200, content=self._body[key][i], headers={"content-type": "application/json"})
+
+class AlertLog:
+    """OUTBOX 자리에 끼워 재생 중 알림을 모은다(put 시그니처 동일)."""
+
+    def __init__(self):
+        self.items = []
+
+    def put(self, text: str, t_event: float | None = None):
+        self.items.append((t_event, text.split("\n", 1)[0]))
+
+class Replayer:
+    def __init__(self, dirpath: str, speed: float | None = None, t0=None, t1=None,
+                 scan_every: float | None = None, detect: bool = True,
+                 on_sample=None, sample_every: float = 1.0):
+        self.dir = dirpath
+        self.speed = speed
+        self.t0, self.t1 = t0, t1
+        self.scan_every = scan_every
+        self.detect = detect
+        self.on_sample = on_sample       # fn(ts) — 재생 시각 sample_every 초 격자마다(backtest 추출 등)
+        self.sample_every = sample_every
+        self.clock = ReplayClock()
+        self.alerts = AlertLog()
+        self.stats = {"gate": 0, "bithumb": 0, "scans": 0, "errors": 0}
+
+    def _install(self, archive: RestArchive):
+        # 수집·스캔·쿨다운이 모두 같은 재생 시계를 본다(알림 쿨다운/부스트 창/스냅샷 시각)
+        for mod in (gate_stream, bithumb_stream, scan_engine, telegram_notify):
+            mod._now = self.clock.now
+        gate_stream._snap_sem = gate_stream.SnapshotGate(gate_stream.SNAPSHOT_CONCURRENCY)
+        bithumb_stream._seed_sem = asyncio.Semaphore(bithumb_stream.SEED_CONCURRENCY)
+        bithumb_stream.STATE.connected = True
+        http_pool.set_transport(httpx.MockTransport(archive.handler))
+        scan_engine.OUTBOX = self.alerts
+
+    async def run(self) -> dict:
+        archive = RestArchive(self.dir, self.clock, self.t1)
+        self._install(archive)
+        records = recorder.read(self.dir, ("gate", "bithumb"), self.t0, self.t1)
+        first = next(iter(records), None)
+        if first is None:
+            return {"records": 0}
+        self.clock.t = first[0]
+        ENGINE.symbol_map = await build_intersection()   # 기록된 ALL_KRW / currency_pairs 기준
+        if self.detect:
+            DETECTOR.remap()
+            gate_stream.STATE.listeners.append(DETECTOR.on_gate)
+            bithumb_stream.STATE.listeners.append(DETECTOR.on_bithumb)
+
+        t_start, wall0 = first[0], time.perf_counter()
+        next_sweep = t_start + gate_stream.TRADE_SWEEP_SEC
+        next_scan = t_start
+        next_detect = t_start
+        next_sample = t_start
+        n = 0
+        gate_handle, bithumb_handle = gate_stream.handle, bithumb_stream.handle
+        gstate, bstate = gate_stream.STATE, bithumb_stream.STATE
+
+        async def _step(ts, kind, data):
+            nonlocal n, next_sweep, next_scan, next_detect, next_sample
+            if self.speed:
+                lag = (ts - t_start) / self.speed - (time.perf_counter() - wall0)
+                if lag > 0:
+                    await asyncio.sleep(lag)
+            if self.on_sample is not None:
+                while next_sample <= ts:   # 메시지가 없던 구간도 격자를 채움(직전 상태)
+                    self.clock.t = next_sample
+                    self.on_sample(next_sample)
+                    next_sample += self.sample_every
+            self.clock.t = ts
+            try:
+                msg = json.loads(str(data, "utf-8"))
+                if kind == recorder.KIND_GATE_WS:
+                    gate_handle(msg, ts)
+                    self.stats["gate"] += 1
+                else:
+                    bstate.msgs += 1
+                    bstate.last_msg = ts
+                    bithumb_handle(msg, ts)
+                    self.stats["bithumb"] += 1
+            except Exception:
+                self.stats["errors"] += 1
+            if ts >= next_sweep:
+                gate_stream.sweep_rates(ts)
+                next_sweep = ts + gate_stream.TRADE_SWEEP_SEC
+            if self.scan_every and ts >= next_scan:
+                next_scan = ts + self.scan_every
+                try:
+                    await ENGINE.scan_once()
+                    self.stats["scans"] += 1
+                except Exception:
+                    self.stats["errors"] += 1
+            if self.detect and ts >= next_detect:
+                DETECTOR.drain()
+                next_detect = ts + DETECT_SEC
+            n += 1
+            if n % YIELD_EVERY == 0 or gstate.syncing or bstate.seeding:
+                await asyncio.sleep(0)
+
+        await _step(*first[:2], first[3])
+        for ts, kind, _, data in records:
+            await _step(ts, kind, data)
+        if self.detect:
+            DETECTOR.drain()
+
+        wall = time.perf_counter() - wall0
+        span = self.clock.t - t_start
+        return {
+            "records": n, **self.stats, "span_sec": round(span, 1), "wall_sec": round(wall, 3),
+            "speedup": round(span / wall, 1) if wall else None, "msgs_per_sec": round(n / wall) if wall else None,
+            "rest": {"recorded": len(archive), "hits": archive.hits, "misses": archive.misses},
+            "books": len(gstate.book), "resyncs": gstate.resyncs, "alerts": len(self.alerts.items)
+        }
+
+def main():
+    ap = argparse.ArgumentParser(description="recorded market feed replay")
+    ap.add_argument("dir")
+    ap.add_argument("--speed", type=float, default=None, help="1.0 = 실시간, 생략 = 최대 속도")
+    ap.add_argument("--from", dest="t0", type=float, default=None)
+    ap.add_argument("--to", dest="t1", type=float, default=None)
+    ap.add_argument("--scan", type=float, default=None, help="재생 시각 기준 전체 스캔 주기(초)")
+    ap.add_argument("--no-detect", action="store_true", help="틱 단위 알림 감지 끄기")
+    a = ap.parse_args()
+    rp = Replayer(a.dir, a.speed, a.t0, a.t1, a.scan, not a.no_detect)
+    print(json.dumps(http_pool.run(rp.run()), ensure_ascii=False, indent=2))
+    for t, line in rp.alerts.items:
+        print(f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(t))}  {line}")
+
+if __name__ == "__main__":
+    main()
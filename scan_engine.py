@@ -0,0 +1,392 @@
+# scan_engine.py — 백그라운드 스캔 스케줄러 + 불변 스냅샷 발행
+#
+# /scan 요청마다 REST 팬아웃을 돌리지 않고, 엔진이 자체 주기로 파이프라인을 실행해
+# 버전이 붙은 Snapshot 을 교체 발행한다. 라우트는 스냅샷을 메모리에서 필터/정렬만 한다.
+#
+# 부스트: Gate 리드가 임계치를 넘은 심볼만 BOOST_WINDOW_SEC 동안 BOOST_POLL_SEC 간격으로
+# 빗썸 틱커/호가를 재조회한다. 나머지는 SCAN_INTERVAL_SEC 전체 스캔 주기를 따른다.
+
+import asyncio, threading, time
+from dataclasses import dataclass
+import numpy as np
+
+from config import (
+    BITHUMB_BASE, TOP_N_BY_VALUE, PREMIUM_MIN, ORDERBOOK_IMBAL_RATIO,
+    VOLUME_SURGE_RATIO, MA_COMPRESSION_MAX, SCAN_INTERVAL_SEC,
+    BOOST_WINDOW_SEC, BOOST_POLL_SEC, BOOST_MAX_SYMBOLS, SCAN_LEAD_EXTRA,
+    BITHUMB_ALL_REFRESH_SEC
+)
+from gate_stream import STATE
+from indicators import (
+    final_score, lead_score, adaptive_lead_threshold, market_vps_median
+)
+from telegram_notify import OUTBOX, can_send
+from candle_store import CANDLES
+import bithumb_stream as bstream
+from batch_score import Universe, lead_vec, score_batch
+import http_pool
+from metrics import SCAN_STAGE, collector
+from market_stats import RankedValues
+
+def _now(): return time.time()   # replay 가 재생 시각으로 바꿔 끼운다
+
+# ===== 스냅샷 =====
+@dataclass(frozen=True)
+class Snapshot:
+    version: int
+    ts: float               # 스캔 완료 시각(epoch)
+    lead_thresh: float
+    rows: tuple             # 평가 결과 dict 들(발행 후 수정 금지)
+    errors: tuple = ()
+    duration: float = 0.0   # 파이프라인 소요(초)
+    usdt_price: float = 0.0 # 발행 시점 USDT/KRW — 다른 스레드(실시간 감지)는 엔진 필드 대신 이것을 읽는다
+
+    @property
+    def age(self) -> float:
+        return (_now() - self.ts) if self.ts else float("inf")
+
+    def as_dict(self) -> dict:
+        return {"version": self.version, "ts": self.ts, "lead_thresh": self.lead_thresh,
+                "rows": self.rows, "errors": self.errors, "duration": self.duration, "usdt_price": self.usdt_price}
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "Snapshot":
+        return cls(version=d["version"], ts=d["ts"], lead_thresh=d["lead_thresh"],
+                   rows=tuple(d["rows"]), errors=tuple(d["errors"]), duration=d["duration"],
+                   usdt_price=d.get("usdt_price", 0.0))
+
+EMPTY = Snapshot(version=0, ts=0.0, lead_thresh=0.0, rows=())
+
+# ===== 유틸: 재시도 =====
+async def get_with_retry(url: str, params=None, tries: int = 3):
+    # 공용 풀: keep-alive + 호스트별 레이트 리밋 + 429/5xx 백오프
+    return await http_pool.get_json(url, params=params, tries=tries)
+
+async def bithumb_all():
+    return await get_with_retry(f"{BITHUMB_BASE}/public/ticker/ALL_KRW")
+
+async def candle_feats(sym: str) -> tuple[float, float]:
+    # 봉 리스트를 다시 훑지 않고 러닝 합계로 유지되는 지표를 읽는다
+    await CANDLES.get(sym)
+    return CANDLES.features(sym)
+
+async def orderbook(sym: str):
+    return await get_with_retry(f"{BITHUMB_BASE}/public/orderbook/{sym}_KRW")
+
+async def ticker(sym: str):
+    return await get_with_retry(f"{BITHUMB_BASE}/public/ticker/{sym}_KRW")
+
+# ===== 특징 계산 =====
+def orderbook_ratio(ob) -> float:
+    book = (ob.get("data") or {})
+    bids = (book.get("bids") or [])[:10]
+    asks = (book.get("asks") or [])[:10]
+    bid_qty = sum(float(b.get("quantity") or 0) for b in bids if isinstance(b, dict))
+    ask_qty = sum(float(a.get("quantity") or 0) for a in asks if isinstance(a, dict))
+    return (bid_qty / ask_qty) if ask_qty > 0 else 0.0
+
+class StageError(Exception):
+    def __init__(self, stage: str, error: str):
+        super().__init__(f"{stage}: {error}")
+        self.stage, self.error = stage, error
+
+# ===== 엔진 =====
+class ScanEngine:
+    def __init__(self):
+        self.snapshot = EMPTY
+        self.symbol_map = {}
+        self.interval = SCAN_INTERVAL_SEC
+        self.last_error = None   # {"stage","error","ts"} — 실패 시 직전 스냅샷 유지
+        self.boosted = {}        # sym -> 부스트 만료 시각
+        self.stats = {"full_scans": 0, "boost_polls": 0, "rest_calls": 0, "stream_hits": 0}
+        self._features = {}      # sym -> (cmp_ratio, vol_surge) — 1h 봉 기반이라 부스트 중 재사용
+        self._usdt_price = 0.0   # 엔진 스레드 전용(스캔/부스트) — 발행 때 Snapshot.usdt_price 로 복사
+        self._all_data = None    # 마지막 ALL_KRW 응답(스트림 정상 시 저주기 갱신)
+        self._all_ts = 0.0
+        self._next_full = 0.0
+        self._thread = None
+        self.listeners = []      # 발행 콜백 fn(snap) — /scan/stream 구독자 깨우기 등
+        self.by_value = RankedValues()   # sym -> 24h 거래대금(스캔마다 바뀐 값만 갱신)
+        self._scan_errors = []   # 마지막 전체 스캔 오류 — 부스트 스냅샷은 자기 오류 + 이것만 싣는다
+
+    def _publish(self, lead_thresh, rows, errors, duration) -> Snapshot:
+        # 참조 교체 한 번으로 발행 → 읽는 쪽은 락 없이 일관된 스냅샷을 본다
+        snap = Snapshot(
+            version=self.snapshot.version + 1, ts=_now(), lead_thresh=lead_thresh,
+            rows=tuple(rows), errors=tuple(errors[:10]), duration=duration, usdt_price=self._usdt_price
+        )
+        self.snapshot = snap
+        for fn in self.listeners:
+            fn(snap)
+        return snap
+
+    def adopt(self, snap: Snapshot, last_error=None):
+        """다른 프로세스(리더)가 만든 스냅샷을 그대로 발행 — 다중 워커의 팔로워용"""
+        self.snapshot = snap
+        self.last_error = last_error
+        for fn in self.listeners:
+            fn(snap)
+
+    def _alert(self, sym, score, lead, prem, ob_ratio, vol_surge, cmp_ratio, t_event=None) -> bool:
+        """쿨다운 통과 시 발송 큐에 넣고 바로 반환(텔레그램 응답을 기다리지 않음)."""
+        key = f"{sym}"
+        if can_send(key, t_event if t_event is not None else _now()):
+            msg = (
+                f"🚀 <b>급등 감지</b> {sym}\n"
+                f"· score {score:.2f} / lead {lead:.2f}\n"
+                f"· premium {prem*100:.2f}%  · ob {ob_ratio:.2f}\n"
+                f"· 1h vol x{vol_surge:.2f} · MAcmp {cmp_ratio:.3f}\n"
+                f"· 확인: 4H 지지선/매물대 점검 후 진입"
+            )
+            OUTBOX.put(msg, t_event)
+            return True
+        return False
+
+    def _row(self, sym, price, value, vol_surge, ob_ratio, prem, cmp_ratio, lead, score, passed, detail=True) -> dict:
+        gate_pair = self.symbol_map.get(sym)
+        gbook = STATE.book.get(gate_pair) if gate_pair else None
+        gate_ob = gbook.get("depth_ratio") if gbook else None   # 로컬 L2 기준 Gate 호가 불균형(추가 요청 없음)
+        # 정밀 검사 밖(detail=False) 심볼은 봉/호가를 받지 않았으므로 해당 지표는 None(측정값처럼 보이지 않게)
+        return {
+            "symbol": sym,
+            "price": price,
+            "value_24h": round(value, 0),
+            "vol_surge": round(vol_surge, 2) if detail else None,
+            "orderbook_ratio": round(ob_ratio, 2) if detail else None,
+            "gate_ob_ratio": None if gate_ob is None else round(gate_ob, 2),
+            "premium": None if prem is None else round(prem, 4),
+            "ma_compression": round(cmp_ratio, 4) if detail else None,
+            "lead": round(lead, 3),
+            "score": round(score, 3),
+            "pass": bool(passed),
+            "boosted": sym in self.boosted,
+            "detail": detail
+        }
+
+    def evaluate(self, sym, price, value, cmp_ratio, vol_surge, ob_ratio, LEAD_THRESH, t_event=None,
+                 usdt_price=None) -> dict:
+        """심볼 1개 평가(부스트/실시간 감지 경로). 전체 스캔은 batch_score 로 한 번에 계산한다.
+        엔진 밖 스레드는 usdt_price 를 넘긴다(None 이면 엔진 스레드의 값)."""
+        if usdt_price is None:
+            usdt_price = self._usdt_price
+        prem = None
+        gate_pair = self.symbol_map.get(sym)
+        gbook = STATE.book.get(gate_pair) if gate_pair else None
+        if usdt_price > 0 and gbook:
+            mid = (gbook["best_bid"] + gbook["best_ask"]) / 2.0
+            prem = ((price / usdt_price) / mid) - 1.0 if (mid and mid > 0) else None
+
+        score, lead = final_score(gate_pair or "", prem, cmp_ratio)
+        passed = (
+            vol_surge >= VOLUME_SURGE_RATIO and
+            ob_ratio  >= ORDERBOOK_IMBAL_RATIO and
+            (prem is not None and prem >= PREMIUM_MIN) and
+            cmp_ratio <= MA_COMPRESSION_MAX
+        )
+
+        # 알림(옵션)
+        if passed and (lead >= LEAD_THRESH) and (prem is not None):
+            self._alert(sym, score, lead, prem, ob_ratio, vol_surge, cmp_ratio, t_event)
+
+        return self._row(sym, price, value, vol_surge, ob_ratio, prem, cmp_ratio, lead, score, passed)
+
+    async def scan_once(self) -> Snapshot:
+        t0 = time.perf_counter()
+
+        # 시장 강도 기반 리드 임계치
+        LEAD_THRESH = adaptive_lead_threshold(market_vps_median())
+
+        errors = []
+        http_pool.count_requests(self.stats)   # 실제로 나간 REST 만 rest_calls 로(봉 캐시 적중 제외)
+
+        # 1) 틱커 전체 — 빗썸 스트림이 살아 있으면 ALL_KRW 는 목록 갱신용으로 저주기만
+        live = bstream.fresh()
+        if not live or self._all_data is None or _now() - self._all_ts >= BITHUMB_ALL_REFRESH_SEC:
+            try:
+                all_t = await bithumb_all()
+                data = all_t.get("data", {}) or {}
+            except Exception as e:
+                if not live or self._all_data is None:
+                    raise StageError("bithumb_all", str(e))
+                data = self._all_data
+            if not data:
+                raise StageError("bithumb_all", "empty")
+            self._all_data, self._all_ts = data, _now()
+        data = self._all_data
+        usdt_price = bstream.live_usdt_price() or float((data.get("USDT") or {}).get("closing_price") or 0)
+        self._usdt_price = usdt_price
+        t1 = time.perf_counter()
+        SCAN_STAGE.observe(t1 - t0, stage="bithumb_all")
+
+        # 2) 유니버스 컬럼 구성 + 정밀 검사 대상 선별 — 거래대금 순서는 by_value 가 유지
+        quotes = {}
+        for sym, row in data.items():
+            if sym == "date":
+                continue
+            try:
+                lt = bstream.live_ticker(sym)
+                if lt:
+                    price, value = lt
+                else:
+                    price = float((row or {}).get("closing_price") or 0)
+                    value = float((row or {}).get("acc_trade_value_24H") or 0)
+                if price > 0 and value > 0:
+                    quotes[sym] = (price, value)
+                    self.by_value.set(sym, value)
+            except Exception:
+                continue
+        if len(self.by_value) != len(quotes):   # 목록에서 빠졌거나 값이 사라진 심볼
+            for sym in self.by_value.keys() - quotes.keys():
+                self.by_value.discard(sym)
+        rows = [(sym, *quotes[sym]) for sym in self.by_value.top(len(quotes))]
+
+        u = Universe([s for s, _, _ in rows], [self.symbol_map.get(s, "") for s, _, _ in rows])
+        u.price[:] = [p for _, p, _ in rows]
+        u.value[:] = [v for _, _, v in rows]
+        u.set_premium(usdt_price, u.load_gate())
+
+        # 거래대금 상위 + Gate 리드 상위(소형 급등 후보) + 부스트 심볼만 봉/호가를 받는다
+        lead0 = lead_vec(u)
+        by_lead = [i for i in np.argsort(-lead0)[:SCAN_LEAD_EXTRA] if u.pairs[i]]
+        cand_idx = sorted(set(range(min(TOP_N_BY_VALUE, len(u)))) | set(by_lead) |
+                          {i for i, s in enumerate(u.symbols) if s in self.boosted})
+        cand_syms = [u.symbols[i] for i in cand_idx]
+        t2 = time.perf_counter()
+        SCAN_STAGE.observe(t2 - t1, stage="universe")
+
+        # 3) 병렬 수집 — 호가는 실시간 로컬 호가가 없을 때만 REST
+        ob_live = {s: bstream.live_ob_ratio(s) for s in cand_syms}
+        tasks_c = {s: asyncio.create_task(candle_feats(s)) for s in cand_syms}
+        tasks_o = {s: asyncio.create_task(orderbook(s)) for s in cand_syms if ob_live[s] is None}
+        self.stats["stream_hits"] += len(cand_syms) - len(tasks_o)
+
+        detail = np.zeros(len(u), dtype=bool)
+        for i, sym in zip(cand_idx, cand_syms):
+            try:
+                cmp_ratio, vol_surge = await tasks_c[sym]
+                self._features[sym] = (cmp_ratio, vol_surge)
+                u.cmp[i], u.vol_surge[i] = cmp_ratio, vol_surge
+                u.ob_ratio[i] = ob_live[sym] if ob_live[sym] is not None else orderbook_ratio(await tasks_o[sym])
+                detail[i] = True
+            except Exception as e:
+                errors.append({"symbol": sym, "error": f"{type(e).__name__}: {e}"})
+                continue
+
+        t3 = time.perf_counter()
+        SCAN_STAGE.observe(t3 - t2, stage="fanout")
+
+        # 4) 평가 — 전체 유니버스 한 번에
+        res = score_batch(u, LEAD_THRESH)
+        lead, score, passed = res["lead"].tolist(), res["score"].tolist(), res["pass"].tolist()
+        prem = [None if p != p else p for p in u.premium.tolist()]
+        cmp_l, vs_l, ob_l = u.cmp.tolist(), u.vol_surge.tolist(), u.ob_ratio.tolist()
+        out = [
+            self._row(sym, price, value, vs_l[i], ob_l[i], prem[i], cmp_l[i], lead[i], score[i], passed[i], bool(detail[i]))
+            for i, (sym, price, value) in enumerate(rows)
+        ]
+        t4 = time.perf_counter()
+        SCAN_STAGE.observe(t4 - t3, stage="score")
+
+        # 알림(옵션)
+        for i in np.flatnonzero(res["alert"]).tolist():
+            try:
+                self._alert(u.symbols[i], score[i], lead[i], prem[i], ob_l[i], vs_l[i], cmp_l[i])
+            except Exception as e:
+                errors.append({"symbol": u.symbols[i], "error": f"{type(e).__name__}: {e}"})
+
+        SCAN_STAGE.observe(time.perf_counter() - t4, stage="alerts")
+        SCAN_STAGE.observe(time.perf_counter() - t0, stage="total")
+        self.stats["full_scans"] += 1
+        self._scan_errors = errors
+        return self._publish(LEAD_THRESH, out, errors, time.perf_counter() - t0)
+
+    # ===== 부스트 스케줄러 =====
+    def update_boosts(self, LEAD_THRESH: float) -> list:
+        """Gate 리드 임계치 돌파 심볼을 부스트 창에 올리고, 만료된 것은 내린다."""
+        now = _now()
+        for sym, pair in self.symbol_map.items():
+            if pair in STATE.metrics and lead_score(pair) >= LEAD_THRESH:
+                self.boosted[sym] = now + BOOST_WINDOW_SEC
+        for sym in [s for s, until in self.boosted.items() if until <= now]:
+            del self.boosted[sym]
+        ranked = sorted(self.boosted, key=lambda s: lead_score(self.symbol_map.get(s, "")), reverse=True)
+        return ranked[:BOOST_MAX_SYMBOLS]
+
+    async def boost_once(self, syms: list) -> Snapshot:
+        """부스트 심볼만 틱커/호가(필요 시 1h 봉)를 다시 받아 스냅샷의 해당 행을 교체한다."""
+        t0 = time.perf_counter()
+        prev = self.snapshot
+        LEAD_THRESH = adaptive_lead_threshold(market_vps_median())
+
+        self._usdt_price = bstream.live_usdt_price() or self._usdt_price
+        http_pool.count_requests(self.stats)
+
+        async def _one(sym):
+            # 실시간 틱커/호가가 있으면 그대로, 없을 때만 REST
+            lt, ob_ratio = bstream.live_ticker(sym), bstream.live_ob_ratio(sym)
+            if lt is None:
+                row = (await ticker(sym)).get("data") or {}
+                lt = (float(row.get("closing_price") or 0), float(row.get("acc_trade_value_24H") or 0))
+            else:
+                self.stats["stream_hits"] += 1
+            if ob_ratio is None:
+                ob_ratio = orderbook_ratio(await orderbook(sym))
+            if sym not in self._features:
+                self._features[sym] = await candle_feats(sym)
+            price, value = lt
+            cmp_ratio, vol_surge = self._features[sym]
+            return self.evaluate(sym, price, value, cmp_ratio, vol_surge, ob_ratio, LEAD_THRESH)
+
+        results = await asyncio.gather(*[_one(s) for s in syms], return_exceptions=True)
+        by_sym = {r["symbol"]: r for r in prev.rows}
+        errors = []
+        for sym, res in zip(syms, results):
+            if isinstance(res, Exception):
+                errors.append({"symbol": sym, "error": f"{type(res).__name__}: {res}"})
+            elif res["price"] > 0:
+                by_sym[sym] = res
+        seen = {(e["symbol"], e["error"]) for e in errors}
+        errors += [e for e in self._scan_errors if (e["symbol"], e["error"]) not in seen]
+
+        self.stats["boost_polls"] += 1
+        SCAN_STAGE.observe(time.perf_counter() - t0, stage="boost")
+        return self._publish(LEAD_THRESH, list(by_sym.values()), errors, time.perf_counter() - t0)
+
+    async def run(self):
+        while True:
+            t0 = time.monotonic()
+            try:
+                if t0 >= self._next_full:
+                    self._next_full = t0 + self.interval
+                    await self.scan_once()
+                    self.last_error = None
+                else:
+                    syms = self.update_boosts(adaptive_lead_threshold(market_vps_median()))
+                    if syms and self.snapshot.version > 0:
+                        await self.boost_once(syms)
+            except StageError as e:
+                self.last_error = {"stage": e.stage, "error": e.error, "ts": time.time()}
+            except Exception as e:
+                self.last_error = {"stage": "scan", "error": f"{type(e).__name__}: {e}", "ts": time.time()}
+            await asyncio.sleep(max(0.0, BOOST_POLL_SEC - (time.monotonic() - t0)))
+
+    def start(self, symbol_map):
+        self.symbol_map = symbol_map
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=lambda: http_pool.run(self.run()), daemon=True)
+        self._thread.start()
+
+ENGINE = ScanEngine()
+
+@collector
+def _metrics():
+    snap = ENGINE.snapshot
+    return [
+        ("scanner_snapshot_version", "gauge", "published scan snapshot version", [({}, snap.version)]),
+        ("scanner_snapshot_age_seconds", "gauge", "age of the latest scan snapshot",
+         [({}, snap.age if snap.version else None)]),
+        ("scanner_engine_events_total", "counter", "scan engine counters",
+         [({"event": k}, v) for k, v in ENGINE.stats.items()]),
+        ("scanner_boosted_symbols", "gauge", "symbols currently in the boost window", [({}, len(ENGINE.boosted))]),
+    ]
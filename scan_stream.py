@@ -0,0 +1,113 @@
+# scan_stream.py — /scan/stream (Server-Sent Events) 후보 변경분 브로드캐스트
+#
+# 엔진이 스냅샷을 발행하면 구독자들이 깨어나 직전 버전 대비 변경분만 받는다.
+#   event: snapshot  (접속 직후 1회) {"version","ts","lead_thresh","rows":[...]}
+#   event: diff      {"version","ts","lead_thresh","enter":[row],"update":[row],"exit":[sym],"order":[sym]}
+#   : ping           (변경 없을 때 HEARTBEAT_SEC 마다 — 끊긴 연결 정리용)
+# 필터(only_pass/top/min_lead/min_score/sort/desc)가 같은 구독자는 같은 후보 목록을 보므로
+# 목록과 직렬화된 diff 프레임을 (필터, 이전 버전, 새 버전) 단위로 한 번만 만들어 공유한다.
+# 구독자 수가 늘어도 추가 비용은 캐시 조회와 소켓 쓰기뿐이다.
+#
+# 단, 스레드 서버(Flask threaded / gunicorn gthread)에서는 구독자마다 연결 내내 스레드 하나가
+# 대기 상태로 묶인다. join() 이 max_viewers 를 넘는 접속을 거절해 나머지 요청용 스레드를 지킨다.
+
+import json, threading
+from collections import OrderedDict
+
+HEARTBEAT_SEC = 15.0
+FRAME_CACHE = 256   # (필터, v0, v1) -> diff 프레임
+VIEW_CACHE = 256    # 필터 -> 최신 버전 후보 목록(쿼리스트링마다 항목이 생기므로 상한)
+
+def _frame(event: str, version: int, obj) -> str:
+    return f"id: {version}\nevent: {event}\ndata: {json.dumps(obj, separators=(',', ':'))}\n\n"
+
+class ScanFeed:
+    def __init__(self, engine, pick, max_viewers: int = 0):
+        self.engine = engine
+        self.pick = pick                  # fn(snap, *params) -> [row] (app._pick_candidates)
+        self.max_viewers = max_viewers    # 0 = 무제한
+        self._cond = threading.Condition()
+        self._lock = threading.Lock()
+        self._views = OrderedDict()       # params -> (version, rows), LRU
+        self._frames = OrderedDict()
+        self.viewers = 0
+        self.stats = {"publishes": 0, "views": 0, "frames": 0, "frame_hits": 0, "rejected": 0}
+        engine.listeners.append(self._on_publish)
+
+    def _on_publish(self, snap):
+        with self._cond:
+            self.stats["publishes"] += 1
+            self._cond.notify_all()
+
+    def join(self) -> bool:
+        """구독 자리 하나를 잡는다. 상한이면 False(호출 측이 503). 잡았으면 연결 종료 시 leave()."""
+        with self._lock:
+            if self.max_viewers and self.viewers >= self.max_viewers:
+                self.stats["rejected"] += 1
+                return False
+            self.viewers += 1
+            return True
+
+    def leave(self):
+        with self._lock:
+            self.viewers -= 1
+
+    def view(self, params):
+        """현재 스냅샷 기준 필터 결과 — 필터·버전마다 한 번만 계산(동시에 깬 구독자는 락에서 기다렸다 재사용)"""
+        snap = self.engine.snapshot
+        with self._lock:
+            v = self._views.get(params)
+            if v is None or v[0] != snap.version:
+                v = self._views[params] = (snap.version, self.pick(snap, *params) if snap.version else [])
+                self.stats["views"] += 1
+                while len(self._views) > VIEW_CACHE:
+                    self._views.popitem(last=False)
+            self._views.move_to_end(params)
+        return snap, v[1]
+
+    def _diff_frame(self, params, v0: int, prev: list, snap, rows: list) -> str:
+        key = (params, v0, snap.version)
+        with self._lock:
+            f = self._frames.get(key)
+            if f is not None:
+                self.stats["frame_hits"] += 1
+                return f
+            old = {r["symbol"]: r for r in prev}
+            new_syms = {r["symbol"] for r in rows}
+            enter, update = [], []
+            for r in rows:
+                o = old.get(r["symbol"])
+                if o is None:
+                    enter.append(r)
+                elif o != r:
+                    update.append(r)
+            f = self._frames[key] = _frame("diff", snap.version, {
+                "version": snap.version, "ts": snap.ts, "lead_thresh": round(snap.lead_thresh, 2),
+                "enter": enter, "update": update, "exit": [s for s in old if s not in new_syms],
+                "order": [r["symbol"] for r in rows]
+            })
+            self.stats["frames"] += 1
+            while len(self._frames) > FRAME_CACHE:
+                self._frames.popitem(last=False)
+        return f
+
+    def events(self, params, heartbeat: float = HEARTBEAT_SEC):
+        """구독자 1명의 SSE 프레임 제너레이터(연결이 끊기면 GeneratorExit 로 정리). 자리는 join()/leave() 로 센다."""
+        params = tuple(params)
+        snap, rows = self.view(params)
+        yield "retry: 2000\n\n" + _frame("snapshot", snap.version, {
+            "version": snap.version, "ts": snap.ts, "lead_thresh": round(snap.lead_thresh, 2), "rows": rows
+        })
+        version = snap.version
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self.engine.snapshot.version != version, heartbeat)
+            if self.engine.snapshot.version == version:
+                yield ": ping\n\n"
+                continue
+            snap, new_rows = self.view(params)
+            yield self._diff_frame(params, version, rows, snap, new_rows)
+            version, rows = snap.version, new_rows
+
+    def health(self) -> dict:
+        return {"viewers": self.viewers, "max_viewers": self.max_viewers, **self.stats}
@@ -0,0 +1,86 @@
+# shared_store.py — 다중 워커 배포용 공유 저장소(SQLite WAL 파일 하나 + flock 리더 선출)
+#
+# SHARED_STORE 를 주면 같은 파일을 가리키는 워커들 중 `<SHARED_STORE>.lock` 에 flock 을 잡은
+# 하나만 리더가 되어 Gate/빗썸 수집·스캔·알림을 돌리고, 결과를 이 저장소에 올린다.
+# 나머지(팔로워)는 외부 거래소에 붙지 않고 저장소만 읽는다. 리더 프로세스가 죽으면 커널이 락을
+# 풀어 주므로 팔로워 중 하나가 다음 시도에서 리더가 된다.
+#
+#   kv(key, version, ts, value)  : snapshot / health / metrics / symbol_map (value 는 JSON)
+#   cooldown(key, ts)            : 알림 쿨다운 — 조건부 upsert 한 문장이라 워커 간에도 원자적
+#
+# 연결은 스레드마다 하나(sqlite3 연결은 스레드 간 공유 불가). 쓰기는 리더만 하므로 잠금 경합이 거의 없다.
+
+import fcntl, json, os, sqlite3, threading, time
+
+from config import SHARED_STORE
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, version INTEGER NOT NULL, ts REAL NOT NULL, value TEXT)",
+    "CREATE TABLE IF NOT EXISTS cooldown (key TEXT PRIMARY KEY, ts REAL NOT NULL)",
+)
+
+class SharedStore:
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._lock_fd = None
+
+    def _db(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)   # 자동 커밋
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            for stmt in _SCHEMA:
+                db.execute(stmt)
+            self._local.db = db
+        return db
+
+    # ---- 리더 선출 ----
+    def try_lead(self) -> bool:
+        """리더 락을 잡으면 True(이미 잡고 있어도 True). 프로세스가 끝나면 락은 자동 해제."""
+        if self._lock_fd is not None:
+            return True
+        fd = os.open(self.path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._lock_fd = fd
+        return True
+
+    @property
+    def is_leader(self) -> bool:
+        return self._lock_fd is not None
+
+    # ---- key/value ----
+    def put(self, key: str, value, version: int = 0):
+        self._db().execute(
+            "INSERT INTO kv(key, version, ts, value) VALUES(?, ?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET version=excluded.version, ts=excluded.ts, value=excluded.value",
+            (key, version, time.time(), json.dumps(value, separators=(",", ":")))
+        )
+
+    def version(self, key: str):
+        row = self._db().execute("SELECT version FROM kv WHERE key=?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def get(self, key: str):
+        """(version, ts, value) 또는 None"""
+        row = self._db().execute("SELECT version, ts, value FROM kv WHERE key=?", (key,)).fetchone()
+        return (row[0], row[1], json.loads(row[2])) if row else None
+
+    # ---- 알림 쿨다운 ----
+    def claim(self, key: str, now: float, cooldown: float) -> bool:
+        """마지막 발송에서 cooldown 이 지났으면 now 로 갱신하고 True — 워커/리더 교대 간 중복 알림 방지"""
+        cur = self._db().execute(
+            "INSERT INTO cooldown(key, ts) VALUES(?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET ts=excluded.ts WHERE excluded.ts - cooldown.ts >= ?",
+            (key, now, cooldown)
+        )
+        return cur.rowcount == 1
+
+STORE = SharedStore(SHARED_STORE) if SHARED_STORE else None
@@ -0,0 +1,275 @@
+# shm_ingest.py — Gate 수집을 별도 프로세스에서 실행하고 공유 메모리 테이블로 지표 공개
+#
+# GATE_INGEST_MODE=process 일 때 사용. 수집 프로세스는 gate_stream 을 그대로 돌리고
+# 갱신마다 고정 레이아웃 행 하나를 덮어쓴다. Flask 프로세스는 STATE.book/metrics 를
+# 이 테이블의 읽기 뷰로 바꿔 끼우므로 indicators.final_score 와 /scan 은 수정 없이 동작한다.
+#
+# 레이아웃
+#   header : magic u32 | capacity u32 | n_rows u32 | reserved u32
+#   row[i] : seq u64 | pair 32B | best_bid best_ask OFI dba trades_ps vol_ps depth_ratio ts (f64 x8)
+#   blob   : seq u64 | len u32 | reserved u32 | JSON (샤드 상태 등, BLOB_SIZE)
+#
+# 동기화는 행 단위 seqlock: 쓰는 쪽은 seq 를 홀수로 올리고 기록 후 짝수로 올린다.
+# 읽는 쪽은 seq 가 짝수이고 읽기 전후가 같을 때만 값을 채택한다(락 없음, 단일 writer).
+
+import asyncio, atexit, json, os, queue, struct, time
+import multiprocessing as mp
+from collections.abc import Mapping
+from multiprocessing import shared_memory
+
+from config import SHM_CAPACITY
+
+MAGIC = 0x47534D31            # "GSM1"
+HEADER = struct.Struct("<IIII")
+SEQ = struct.Struct("<Q")
+NAME_LEN = 32
+FIELDS = ("best_bid", "best_ask", "OFI", "dba", "trades_ps", "vol_ps", "depth_ratio", "ts")
+ROW = struct.Struct(f"<Q{NAME_LEN}s{len(FIELDS)}d")
+VALS = struct.Struct(f"<{len(FIELDS)}d")
+VALS_OFF = SEQ.size + NAME_LEN
+BLOB_HDR = struct.Struct("<QII")
+BLOB_SIZE = 64 * 1024
+HEALTH_EVERY_SEC = 1.0
+
+class ShmTable:
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self.shm = shm
+        self.buf = shm.buf
+        self.owner = owner
+        _, self.capacity, _, _ = HEADER.unpack_from(self.buf, 0)
+        self._rows_off = HEADER.size
+        self._blob_off = HEADER.size + self.capacity * ROW.size
+        self._index = {}     # pair -> slot (각 프로세스 로컬 캐시)
+        self._known = 0
+
+    @classmethod
+    def create(cls, capacity: int = SHM_CAPACITY) -> "ShmTable":
+        size = HEADER.size + capacity * ROW.size + BLOB_HDR.size + BLOB_SIZE
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        shm.buf[:size] = bytes(size)
+        HEADER.pack_into(shm.buf, 0, MAGIC, capacity, 0, 0)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "ShmTable":
+        # spawn 자식은 부모의 resource_tracker 를 공유하므로 별도 unregister 불필요
+        shm = shared_memory.SharedMemory(name=name)
+        if HEADER.unpack_from(shm.buf, 0)[0] != MAGIC:
+            raise ValueError(f"not a gate shm table: {name}")
+        return cls(shm, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    # ---- 슬롯 ----
+    def n_rows(self) -> int:
+        return HEADER.unpack_from(self.buf, 0)[2]
+
+    def _refresh_index(self):
+        n = self.n_rows()
+        for i in range(self._known, n):
+            off = self._rows_off + i * ROW.size + SEQ.size
+            name = bytes(self.buf[off:off + NAME_LEN]).rstrip(b"\0").decode()
+            self._index[name] = i
+        self._known = n
+
+    def slot(self, pair: str, create: bool = False):
+        i = self._index.get(pair)
+        if i is None:
+            self._refresh_index()
+            i = self._index.get(pair)
+        if i is None and create:
+            # writer 전용: 이름을 먼저 쓰고 n_rows 를 늘려 공개
+            n = self.n_rows()
+            if n >= self.capacity:
+                return None
+            ROW.pack_into(self.buf, self._rows_off + n * ROW.size, 0, pair.encode()[:NAME_LEN], *([0.0] * len(FIELDS)))
+            HEADER.pack_into(self.buf, 0, MAGIC, self.capacity, n + 1, 0)
+            self._index[pair] = i = n
+            self._known = n + 1
+        return i
+
+    def pairs(self) -> list:
+        self._refresh_index()
+        return list(self._index)
+
+    # ---- 행 쓰기/읽기 ----
+    def write(self, pair: str, values):
+        i = self.slot(pair, create=True)
+        if i is None:
+            return
+        buf, off = self.buf, self._rows_off + i * ROW.size
+        seq = SEQ.unpack_from(buf, off)[0]
+        SEQ.pack_into(buf, off, seq + 1)
+        VALS.pack_into(buf, off + VALS_OFF, *values)
+        SEQ.pack_into(buf, off, seq + 2)
+
+    def read(self, pair: str):
+        i = self.slot(pair)
+        if i is None:
+            return None
+        buf, off = self.buf, self._rows_off + i * ROW.size
+        for n in range(10000):
+            s1 = SEQ.unpack_from(buf, off)[0]
+            if not s1 & 1:
+                vals = VALS.unpack_from(buf, off + VALS_OFF)
+                if SEQ.unpack_from(buf, off)[0] == s1:
+                    return vals
+            if n & 15 == 15:
+                time.sleep(0)   # writer 가 기록 도중 선점됐을 수 있음 → CPU 양보
+        return None             # writer 가 기록 중 죽음 — 값 없음으로 취급
+
+    # ---- JSON blob(샤드 상태) ----
+    def write_blob(self, obj):
+        data = json.dumps(obj).encode()[:BLOB_SIZE]
+        buf, off = self.buf, self._blob_off
+        seq = BLOB_HDR.unpack_from(buf, off)[0]
+        BLOB_HDR.pack_into(buf, off, seq + 1, 0, 0)
+        buf[off + BLOB_HDR.size: off + BLOB_HDR.size + len(data)] = data
+        BLOB_HDR.pack_into(buf, off, seq + 2, len(data), 0)
+
+    def blob_seq(self) -> int:
+        return BLOB_HDR.unpack_from(self.buf, self._blob_off)[0]
+
+    def read_blob(self):
+        buf, off = self.buf, self._blob_off
+        for _ in range(1000):
+            s1, n, _ = BLOB_HDR.unpack_from(buf, off)
+            if not s1 & 1:
+                data = bytes(buf[off + BLOB_HDR.size: off + BLOB_HDR.size + n])
+                if BLOB_HDR.unpack_from(buf, off)[0] == s1:
+                    return json.loads(data) if n else None
+            time.sleep(0)
+        return None
+
+# ===== Flask 프로세스 쪽 읽기 뷰 (dict 호환) =====
+_IDX = {f: i for i, f in enumerate(FIELDS)}
+
+class _TableView(Mapping):
+    keys_out = ()
+
+    def __init__(self, table: ShmTable):
+        self.t = table
+
+    def _valid(self, vals) -> bool:
+        return True
+
+    def __getitem__(self, pair):
+        vals = self.t.read(pair)
+        if vals is None or not self._valid(vals):
+            raise KeyError(pair)
+        return {k: vals[_IDX[k]] for k in self.keys_out}
+
+    def __contains__(self, pair):
+        vals = self.t.read(pair)
+        return vals is not None and self._valid(vals)
+
+    def __iter__(self):
+        return iter([p for p in self.t.pairs() if p in self])
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+class ShmBookView(_TableView):
+    keys_out = ("best_bid", "best_ask", "depth_ratio", "ts")
+
+    def _valid(self, vals):
+        return vals[_IDX["best_bid"]] > 0 and vals[_IDX["best_ask"]] > 0
+
+class ShmMetricsView(_TableView):
+    keys_out = ("OFI", "trades_ps", "vol_ps", "dba")
+
+    def _valid(self, vals):
+        return vals[_IDX["ts"]] > 0
+
+class _Remote:
+    def __init__(self, table: ShmTable, ctrl):
+        self.t = table
+        self.ctrl = ctrl   # 수집 프로세스로 보내는 제어 큐(구독 페어 교체)
+        self._seq = -1
+        self._blob = {}
+
+    def _read(self) -> dict:
+        seq = self.t.blob_seq()   # blob 이 바뀐 경우에만 JSON 을 다시 푼다
+        if seq != self._seq:
+            self._blob, self._seq = self.t.read_blob() or {}, seq
+        return self._blob
+
+    def shard_health(self) -> list:
+        return self._read().get("shards", [])
+
+    def market(self) -> dict:
+        return self._read().get("market", {})
+
+    def set_pairs(self, pairs):
+        self.ctrl.put(list(pairs))
+
+# ===== 수집 프로세스 =====
+def _make_sink(table: ShmTable, state):
+    def sink(p):
+        ps = state.table.get(p)   # gate_stream.PairState — 호가 미공개면 best_bid/ask 는 0
+        if ps is None:
+            # 구독 해제된 페어: 0 행(ts=0)은 읽기 뷰에서 없는 페어로 보인다
+            if table.slot(p) is not None:
+                table.write(p, (0.0,) * len(FIELDS))
+            return
+        table.write(p, (
+            ps.best_bid, ps.best_ask, ps.OFI, ps.dba, ps.trades_ps, ps.vol_ps, ps.depth_ratio, time.time()
+        ))
+    return sink
+
+def ingest_main(shm_name: str, pairs, parent_pid: int, ctrl=None):
+    import gate_stream, http_pool
+    table = ShmTable.attach(shm_name)
+    gate_stream.STATE.sink = _make_sink(table, gate_stream.STATE)
+
+    async def _health_loop():
+        while True:
+            await asyncio.sleep(HEALTH_EVERY_SEC)
+            if os.getppid() != parent_pid:
+                os._exit(0)   # 부모(Flask) 종료 → 고아로 남지 않음
+            table.write_blob({"shards": gate_stream.shard_health(), "resyncs": gate_stream.STATE.resyncs,
+                              "market": gate_stream.market_stats()})
+            while ctrl is not None:
+                try:
+                    new_pairs = ctrl.get_nowait()
+                except queue.Empty:
+                    break
+                await gate_stream.set_pairs(new_pairs)
+
+    async def _main():
+        await asyncio.gather(gate_stream.run_stream(pairs), _health_loop())
+
+    http_pool.run(_main())
+
+_proc = None
+_table = None
+
+def start_ingest_process(pairs, state) -> ShmTable:
+    """수집 프로세스를 띄우고 state.book/metrics 를 공유 메모리 읽기 뷰로 교체한다."""
+    global _proc, _table
+    _table = ShmTable.create(max(SHM_CAPACITY, len(pairs)))
+    ctx = mp.get_context("spawn")
+    ctrl = ctx.Queue()
+    _proc = ctx.Process(target=ingest_main, args=(_table.name, list(pairs), os.getpid(), ctrl), daemon=True)
+    _proc.start()
+    state.pairs = list(pairs)
+    state.book = ShmBookView(_table)
+    state.metrics = ShmMetricsView(_table)
+    state.remote = _Remote(_table, ctrl)
+    atexit.register(_shutdown)
+    return _table
+
+def _shutdown():
+    if _proc is not None and _proc.is_alive():
+        _proc.terminate()
+        _proc.join(timeout=2)
+    if _table is not None:
+        _table.close()
@@ -1,17 +1,21 @@
-import httpx
+import json, os, time
 from typing import Dict, List
-from config import BITHUMB_BASE, GATE_REST, MANUAL_SYMBOL_MAP
+from config import BITHUMB_BASE, GATE_REST, MANUAL_SYMBOL_MAP, SYMBOL_MAP_CACHE
+import http_pool
 
-async def get_bithumb_symbols(client: httpx.AsyncClient) -> List[str]:
-    r = await client.get(f"{BITHUMB_BASE}/public/ticker/ALL_KRW", timeout=8.0)
-    r.raise_for_status()
-    data = r.json().get("data", {})
-    return [s for s in data.keys() if s not in ("date",)]
+def _value_24h(row) -> float:
+    try:
+        return float((row or {}).get("acc_trade_value_24H") or 0)
+    except (TypeError, ValueError, AttributeError):
+        return 0.0
 
-async def get_gate_usdt_pairs(client: httpx.AsyncClient) -> List[str]:
-    r = await client.get(f"{GATE_REST}/spot/currency_pairs", timeout=10.0)
-    r.raise_for_status()
-    items = r.json()
+async def get_bithumb_symbols() -> List[str]:
+    """24h 거래대금 내림차순 — 매핑(과 캐시)의 순서가 곧 Gate 호가 동기화 우선순위가 된다"""
+    data = (await http_pool.get_json(f"{BITHUMB_BASE}/public/ticker/ALL_KRW", timeout=8.0)).get("data", {})
+    return sorted((s for s in data.keys() if s not in ("date",)), key=lambda s: -_value_24h(data[s]))
+
+async def get_gate_usdt_pairs() -> List[str]:
+    items = await http_pool.get_json(f"{GATE_REST}/spot/currency_pairs", timeout=10.0)
     return [x["id"] for x in items if x.get("quote", "").upper() == "USDT"]
 
 def map_symbol(sym: str, gate_pairs_set: set) -> str | None:
@@ -30,9 +34,8 @@ def map_symbol(sym: str, gate_pairs_set: set) -> str | None:
     return None
 
 async def build_intersection() -> Dict[str, str]:
-    async with httpx.AsyncClient(headers={"accept": "application/json"}) as client:
-        b_syms = await get_bithumb_symbols(client)
-        g_pairs = await get_gate_usdt_pairs(client)
+    b_syms = await get_bithumb_symbols()
+    g_pairs = await get_gate_usdt_pairs()
     gset = set(g_pairs)
     mapping = {}
     for s in b_syms:
@@ -40,3 +43,19 @@ async def build_intersection() -> Dict[str, str]:
         if m:
             mapping[s] = m
     return mapping
+
+# ===== 디스크 캐시 =====
+def load_cache(path: str = SYMBOL_MAP_CACHE) -> tuple[Dict[str, str], float]:
+    """(매핑, 저장 후 경과 초). 없거나 깨졌으면 ({}, inf)."""
+    try:
+        with open(path) as f:
+            d = json.load(f)
+        return dict(d["map"]), max(0.0, time.time() - float(d["ts"]))
+    except Exception:
+        return {}, float("inf")
+
+def save_cache(mapping: Dict[str, str], path: str = SYMBOL_MAP_CACHE):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"ts": time.time(), "map": mapping}, f)
+    os.replace(tmp, path)   # 원자적 교체 — 읽는 쪽이 반쯤 쓴 파일을 보지 않음
@@ -1,19 +1,94 @@
-import time, httpx
-from config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, ALERT_COOLDOWN_SEC
+import asyncio, threading, time
+from collections import deque
+import http_pool
+from shared_store import STORE
+from metrics import TELEGRAM_SEND
+from config import TELEGRAM_API, TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, ALERT_COOLDOWN_SEC, TELEGRAM_OUTBOX_MAX, TELEGRAM_OUTBOX_WORKERS
 
 _last_sent = {}
+_sent_lock = threading.Lock()   # 엔진 스레드와 실시간 감지 스레드가 함께 부른다
 
-def can_send(key: str) -> bool:
-    now = time.time()
-    last = _last_sent.get(key, 0.0)
-    if now - last >= ALERT_COOLDOWN_SEC:
-        _last_sent[key] = now
-        return True
+def _now(): return time.time()   # 쿨다운 기준 시각 — replay 는 재생 시계로 교체
+
+def can_send(key: str, now: float | None = None) -> bool:
+    now = _now() if now is None else now
+    if STORE is not None:
+        return STORE.claim(key, now, ALERT_COOLDOWN_SEC)   # 워커/리더 교대 간 공유 쿨다운
+    with _sent_lock:
+        if now - _last_sent.get(key, 0.0) >= ALERT_COOLDOWN_SEC:
+            _last_sent[key] = now
+            return True
     return False
 
 async def send_telegram(text: str):
     if not TELEGRAM_BOT_TOKEN or not TELEGRAM_CHAT_ID:
         return
-    url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-    async with httpx.AsyncClient() as client:
-        await client.post(url, json={"chat_id": TELEGRAM_CHAT_ID, "text": text, "parse_mode":"HTML"}, timeout=8.0)
+    url = f"{TELEGRAM_API}/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
+    await http_pool.request("POST", url, json={"chat_id": TELEGRAM_CHAT_ID, "text": text, "parse_mode":"HTML"}, timeout=8.0)
+
+# ===== 발송 큐 =====
+def latency_summary(xs) -> dict:
+    """초 단위 지연 표본 → {"p50","p99"(ms),"n"}"""
+    xs = sorted(xs)
+    pct = lambda q: round(xs[min(len(xs) - 1, int(q * len(xs)))] * 1000, 2) if xs else None
+    return {"p50": pct(0.5), "p99": pct(0.99), "n": len(xs)}
+
+class Outbox:
+    """전용 루프 스레드에서 도는 유한 발송 큐. put() 은 어느 스레드에서든 즉시 반환한다.
+    루프가 하나라 http_pool 클라이언트(keep-alive)도 하나를 계속 쓴다."""
+
+    def __init__(self, maxsize: int = TELEGRAM_OUTBOX_MAX, workers: int = TELEGRAM_OUTBOX_WORKERS):
+        self.maxsize = maxsize
+        self.workers = workers
+        self._loop = None
+        self._q = None
+        self._lock = threading.Lock()
+        self.stats = {"queued": 0, "sent": 0, "failed": 0, "dropped": 0}
+        self.latency = deque(maxlen=500)   # 이벤트(틱) 시각 → 발송 완료(초)
+
+    def start(self):
+        with self._lock:
+            if self._loop is not None:
+                return
+            ready = threading.Event()
+
+            def _run():
+                self._loop = asyncio.new_event_loop()
+                asyncio.set_event_loop(self._loop)
+                self._q = asyncio.Queue(self.maxsize)
+                for _ in range(self.workers):
+                    self._loop.create_task(self._worker())
+                ready.set()
+                self._loop.run_forever()
+
+            threading.Thread(target=_run, daemon=True).start()
+            ready.wait()
+
+    def put(self, text: str, t_event: float | None = None):
+        self.start()
+        self._loop.call_soon_threadsafe(self._put, (text, t_event or time.time()))
+
+    def _put(self, item):
+        if self._q.full():
+            self._q.get_nowait()   # 오래된 알림보다 최신 알림 우선
+            self.stats["dropped"] += 1
+        self._q.put_nowait(item)
+        self.stats["queued"] += 1
+
+    async def _worker(self):
+        while True:
+            text, t_event = await self._q.get()
+            t0 = time.perf_counter()
+            try:
+                await send_telegram(text)
+                self.stats["sent"] += 1
+                self.latency.append(time.time() - t_event)
+                TELEGRAM_SEND.observe(time.perf_counter() - t0, result="ok")
+            except Exception:
+                self.stats["failed"] += 1
+                TELEGRAM_SEND.observe(time.perf_counter() - t0, result="error")
+
+    def snapshot(self) -> dict:
+        return {**self.stats, "pending": self._q.qsize() if self._q else 0, "latency_ms": latency_summary(self.latency)}
+
+OUTBOX = Outbox()